@@ -0,0 +1,252 @@
+# 🚧 명령/버튼 입장 제어 (사용자·채널 토큰 버킷 + 명령별 동시 실행 제한 + 대기열)
+# 시트를 쓰는 명령은 한 번에 몇 개까지만 돌게 하고, 넘치면 짧은 대기열에서 기다리게 한다.
+# 대기열까지 차면 기다리지 않고 바로 거절한다. 한 사람이 연타해도 시트 할당량을 다 쓰지 못하도록
+# 사용자·채널마다 토큰 버킷을 두고, 사용자 한 명이 동시에 돌릴 수 있는 요청 수도 묶는다.
+# 거절되면 [결과] 형식의 안내(다시 시도할 시각)를 보내고, 명령 본문은 실행하지 않는다.
+import asyncio
+import functools
+import math
+import time
+from collections import deque
+
+from sheet_quota import TokenBucket
+from tracing import add_span
+
+
+class AdmissionRejected(Exception):
+    """입장 거절. reason: user_rate / channel_rate / user_busy / queue_full / queue_timeout"""
+
+    def __init__(self, reason: str, retry_after: float = 0.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def message(self) -> str:
+        wait = max(1, math.ceil(self.retry_after))
+        if self.reason == "user_rate":
+            return f"⏳ 요청이 너무 잦습니다. {wait}초 후 다시 시도해 주세요."
+        if self.reason == "channel_rate":
+            return f"⏳ 이 채널의 요청이 많습니다. {wait}초 후 다시 시도해 주세요."
+        if self.reason == "user_busy":
+            return "⏳ 이전 요청을 처리 중입니다. 끝난 뒤 다시 시도해 주세요."
+        return "🚧 지금 요청이 몰려 있습니다. 잠시 후 다시 시도해 주세요."
+
+
+class _Gate:
+    """동시 실행 limit 개 + 대기열 최대 queue 개 (FIFO)."""
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for f in self._waiters if not f.done())
+
+    async def enter(self, wait: float):
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        if self.waiting >= self.queue:
+            raise AdmissionRejected("queue_full", wait)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), wait)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                return   # 시간 초과와 자리 넘겨받기가 겹친 경우: 이미 active 에 포함됨
+            fut.cancel()
+            raise AdmissionRejected("queue_timeout", wait) from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.leave()   # 넘겨받은 자리를 다음 대기자에게
+            else:
+                fut.cancel()
+            raise
+
+    def leave(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)   # 자리를 그대로 넘긴다 (active 유지)
+                return
+        self.active -= 1
+
+
+class Admission:
+    """입장 제어 데코레이터 공장.
+
+    @admission.command("추첨")              → bot.command 콜백 (ctx, *args)
+    @admission("OverallButton")            → 버튼/모달 콜백 (self, interaction, *args)
+
+    - limit(name, concurrency, queue): 이름별 동시 실행 수/대기열 크기 (설정 없으면 버킷만)
+    - user_per_min / user_burst: 사용자별 토큰 버킷 (명령·버튼 공통)
+    - channel_per_min / channel_burst: 채널별 토큰 버킷
+    - user_inflight: 사용자 한 명이 동시에 처리 중일 수 있는 요청 수
+    - wait: 대기열에서 기다리는 최대 초
+    - render(text): 거절 안내 문구를 메시지로 ([결과] 형식 등)
+    - notify_every: 같은 사용자에게 명령 거절 안내를 다시 보내기까지 최소 초 (안내 자체가 도배되지 않게)
+    """
+
+    _PRUNE_EVERY = 1000   # 입장 이만큼마다 오래 안 쓴 버킷 정리
+    _IDLE = 600.0         # 이 초 동안 안 쓴 버킷은 가득 찬 것과 같으므로 지운다
+
+    def __init__(self, registry=None, user_per_min: int = 20, user_burst: int = 5,
+                 channel_per_min: int = 60, channel_burst: int = 15, user_inflight: int = 2,
+                 wait: float = 10.0, render=None, notify_every: float = 10.0):
+        self.user_per_min, self.user_burst = user_per_min, user_burst
+        self.channel_per_min, self.channel_burst = channel_per_min, channel_burst
+        self.user_inflight = user_inflight
+        self.wait = wait
+        self.render = render or (lambda text: text)
+        self.notify_every = notify_every
+        self._gates = {}
+        self._users = {}      # 사용자 id → [버킷, 마지막 사용]
+        self._channels = {}   # 채널 id → [버킷, 마지막 사용]
+        self._inflight = {}   # 사용자 id → 처리 중 수
+        self._notified = {}   # 사용자 id → 다음 안내 가능 시각
+        self._admitted = 0
+        self._m = None
+        if registry is not None:
+            self._m = {
+                "rejected": registry.counter(
+                    "bot_admission_rejected_total", "입장 거절 수", ("component", "reason"),
+                ),
+                "wait": registry.histogram(
+                    "bot_admission_wait_seconds", "입장 대기 시간(초)", ("component",),
+                    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+                ),
+            }
+            registry.gauge(
+                "bot_admission_active", "동시 실행 중인 요청 수", ("component",),
+                fn=lambda: {(n,): g.active for n, g in self._gates.items()},
+            )
+            registry.gauge(
+                "bot_admission_queue_depth", "입장 대기열 길이", ("component",),
+                fn=lambda: {(n,): g.waiting for n, g in self._gates.items()},
+            )
+
+    def limit(self, name: str, concurrency: int, queue: int = 0):
+        self._gates[name] = _Gate(max(1, concurrency), max(0, queue))
+        return self
+
+    # ── 입장/퇴장 ─────────────────────────────────────────────────────
+    def _bucket(self, table: dict, key, per_min: int, burst: int, now: float):
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = [TokenBucket(per_min, burst), now]
+        entry[1] = now
+        return entry[0]
+
+    def _prune(self, now: float):
+        for table in (self._users, self._channels):
+            for key in [k for k, (_, used) in table.items() if now - used > self._IDLE]:
+                del table[key]
+        for key in [k for k, until in self._notified.items() if until <= now]:
+            del self._notified[key]
+
+    async def enter(self, name: str, user_id, channel_id=None):
+        """입장 (거절이면 AdmissionRejected). 입장했으면 끝난 뒤 반드시 leave()."""
+        now = time.monotonic()
+        self._admitted += 1
+        if self._admitted % self._PRUNE_EVERY == 0:
+            self._prune(now)
+        if self._inflight.get(user_id, 0) >= self.user_inflight:
+            raise AdmissionRejected("user_busy")
+        user = self._bucket(self._users, user_id, self.user_per_min, self.user_burst, now)
+        retry = user.try_take()
+        if retry:
+            raise AdmissionRejected("user_rate", retry)
+        channel = None
+        if channel_id is not None:
+            channel = self._bucket(self._channels, channel_id, self.channel_per_min, self.channel_burst, now)
+            retry = channel.try_take()
+            if retry:
+                user.give_back()
+                raise AdmissionRejected("channel_rate", retry)
+        self._inflight[user_id] = self._inflight.get(user_id, 0) + 1
+        gate = self._gates.get(name)
+        if gate is None:
+            return
+        started = time.perf_counter()
+        try:
+            await gate.enter(self.wait)
+        except BaseException:
+            self._release_user(user_id)
+            user.give_back()   # 몰려서 거절된 것은 사용자 몫으로 치지 않음
+            if channel is not None:
+                channel.give_back()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            add_span("admission.wait", waited)
+            if self._m is not None:
+                self._m["wait"].observe(waited, component=name)
+
+    def leave(self, name: str, user_id):
+        gate = self._gates.get(name)
+        if gate is not None:
+            gate.leave()
+        self._release_user(user_id)
+
+    def _release_user(self, user_id):
+        n = self._inflight.get(user_id, 0) - 1
+        if n > 0:
+            self._inflight[user_id] = n
+        else:
+            self._inflight.pop(user_id, None)
+
+    def _rejected(self, name: str, e: AdmissionRejected):
+        if self._m is not None:
+            self._m["rejected"].inc(component=name, reason=e.reason)
+
+    def _should_notify(self, user_id) -> bool:
+        now = time.monotonic()
+        if self._notified.get(user_id, 0.0) > now:
+            return False
+        self._notified[user_id] = now + self.notify_every
+        return True
+
+    # ── 데코레이터 ────────────────────────────────────────────────────
+    def command(self, name: str):
+        """bot.command 콜백용: 거절되면 채널에 안내 (같은 사용자에게는 notify_every 초에 한 번)."""
+        def deco(fn):
+            @functools.wraps(fn)
+            async def wrapper(ctx, *args, **kwargs):
+                user_id = ctx.author.id
+                channel = getattr(ctx, "channel", None)
+                try:
+                    await self.enter(name, user_id, getattr(channel, "id", None))
+                except AdmissionRejected as e:
+                    self._rejected(name, e)
+                    if self._should_notify(user_id):
+                        await ctx.send(self.render(e.message()))
+                    return None
+                try:
+                    return await fn(ctx, *args, **kwargs)
+                finally:
+                    self.leave(name, user_id)
+            return wrapper
+        return deco
+
+    def __call__(self, component: str):
+        """버튼/모달 콜백용: 거절되면 누른 사람에게만 보이는 안내 (상호작용은 응답이 필요하므로 항상)."""
+        def deco(fn):
+            @functools.wraps(fn)
+            async def wrapper(self_, interaction, *args, **kwargs):
+                user_id = interaction.user.id
+                try:
+                    await self.enter(component, user_id, getattr(interaction, "channel_id", None))
+                except AdmissionRejected as e:
+                    self._rejected(component, e)
+                    await interaction.response.send_message(self.render(e.message()), ephemeral=True)
+                    return None
+                try:
+                    return await fn(self_, interaction, *args, **kwargs)
+                finally:
+                    self.leave(component, user_id)
+            return wrapper
+        return deco
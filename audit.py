@@ -0,0 +1,275 @@
+# 🧾 군번 감사 기록 (append-only)
+# !군번 부여/재발급 이벤트(누가, 누구에게, 이전→새 군번, KST 시각)를 메모리 링 버퍼에 쌓고
+# 주기적으로 한 번에 시트 '감사기록' 탭 끝에 붙인다. 최종 수정자 칸(I13)도 같은 쓰기에서 갱신한다.
+# 이벤트는 기록 즉시 로컬 저널(JSONL)에도 한 줄씩 남기므로, 시트에 올리기 전에 프로세스가
+# 죽어도 다음 시작 때 저널에서 다시 올린다 (올린 범위는 저널의 {"flushed": [처음, 끝]} 줄로 표시).
+# 저널 파일 I/O 는 전용 스레드 1개에서 순서대로 한다 (이벤트 루프를 막지 않음).
+# 버퍼가 넘쳐 메모리에서 빠진 이벤트는 저널에서 다시 읽어 먼저 올리고,
+# 아직 안 올린 가장 앞 줄보다 앞부분이 journal_max 를 넘으면 잘라 낸다.
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+AUDIT_HEADER = ["시각(KST)", "명령", "실행자", "이름", "이전 군번", "새 군번", "결과"]
+_FIELDS = ("at", "command", "actor", "name", "old", "new", "status")
+
+
+class AuditTrail:
+    """감사 이벤트 버퍼 + 저널 + 주기적 일괄 업로드.
+
+    - write(rows, editor): 시트 행 목록과 마지막 실행자를 한 번에 쓰는 코루틴 함수
+    - journal_path: 로컬 저널 경로 (None 이면 저널 없이 메모리만)
+    - capacity: 링 버퍼 크기. 시트가 오래 안 되면 오래된 이벤트부터 메모리에서 빠지고
+      (dropped) 저널에만 남는다 → 시트가 돌아오면 저널에서 읽어 먼저 올린다
+    - interval 초마다, 또는 max_batch 개가 쌓이면 바로 올린다 (한 번에 최대 max_batch 행)
+    """
+
+    def __init__(self, write, journal_path: str | None = None, capacity: int = 5000,
+                 interval: float = 10.0, max_batch: int = 500, journal_max: int = 1 << 20):
+        self._write = write
+        self.journal_path = journal_path
+        self.capacity = capacity
+        self.interval = interval
+        self.max_batch = max_batch
+        self.journal_max = journal_max   # 올린 앞부분이 이 크기(바이트)를 넘으면 잘라 낸다
+        self._buffer = deque(maxlen=capacity)
+        self._spilled = 0   # 메모리에서 빠져 저널에만 있는 미업로드 이벤트 수 (루프 쪽)
+        self._pool = None   # 저널 전용 스레드 (처음 쓸 때)
+        # ↓ 저널 스레드만 만지는 상태
+        self._journal = None
+        self._size = 0        # 저널 파일 크기 (바이트)
+        self._unsent = {}     # 미업로드 이벤트 seq → 저널에서 그 줄의 (시작, 끝) 위치 (seq 순)
+        self._last_seq = 0    # 저널에 쓴 마지막 seq
+        self._seq = 0
+        self._wake = None
+        self._task = None
+        self._lock = None
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def pending(self) -> int:
+        """아직 시트에 올리지 않은 이벤트 수 (메모리 + 저널에만 남은 것)."""
+        return len(self._buffer) + self._spilled
+
+    # ── 저널 ──────────────────────────────────────────────────────────
+    def recover(self) -> int:
+        """저널에서 아직 시트에 올리지 못한 이벤트를 버퍼로 되살린다 (시작 시 1회). 되살린 수."""
+        if not self.journal_path:
+            return 0
+        pending, done, offset = {}, [], 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    start, offset = offset, offset + len(line)
+                    try:
+                        item = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue   # 죽는 순간 반쯤 쓴 줄
+                    if "flushed" in item:
+                        lo, hi = item["flushed"]
+                        done.append((lo, hi))
+                        self._seq = max(self._seq, hi)
+                    elif "seq" in item:
+                        pending[item["seq"]] = (item, start, offset)
+                        self._seq = max(self._seq, item["seq"])
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            print(f"[WARN] 감사 저널 읽기 실패({self.journal_path}): {e}")
+            return 0
+        seqs = [s for s in sorted(pending) if not any(lo <= s <= hi for lo, hi in done)]
+        self._unsent = {s: pending[s][1:] for s in seqs}
+        self._last_seq = self._seq
+        self._buffer.extend(pending[s][0] for s in seqs)
+        over = max(0, len(seqs) - self.capacity)
+        self.dropped += over
+        self._spilled += over
+        return len(seqs)
+
+    def _io(self, fn, *args):
+        """저널 스레드에 맡긴다 (맡긴 순서대로 실행). 저널이 없으면 None."""
+        if not self.journal_path:
+            return None
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-journal")
+        return self._pool.submit(fn, *args)
+
+    async def _io_wait(self, fn, *args):
+        fut = self._io(fn, *args)
+        return await asyncio.wrap_future(fut) if fut is not None else None
+
+    async def drain(self):
+        """지금까지 맡긴 저널 쓰기가 끝날 때까지 기다린다."""
+        await self._io_wait(_noop)
+
+    # 아래 _journal_* 는 저널 스레드에서만 실행
+    def _journal_append(self, item: dict):
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab", buffering=0)   # 줄마다 바로 파일로
+                self._size = self._journal.seek(0, os.SEEK_END)
+                if not _ends_with_newline(self.journal_path):
+                    self._size += self._journal.write(b"\n")   # 죽는 순간 반쯤 쓴 줄에 이어 쓰지 않게
+            start = self._size
+            self._size += self._journal.write(
+                json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            if "seq" in item:
+                self._unsent[item["seq"]] = (start, self._size)
+                self._last_seq = max(self._last_seq, item["seq"])
+        except OSError as e:
+            print(f"[WARN] 감사 저널 쓰기 실패({self.journal_path}): {e}")
+
+    def _journal_spilled(self, below: int, limit: int) -> list:
+        """메모리에서 빠진(seq < below) 미업로드 이벤트를 저널에서 앞에서부터 최대 limit 건 읽는다."""
+        out = []
+        try:
+            with open(self.journal_path, "rb") as f:
+                for seq, (start, end) in self._unsent.items():
+                    if seq >= below or len(out) >= limit:
+                        break
+                    f.seek(start)
+                    out.append(json.loads(f.read(end - start)))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 감사 저널 읽기 실패({self.journal_path}): {e}")
+        return out
+
+    def _journal_mark(self, seqs: list):
+        """올린 이벤트 표시 (저널 1줄) 후, 올린 앞부분이 크면 잘라 낸다."""
+        self._journal_append({"flushed": [seqs[0], seqs[-1]]})
+        for seq in seqs:
+            self._unsent.pop(seq, None)
+        self._journal_compact()
+
+    def _journal_compact(self):
+        """아직 안 올린 첫 줄 앞부분(모두 올린 것)이 journal_max 를 넘으면 잘라 낸다.
+        남는 뒷부분 앞에 {"flushed": [0, 첫 미업로드 seq - 1]} 줄을 둔다 (seq 이어 붙이기용)."""
+        first = next(iter(self._unsent.items()), None)
+        cut = first[1][0] if first else self._size
+        if cut <= self.journal_max:
+            return
+        try:
+            head = (json.dumps({"flushed": [0, first[0] - 1 if first else self._last_seq]}) + "\n").encode("utf-8")
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            tmp = f"{self.journal_path}.tmp"
+            with open(self.journal_path, "rb") as src, open(tmp, "wb") as f:
+                src.seek(cut)
+                f.write(head)
+                while chunk := src.read(1 << 16):
+                    f.write(chunk)
+            os.replace(tmp, self.journal_path)
+            shift = cut - len(head)
+            self._unsent = {s: (a - shift, b - shift) for s, (a, b) in self._unsent.items()}
+        except OSError as e:
+            print(f"[WARN] 감사 저널 정리 실패({self.journal_path}): {e}")
+
+    def _journal_close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # ── 기록 / 업로드 ─────────────────────────────────────────────────
+    def record(self, at: str, command: str, actor: str, name: str, old: str = "", new: str = "",
+               status: str = ""):
+        """이벤트 1건 기록 (저널 1줄 + 버퍼). 시트에는 다음 업로드 때 올라간다."""
+        self._seq += 1
+        item = {"seq": self._seq, "at": at, "command": command, "actor": actor, "name": name,
+                "old": old, "new": new, "status": status}
+        self._io(self._journal_append, item)
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            if self.journal_path:
+                self._spilled += 1   # 저널에는 있으므로 나중에 거기서 읽어 올린다
+        self._buffer.append(item)
+        self.recorded += 1
+        if self._wake is not None and len(self._buffer) >= self.max_batch:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """가장 오래된 미업로드 이벤트 최대 max_batch 건을 한 번에 올린다.
+        메모리에서 빠진 이벤트가 있으면 저널에서 읽어 그것부터. 올린 수 (실패하면 그대로 두고 예외)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            spilled = self._spilled
+            if spilled:
+                below = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+                batch = await self._io_wait(self._journal_spilled, below, self.max_batch)
+            else:
+                batch = [self._buffer[i] for i in range(min(len(self._buffer), self.max_batch))]
+            if batch:
+                await self._write([[item[f] for f in _FIELDS] for item in batch], batch[-1]["actor"])
+            if spilled:
+                # 덜 읽혔으면 저널 쓰기가 실패했던 것 → 그만큼은 잃은 것으로 친다
+                self._spilled -= spilled if len(batch) < min(spilled, self.max_batch) else len(batch)
+            if not batch:
+                return 0
+            last = batch[-1]["seq"]
+            # 쓰는 동안 링 버퍼가 넘쳐 앞쪽이 빠졌을 수 있으므로 seq 로 제거
+            while self._buffer and self._buffer[0]["seq"] <= last:
+                self._buffer.popleft()
+            self.flushed += len(batch)
+            await self._io_wait(self._journal_mark, [item["seq"] for item in batch])
+            return len(batch)
+
+    def start(self):
+        """주기적 업로드 시작 (이벤트 루프 안에서)."""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await self.flush() >= self.max_batch:
+                    pass   # 밀린 만큼 연달아
+            except Exception as e:
+                self.failures += 1
+                print(f"[WARN] 감사 기록 업로드 실패({self.pending}건 대기): {e}")
+
+    async def close(self):
+        """업로드 중지 후 남은 이벤트를 마지막으로 올린다 (실패해도 저널에는 남아 있음)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            while self.pending and await self.flush():
+                pass
+        except Exception as e:
+            print(f"[WARN] 감사 기록 마지막 업로드 실패({self.pending}건은 저널에서 다음 시작 때): {e}")
+        if self._pool is not None:
+            await self._io_wait(self._journal_close)
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+def _noop():
+    pass
+
+
+def _ends_with_newline(path: str) -> bool:
+    """빈 파일이거나 마지막 바이트가 줄바꿈이면 True."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
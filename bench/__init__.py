@@ -0,0 +1 @@
+# 🧪 오프라인 벤치마크/부하 시뮬레이터 (구글 자격 증명 없이 실행)
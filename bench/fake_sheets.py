@@ -0,0 +1,382 @@
+# 🧪 메모리 안의 gspread 대역 (Worksheet/Spreadsheet/Client)
+# 봇이 쓰는 gspread 호출만 구현한다. 호출마다 latency 초만큼 지연을 넣을 수 있고,
+# 호출 수는 calls 에 op 이름별로 센다.
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+import gspread
+import requests
+
+_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+RANKS = ("이병", "일병", "상병", "병장", "하사", "중사", "상사", "소위", "중위", "대위")
+_SURNAMES = "김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허유남심노하곽성차주우구민진지엄채원천방공현함"
+_SYLLABLES = "민서준지현우도하윤수영진호성은재경태동혁석철희정연아빈원승훈유나주예채시율건"
+
+
+def col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def parse_a1(rng: str):
+    """'B:D', 'B5:D5', 'I13', "'군번'!B2:B" → (r1, c1, r2, c2) 1-based, 열린 끝은 None."""
+    if "!" in rng:
+        rng = rng.split("!", 1)[1]
+    start, _, end = rng.partition(":")
+    m1 = _CELL.match(start.upper())
+    m2 = _CELL.match((end or start).upper())
+    if not m1 or not m2:
+        raise ValueError(f"지원하지 않는 범위: {rng}")
+    c1 = col_index(m1.group(1)) if m1.group(1) else 1
+    r1 = int(m1.group(2)) if m1.group(2) else 1
+    c2 = col_index(m2.group(1)) if m2.group(1) else None
+    r2 = int(m2.group(2)) if m2.group(2) else None
+    return r1, c1, r2, c2
+
+
+def api_error(code: int, message: str = "", status: str = "") -> gspread.exceptions.APIError:
+    """실제 응답과 같은 모양의 gspread APIError (429 등 주입용)."""
+    resp = requests.Response()
+    resp.status_code = code
+    resp._content = json.dumps({"error": {
+        "code": code,
+        "message": message or f"injected error {code}",
+        "status": status or ("RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE"),
+    }}).encode("utf-8")
+    return gspread.exceptions.APIError(resp)
+
+
+class FakeCell:
+    __slots__ = ("row", "col", "value")
+
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class FakeWorksheet:
+    """gspread.Worksheet 대역. rows 는 1행부터의 값 목록(행마다 길이가 달라도 됨)."""
+
+    def __init__(self, doc, title: str, rows=None, sheet_id: int = 0):
+        self.doc = doc
+        self.title = title
+        self.id = sheet_id
+        self._properties = {"title": title, "sheetId": sheet_id}
+        self.rows = [list(r) for r in (rows or [])]
+        self._lock = threading.Lock()
+
+    # ── 내부 ──────────────────────────────────────────────────────────
+    def _api(self, op: str, write: bool = False):
+        self.doc._api(op, write)
+
+    def _get(self, r: int, c: int) -> str:
+        if r - 1 < len(self.rows):
+            row = self.rows[r - 1]
+            if c - 1 < len(row):
+                return row[c - 1]
+        return ""
+
+    def _set(self, r: int, c: int, value):
+        while len(self.rows) < r:
+            self.rows.append([])
+        row = self.rows[r - 1]
+        while len(row) < c:
+            row.append("")
+        row[c - 1] = "" if value is None else str(value)
+
+    def _read_range(self, rng: str):
+        """values.get 처럼: 끝의 빈 칸/빈 행은 잘라낸 목록."""
+        r1, c1, r2, c2 = parse_a1(rng)
+        r2 = r2 or len(self.rows)
+        out = []
+        for r in range(r1, r2 + 1):
+            row = self.rows[r - 1] if r - 1 < len(self.rows) else []
+            vals = row[c1 - 1:(c2 if c2 else len(row))]
+            while vals and vals[-1] == "":
+                vals = vals[:-1]
+            out.append(list(vals))
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _write_range(self, rng: str, values):
+        r1, c1, _, _ = parse_a1(rng)
+        for i, vals in enumerate(values):
+            for j, v in enumerate(vals):
+                self._set(r1 + i, c1 + j, v)
+
+    # ── gspread API ───────────────────────────────────────────────────
+    def col_values(self, col: int, **kwargs):
+        self._api("col_values")
+        with self._lock:
+            vals = [(r[col - 1] if col - 1 < len(r) else "") for r in self.rows]
+        while vals and vals[-1] == "":
+            vals.pop()
+        return vals
+
+    def get_all_values(self, **kwargs):
+        self._api("get_all_values")
+        with self._lock:
+            width = max((len(r) for r in self.rows), default=0)
+            return [list(r) + [""] * (width - len(r)) for r in self.rows]
+
+    def get_values(self, range_name=None, **kwargs):
+        self._api("get_values")
+        with self._lock:
+            vals = self._read_range(range_name) if range_name else [list(r) for r in self.rows]
+        width = max((len(r) for r in vals), default=0)
+        return [r + [""] * (width - len(r)) for r in vals]
+
+    def batch_get(self, ranges, **kwargs):
+        self._api("batch_get")
+        with self._lock:
+            return [self._read_range(r) for r in ranges]
+
+    def find(self, query, in_row=None, in_column=None, case_sensitive=True):
+        self._api("find")
+        with self._lock:
+            for r, row in enumerate(self.rows, start=1):
+                if in_row and r != in_row:
+                    continue
+                for c, v in enumerate(row, start=1):
+                    if in_column and c != in_column:
+                        continue
+                    if isinstance(query, re.Pattern):
+                        ok = query.search(v) is not None
+                    elif case_sensitive:
+                        ok = v == query
+                    else:
+                        ok = v.lower() == str(query).lower()
+                    if ok:
+                        return FakeCell(r, c, v)
+        return None
+
+    def cell(self, row: int, col: int, **kwargs):
+        self._api("cell")
+        with self._lock:
+            return FakeCell(row, col, self._get(row, col))
+
+    def acell(self, label: str, **kwargs):
+        self._api("acell")
+        r, c, _, _ = parse_a1(label)
+        with self._lock:
+            return FakeCell(r, c, self._get(r, c))
+
+    def update_acell(self, label: str, value):
+        self._api("update_acell", write=True)
+        r, c, _, _ = parse_a1(label)
+        with self._lock:
+            self._set(r, c, value)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values   # 예전 (range, values) 순서
+        self._api("update", write=True)
+        with self._lock:
+            self._write_range(range_name or "A1", values)
+
+    def batch_update(self, data, **kwargs):
+        self._api("batch_update", write=True)
+        with self._lock:
+            for item in data:
+                self._write_range(item["range"], item["values"])
+
+    def append_rows(self, values, **kwargs):
+        self._api("append_rows", write=True)
+        with self._lock:
+            last = len(self.rows)
+            while last and not any(self.rows[last - 1]):
+                last -= 1
+            for i, vals in enumerate(values):
+                for j, v in enumerate(vals):
+                    self._set(last + 1 + i, j + 1, v)
+
+    def format(self, ranges, fmt, **kwargs):
+        self._api("format", write=True)
+
+
+class FakeSpreadsheet:
+    """gspread.Spreadsheet 대역.
+
+    - latency: 호출당 지연(초), jitter: 추가 무작위 지연 최대값
+    - error_rate: 호출이 무작위로 429 를 돌려줄 확률
+    - quota_per_min: 읽기/쓰기 각각 최근 60초 호출 수가 이 값을 넘으면 429 (실제 할당량 흉내)
+    """
+
+    def __init__(self, key: str = "fake", sheets=None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, quota_per_min: int | None = None, seed: int | None = None):
+        self.id = key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_per_min = quota_per_min
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._recent = {"read": deque(), "write": deque()}
+        self._rnd = random.Random(seed)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._sheets = {}
+        for i, (title, rows) in enumerate((sheets or {}).items()):
+            self._sheets[title] = FakeWorksheet(self, title, rows, sheet_id=i)
+
+    def _api(self, op: str, write: bool = False):
+        with self._lock:
+            self.calls[op] += 1
+            delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+            throttled = self._throttle("write" if write else "read")
+            if throttled:
+                self.throttled[op] += 1
+            elif write:
+                self._version += 1
+        if delay > 0:
+            time.sleep(delay)
+        if throttled:
+            raise api_error(429, "Quota exceeded for quota metric 'Requests' (injected)")
+
+    def _throttle(self, kind: str) -> bool:
+        if self.error_rate and self._rnd.random() < self.error_rate:
+            return True
+        if self.quota_per_min is None:
+            return False
+        now, recent = time.monotonic(), self._recent[kind]
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if len(recent) >= self.quota_per_min:
+            return True
+        recent.append(now)
+        return False
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, index=None):
+        self._api("add_worksheet", write=True)
+        ws = FakeWorksheet(self, title, sheet_id=len(self._sheets))
+        self._sheets[title] = ws
+        return ws
+
+    def worksheet(self, title: str):
+        self._api("worksheet")
+        try:
+            return self._sheets[title]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(title) from None
+
+    def worksheets(self, **kwargs):
+        self._api("worksheets")
+        return list(self._sheets.values())
+
+    def get_lastUpdateTime(self) -> str:
+        self._api("drive_metadata")
+        return f"rev-{self._version}"
+
+    def batch_update(self, body):
+        """spreadsheets.batchUpdate: appendCells / updateCells(문자열 값)만 반영, 나머지는 무시."""
+        self._api("spreadsheet_batch_update", write=True)
+        by_id = {ws.id: ws for ws in self._sheets.values()}
+        for req in body.get("requests", []):
+            if "appendCells" in req:
+                spec = req["appendCells"]
+                ws = by_id[spec["sheetId"]]
+                with ws._lock:
+                    last = len(ws.rows)
+                    while last and not any(ws.rows[last - 1]):
+                        last -= 1
+                    for i, row in enumerate(spec["rows"]):
+                        for j, cell in enumerate(row.get("values", [])):
+                            ws._set(last + 1 + i, j + 1, _cell_value(cell))
+            elif "updateCells" in req:
+                spec = req["updateCells"]
+                ws = by_id[spec["start"]["sheetId"]]
+                r0, c0 = spec["start"].get("rowIndex", 0), spec["start"].get("columnIndex", 0)
+                with ws._lock:
+                    for i, row in enumerate(spec["rows"]):
+                        for j, cell in enumerate(row.get("values", [])):
+                            ws._set(r0 + 1 + i, c0 + 1 + j, _cell_value(cell))
+        return {"replies": [{} for _ in body.get("requests", [])]}
+
+
+def _cell_value(cell: dict) -> str:
+    v = cell.get("userEnteredValue", {})
+    return str(next(iter(v.values()), ""))
+
+
+class _FakeCredentials:
+    valid = True
+    expiry = None
+
+    def refresh(self, request):
+        pass
+
+
+class _FakeHTTPClient:
+    """client.http_client 대역 (keep-alive 세션 설정/토큰 갱신 경로용)."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.auth = _FakeCredentials()
+        self.timeout = None
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+
+
+class FakeClient:
+    """gspread.Client 대역 (open_by_key + http_client)."""
+
+    def __init__(self, *docs):
+        self.docs = {d.id: d for d in docs}
+        self.http_client = _FakeHTTPClient()
+
+    def open_by_key(self, key: str):
+        doc = self.docs[key]
+        doc._api("open_by_key")
+        return doc
+
+
+# ── 합성 데이터 ──────────────────────────────────────────────────────
+def make_names(n: int, seed: int = 0) -> list:
+    """중복 없는 한국식 이름 n 개 (겹치면 숫자 꼬리표)."""
+    rnd = random.Random(seed)
+    seen, out = Counter(), []
+    for _ in range(n):
+        name = rnd.choice(_SURNAMES) + rnd.choice(_SYLLABLES) + rnd.choice(_SYLLABLES)
+        seen[name] += 1
+        out.append(name if seen[name] == 1 else f"{name}{seen[name]}")
+    return out
+
+
+def make_roster(n: int, seed: int = 0, filled: float = 0.5) -> list:
+    """'군번' 시트 값: 1행 헤더 + n 행 [이름, 계급, 군번] (B~D열만)."""
+    rnd = random.Random(seed)
+    ids = rnd.sample(range(1_000_000), int(n * filled))
+    rows = [["이름", "계급", "군번"]]
+    for i, name in enumerate(make_names(n, seed)):
+        gid = f"72{ids[i]:06d}" if i < len(ids) else ""
+        rows.append([name, rnd.choice(RANKS), gid])
+    return rows
+
+
+def make_roster_sheet(n: int, seed: int = 0, filled: float = 0.5) -> list:
+    """'군번' 시트 전체(A열 번호 포함) 값."""
+    return [[str(i) if i else "번호"] + r for i, r in enumerate(make_roster(n, seed, filled))]
+
+
+def make_fortune(n: int = 60, seed: int = 0) -> list:
+    """'운세' 시트 값: 헤더 + n 행."""
+    rnd = random.Random(seed)
+    rows = [["계급", "운세", "조언", "행운 아이템"]]
+    for i in range(n):
+        rows.append([
+            RANKS[i % len(RANKS)] if i < len(RANKS) else "",
+            f"운세 문장 {i} " + "가나다라" * rnd.randint(1, 5),
+            f"조언 {i}",
+            f"아이템 {i}" if rnd.random() < 0.9 else "",
+        ])
+    return rows
@@ -0,0 +1,336 @@
+# ⏱️ 시트 핫패스 마이크로벤치마크 (구글 자격 증명 없이 실행)
+# 사용법:
+#   python -m bench.hotpaths                          # 1k/10k/100k 명단
+#   python -m bench.hotpaths --sizes 10000 --latency 0.05 --only roster
+#   python -m bench.hotpaths --save base.json         # 기준값 저장
+#   python -m bench.hotpaths --compare base.json      # 기준 대비 느려지면 종료 코드 1
+#
+# main.py 는 디스코드/구글 환경변수가 있어야 가져올 수 있으므로 가져오지 않는다. 대신 main.py 가 쓰는
+# 모듈(roster/gunbeon_alloc/fortune/sheet_cache/gunbeon_writer)을 가짜 시트 위에서 돌린다.
+# 처리량(ops/s)과 메모리 할당(tracemalloc: 1회 실행 최대/잔존 바이트)을 따로 잰다.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from bench.fake_sheets import RANKS, FakeSpreadsheet, make_fortune, make_roster_sheet
+from draw import DrawPool
+from fortune import DailyFortune, parse_fortune_table
+from gunbeon_alloc import GunbeonAllocator
+from gunbeon_writer import GunbeonWriter
+from roster import RosterIndex, draw_candidates, normalize_name
+from sheet_cache import VersionedCache
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+SAMPLE = 1_000   # 조회류 벤치마크 1회 실행당 이름 수
+
+
+class Bench:
+    """setup(ctx) → 측정할 함수 fn(). ops 는 fn() 1회가 처리하는 건수."""
+
+    def __init__(self, name: str, setup, ops=1, sized: bool = True):
+        self.name = name
+        self.setup = setup
+        self.ops = ops
+        self.sized = sized
+
+
+class Context:
+    """크기별 합성 데이터 (벤치마크 사이에서 공유)."""
+
+    def __init__(self, size: int, latency: float, seed: int = 0):
+        self.size = size
+        self.latency = latency
+        self.rnd = random.Random(seed)
+        self.sheet_rows = make_roster_sheet(size, seed)
+        self.bd_rows = [r[1:4] for r in self.sheet_rows]
+        self.col_b = [r[1] for r in self.sheet_rows]
+        self.names = [r[1] for r in self.sheet_rows[1:]]
+        self.index = RosterIndex(self.bd_rows)
+        self.fortune_values = make_fortune(60, seed)
+
+    def sample(self, k: int = SAMPLE) -> list:
+        return [self.rnd.choice(self.names) for _ in range(k)]
+
+    def doc(self) -> FakeSpreadsheet:
+        """지연이 들어간 새 가짜 문서 ('군번', '운세')."""
+        return FakeSpreadsheet("bench", {
+            "군번": [list(r) for r in self.sheet_rows],
+            "운세": self.fortune_values,
+        }, latency=self.latency)
+
+
+def _run(coro_fn):
+    return asyncio.run(coro_fn())
+
+
+# ── 명단 ─────────────────────────────────────────────────────────────
+def b_normalize(ctx):
+    names = [f" {n}\u200b  " for n in ctx.sample()]
+    return lambda: [normalize_name(n) for n in names]
+
+
+def b_roster_build(ctx):
+    return lambda: RosterIndex(ctx.bd_rows)
+
+
+def b_roster_load(ctx):
+    ws = ctx.doc().worksheet("군번")
+    return lambda: RosterIndex(ws.get_values("B:D"))
+
+
+def b_find_exact(ctx):
+    names, idx = ctx.sample(), ctx.index
+    return lambda: [idx.find(n) for n in names]
+
+
+def b_find_partial(ctx):
+    # 성을 뗀 두 글자 (후보가 여러 개면 None — 그래도 조회 비용은 같다)
+    names, idx = [n[1:3] for n in ctx.sample()], ctx.index
+    return lambda: [idx.find(n) for n in names]
+
+
+def b_find_miss(ctx):
+    names, idx = [f"없는{n}사람" for n in ctx.sample()], ctx.index
+    return lambda: [idx.find(n) for n in names]
+
+
+def b_draw(ctx):
+    return lambda: draw_candidates(ctx.col_b)
+
+
+def b_draw_pool(ctx):
+    return lambda: DrawPool(ctx.index)
+
+
+def b_draw_sample(ctx):
+    pool, rnd = DrawPool(ctx.index), random.Random(0)
+    return lambda: pool.draw(10, rnd)
+
+
+def b_draw_filtered(ctx):
+    pool, rnd = DrawPool(ctx.index), random.Random(0)
+    excluded = set(ctx.sample(100))
+    return lambda: pool.draw(10, rnd, ranks={"병장", "상병"}, has_id=True, exclude=excluded)
+
+
+def b_draw_weighted(ctx):
+    pool, rnd = DrawPool(ctx.index), random.Random(0)
+    weights = {r: i + 1 for i, r in enumerate(RANKS)}
+    return lambda: pool.draw(10, rnd, weights=weights)
+
+
+# ── 군번 할당 ─────────────────────────────────────────────────────────
+def b_alloc_init(ctx):
+    ids = [r[2] for r in ctx.bd_rows[1:] if r[2]]
+    return lambda: GunbeonAllocator(ids, rng=random.Random(0))
+
+
+def b_alloc_cycle(ctx):
+    ids = [r[2] for r in ctx.bd_rows[1:] if r[2]]
+    alloc = GunbeonAllocator(ids, rng=random.Random(0))
+
+    def fn():
+        got = [alloc.allocate() for _ in range(SAMPLE)]
+        for gid in got:
+            alloc.release(gid)
+    return fn
+
+
+def b_writer(ctx):
+    """가짜 시트(지연 포함) 위에서 동시 !군번 50건 → 배치 1개."""
+    ws = ctx.doc().worksheet("군번")
+    idx = RosterIndex(ws.get_values("B:D"))
+    alloc = GunbeonAllocator((r[2] for r in ctx.bd_rows[1:] if r[2]), rng=random.Random(0))
+
+    async def read_cells(rows):
+        got = await asyncio.to_thread(ws.batch_get, [f"B{r}:D{r}" for r in rows])
+        return [(v[0] if v else []) for v in got]
+
+    async def read_all():
+        return await asyncio.to_thread(ws.get_values, "B:D")
+
+    async def write_cells(data):
+        await asyncio.to_thread(ws.batch_update, data, value_input_option="RAW")
+
+    def fn():
+        names = ctx.sample(50)
+
+        async def go():
+            writer = GunbeonWriter(lambda ns: {n: idx.find_exact(n) for n in ns}, read_cells,
+                                   read_all, write_cells, alloc, window=0.0,
+                                   on_written=idx.set_gunbeon)
+            await asyncio.gather(*(writer.submit(n, force=True) for n in names))
+            await writer.close()
+        asyncio.run(go())
+    return fn
+
+
+# ── 운세 ─────────────────────────────────────────────────────────────
+def b_fortune_parse(ctx):
+    return lambda: parse_fortune_table(ctx.fortune_values)
+
+
+def b_fortune_load(ctx):
+    ws = ctx.doc().worksheet("운세")
+    return lambda: parse_fortune_table(ws.get_all_values())
+
+
+def b_fortune_cache_hit(ctx):
+    table = parse_fortune_table(ctx.fortune_values)
+
+    async def load():
+        return table
+
+    def fn():
+        async def go():
+            cache = VersionedCache("운세", load, check_interval=60, ttl=3600)
+            await cache.get()
+            for _ in range(SAMPLE - 1):
+                await cache.get()
+        _run(go)
+    return fn
+
+
+def b_fortune_personal(ctx):
+    table = parse_fortune_table(ctx.fortune_values)
+    names = ctx.sample()
+
+    def fn():
+        daily = DailyFortune(table, "2024-01-01")   # 메모 없음 → 모두 계산
+        for n in names:
+            daily.personal(n)
+    return fn
+
+
+BENCHES = [
+    Bench("normalize_name", b_normalize, SAMPLE, sized=False),
+    Bench("roster.build", b_roster_build),
+    Bench("roster.load(fake)", b_roster_load),
+    Bench("roster.find.exact", b_find_exact, SAMPLE),
+    Bench("roster.find.partial", b_find_partial, SAMPLE),
+    Bench("roster.find.miss", b_find_miss, SAMPLE),
+    Bench("draw.candidates", b_draw),
+    Bench("draw.pool", b_draw_pool),
+    Bench("draw.sample10", b_draw_sample),
+    Bench("draw.filtered10", b_draw_filtered),
+    Bench("draw.weighted10", b_draw_weighted),
+    Bench("alloc.init", b_alloc_init),
+    Bench("alloc.allocate+release", b_alloc_cycle, SAMPLE * 2),
+    Bench("writer.batch50(fake)", b_writer, 50),
+    Bench("fortune.parse", b_fortune_parse, sized=False),
+    Bench("fortune.load(fake)", b_fortune_load, sized=False),
+    Bench("fortune.cache_hit", b_fortune_cache_hit, SAMPLE, sized=False),
+    Bench("fortune.personal", b_fortune_personal, SAMPLE, sized=False),
+]
+
+
+# ── 측정 ─────────────────────────────────────────────────────────────
+def measure(fn, min_time: float) -> tuple:
+    """(호출 횟수, 총 시간). 최소 1회, min_time 초 이상 반복."""
+    fn()   # 워밍업
+    n, total = 0, 0.0
+    while total < min_time or n == 0:
+        t0 = time.perf_counter()
+        fn()
+        total += time.perf_counter() - t0
+        n += 1
+    return n, total
+
+
+def allocations(fn) -> tuple:
+    """fn() 1회의 (최대 할당 바이트, 끝난 뒤 남은 바이트)."""
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        cur, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return peak - base, cur - base
+
+
+def run(sizes, latency: float, only=None, min_time: float = 0.3, alloc: bool = True):
+    results = []
+    for size in sizes:
+        ctx = Context(size, latency)
+        for b in BENCHES:
+            if only and not any(o in b.name for o in only):
+                continue
+            if not b.sized and size != sizes[0]:
+                continue
+            fn = b.setup(ctx)
+            n, total = measure(fn, min_time)
+            res = {
+                "name": b.name,
+                "size": size if b.sized else 0,
+                "ops_per_sec": n * b.ops / total,
+                "us_per_op": total / (n * b.ops) * 1e6,
+            }
+            if alloc:
+                peak, kept = allocations(b.setup(ctx))
+                res["alloc_peak_kib"] = peak / 1024
+                res["alloc_kept_kib"] = kept / 1024
+            results.append(res)
+            _print_row(res)
+    return results
+
+
+def _print_row(res: dict):
+    size = f"{res['size']:>7}" if res["size"] else "      -"
+    line = f"{res['name']:<26}{size}{res['ops_per_sec']:>14,.0f} ops/s{res['us_per_op']:>12,.1f} µs/op"
+    if "alloc_peak_kib" in res:
+        line += f"{res['alloc_peak_kib']:>12,.0f} KiB peak{res['alloc_kept_kib']:>10,.0f} KiB kept"
+    print(line, flush=True)
+
+
+def compare(results, baseline, tolerance: float) -> list:
+    """기준 대비 처리량이 tolerance 비율 넘게 떨어진 항목 목록."""
+    base = {(r["name"], r["size"]): r for r in baseline}
+    worse = []
+    for r in results:
+        b = base.get((r["name"], r["size"]))
+        if b and r["ops_per_sec"] < b["ops_per_sec"] * (1 - tolerance):
+            worse.append((r, b))
+    return worse
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="시트 핫패스 마이크로벤치마크 (가짜 gspread)")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="명단 크기 (쉼표 구분)")
+    ap.add_argument("--latency", type=float, default=0.0, help="가짜 시트 호출당 지연(초)")
+    ap.add_argument("--only", default="", help="이름에 이 문자열이 들어간 벤치마크만 (쉼표 구분)")
+    ap.add_argument("--min-time", type=float, default=0.3, help="벤치마크당 최소 측정 시간(초)")
+    ap.add_argument("--no-alloc", action="store_true", help="할당 측정 생략")
+    ap.add_argument("--save", help="결과를 JSON 으로 저장")
+    ap.add_argument("--compare", help="기준 JSON 과 비교")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="허용 처리량 하락 비율")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",") if s.strip()]
+    results = run(sizes, args.latency, only, args.min_time, alloc=not args.no_alloc)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "results": results}, f, ensure_ascii=False, indent=1)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        worse = compare(results, baseline, args.tolerance)
+        for r, b in worse:
+            print(f"[REGRESSION] {r['name']} (n={r['size']}): "
+                  f"{b['ops_per_sec']:,.0f} → {r['ops_per_sec']:,.0f} ops/s")
+        if worse:
+            return 1
+        print("[OK] 기준 대비 처리량 하락 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
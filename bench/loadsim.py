@@ -0,0 +1,459 @@
+# 🏋️ 종단 간 부하 시뮬레이터 (명령 + 버튼/모달 상호작용 동시 실행)
+# 사용법:
+#   python -m bench.loadsim bench/scenarios/peak_minute.json
+#   python -m bench.loadsim bench/scenarios/peak_minute.json --users 400 --json out.json
+#
+# 실제 bot.commands 와 View/Modal 콜백을 가짜 ctx/Interaction 으로 호출한다.
+# 시트는 bench.fake_sheets(지연/429 주입)로 대체한다. main.py 를 가져온 뒤 구글 인증 대신
+# 가짜 클라이언트로 시트를 연결한다(_connect_sheets). 디스코드 게이트웨이에는 접속하지 않는다.
+#
+# 시나리오(JSON):
+#   users        동시 사용자 수
+#   duration     사용자들이 첫 요청을 보내는 구간(초)
+#   flows        사용자당 흐름 수
+#   mix          흐름 비율 {"운세.개인": 0.4, "운세.종합": 0.1, "다이스": 0.3, "군번": 0.15, "추첨": 0.05}
+#   think        [최소, 최대] 버튼 누르기/모달 입력 전 생각 시간(초)
+#   roster_size  합성 명단 크기, unknown_rate 명단에 없는 이름 비율, force_rate !군번 강제 비율
+#   sheets       {"latency", "jitter", "error_rate", "quota_per_min"} 가짜 시트 설정
+#   env          main.py 를 가져오기 전에 넣을 환경변수 (SHEETS_READ_PER_MIN 등)
+#   warm         true 면 시작 전에 명단/운세 캐시를 채워 둔다
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench.fake_sheets import FakeClient, FakeSpreadsheet, make_fortune, make_roster_sheet
+from perf import LatencyWindow
+
+INTERACTION_DEADLINE = 3.0   # 디스코드: 상호작용 첫 응답 제한(초)
+STALL_THRESHOLD = 0.05       # 이 이상 늦게 깨어나면 루프 정지로 본다(초)
+
+DEFAULT_SCENARIO = {
+    "users": 200,
+    "duration": 60.0,
+    "flows": 1,
+    "mix": {"운세.개인": 0.4, "운세.종합": 0.1, "다이스": 0.3, "군번": 0.15, "추첨": 0.05},
+    "think": [0.5, 2.0],
+    "roster_size": 1000,
+    "unknown_rate": 0.05,
+    "force_rate": 0.1,
+    "sheets": {"latency": 0.15, "jitter": 0.1, "error_rate": 0.0, "quota_per_min": 60},
+    "env": {},
+    "warm": True,
+    "seed": 0,
+}
+
+
+# ── 가짜 디스코드 객체 ───────────────────────────────────────────────
+class FakeUser:
+    def __init__(self, uid: int, name: str):
+        self.id = uid
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{uid}>"
+
+
+class FakeMessage:
+    def __init__(self, content, view=None):
+        self.content = content
+        self.view = view
+
+    async def edit(self, **kwargs):
+        self.view = kwargs.get("view", self.view)
+
+
+class Probe:
+    """한 흐름 단계의 응답 시각 기록 (첫 응답/마지막 메시지/모달)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first = None
+        self.last = None
+        self.messages = []
+        self.view = None
+        self.modal = None
+
+    def record(self, content=None, view=None, modal=None):
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now - self.started
+        if content is not None:
+            self.last = now - self.started
+            self.messages.append(content)
+        if view is not None:
+            self.view = view
+        if modal is not None:
+            self.modal = modal
+
+    @property
+    def failed(self) -> bool:
+        return any("❌" in str(m) for m in self.messages)
+
+
+class FakeContext:
+    """commands.Context 대역 (author / send)."""
+
+    def __init__(self, user: FakeUser):
+        self.author = user
+        self.guild = None
+        self.channel = None
+        self.probe = Probe()
+
+    async def send(self, content=None, view=None, **kwargs):
+        self.probe.record(content, view=view)
+        return FakeMessage(content, view)
+
+
+class _Response:
+    def __init__(self, inter):
+        self._inter = inter
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def _mark(self):
+        if self._done:
+            raise RuntimeError("이미 응답한 상호작용입니다 (InteractionResponded).")
+        self._done = True
+
+    async def send_message(self, content=None, view=None, ephemeral=False, **kwargs):
+        self._mark()
+        self._inter.probe.record(content, view=view)
+
+    async def defer(self, thinking=False, ephemeral=False, **kwargs):
+        self._mark()
+        self._inter.probe.record()
+
+    async def send_modal(self, modal):
+        self._mark()
+        self._inter.probe.record(modal=modal)
+
+
+class _Followup:
+    def __init__(self, inter):
+        self._inter = inter
+
+    async def send(self, content=None, **kwargs):
+        if not self._inter.response.is_done():
+            raise RuntimeError("응답(defer) 전에 followup 을 보낼 수 없습니다.")
+        self._inter.probe.record(content)
+        return FakeMessage(content)
+
+
+class FakeInteraction:
+    """discord.Interaction 대역 (user / response / followup)."""
+
+    def __init__(self, user: FakeUser):
+        self.user = user
+        self.guild_id = None
+        self.channel_id = None
+        self.probe = Probe()
+        self.response = _Response(self)
+        self.followup = _Followup(self)
+
+    async def delete_original_response(self):
+        if not self.response.is_done():
+            raise RuntimeError("응답(defer) 전에는 지울 원본 응답이 없습니다.")
+
+
+# ── main.py 가져오기 (가짜 인증/시트) ─────────────────────────────────
+def load_bot(doc: FakeSpreadsheet, env: dict):
+    """main.py 를 가져온다 (프로세스당 1회). 구글 인증은 import 때 하지 않으므로
+    시트 연결은 simulate() 에서 _connect_sheets(가짜 클라이언트) 로 한다."""
+    tmp = tempfile.mkdtemp(prefix="loadsim-")
+    os.environ.update({
+        "DISCORD_BOT_TOKEN": "loadsim",
+        "GOOGLE_CREDS": "{}",
+        "SHEET_KEY": doc.id,
+        "GUNBEON_ALLOC_SNAPSHOT": os.path.join(tmp, "gunbeon_alloc.bin"),
+        "SHEET_SNAPSHOT_PATH": os.path.join(tmp, "sheet_snapshot.db"),
+        "AUDIT_JOURNAL": os.path.join(tmp, "audit_journal.jsonl"),
+    })
+    os.environ.update({k: str(v) for k, v in env.items()})
+    import main
+    return main
+
+
+# ── 흐름 ─────────────────────────────────────────────────────────────
+class Recorder:
+    def __init__(self):
+        self.windows = {}
+        self.counts = {}
+        self.errors = {}
+        self.deadline_missed = {}
+
+    def window(self, key: str) -> LatencyWindow:
+        w = self.windows.get(key)
+        if w is None:
+            w = self.windows[key] = LatencyWindow(key, size=1_000_000, report_every=0)
+        return w
+
+    def step(self, key: str, probe: Probe, interaction: bool = False):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if probe.first is None or probe.failed:
+            self.errors[key] = self.errors.get(key, 0) + 1
+        if probe.first is not None:
+            self.window(f"{key} 첫 응답").observe(probe.first)
+        if probe.last is not None and probe.last != probe.first:
+            self.window(f"{key} 완료").observe(probe.last)
+        if interaction and (probe.first is None or probe.first > INTERACTION_DEADLINE):
+            self.deadline_missed[key] = self.deadline_missed.get(key, 0) + 1
+
+
+def _button(view, label: str):
+    for item in view.children:
+        if getattr(getattr(item, "item", item), "label", None) == label:
+            return item
+    raise LookupError(f"버튼 '{label}' 없음")
+
+
+async def _click(view, label: str, user: FakeUser) -> FakeInteraction:
+    """버튼 클릭. DynamicItem 이면 discord.py 처럼 custom_id 로 새 항목을 만들어
+    interaction_check → callback, 일반 항목이면 View.interaction_check → callback."""
+    inter = FakeInteraction(user)
+    item = _button(view, label)
+    template = getattr(item, "template", None)
+    if template is not None:
+        base = item.item
+        item = await type(item).from_custom_id(inter, base, template.fullmatch(base.custom_id))
+        if await item.interaction_check(inter):
+            await item.callback(inter)
+    elif await view.interaction_check(inter):
+        await item.callback(inter)
+    return inter
+
+
+class Simulation:
+    def __init__(self, scenario: dict, bot_module, doc: FakeSpreadsheet, names: list):
+        self.sc = scenario
+        self.main = bot_module
+        self.doc = doc
+        self.names = names
+        self.rnd = random.Random(scenario["seed"])
+        self.rec = Recorder()
+        self.flows_done = 0
+
+    async def _think(self):
+        lo, hi = self.sc["think"]
+        await asyncio.sleep(self.rnd.uniform(lo, hi))
+
+    def _pick_name(self) -> str:
+        if self.rnd.random() < self.sc["unknown_rate"]:
+            return f"없는사람{self.rnd.randrange(10 ** 6)}"
+        return self.rnd.choice(self.names)
+
+    def _command(self, name: str):
+        return self.main.bot.get_command(name)
+
+    async def flow_fortune(self, user: FakeUser, personal: bool):
+        ctx = FakeContext(user)
+        await self._command("운세")(ctx)
+        self.rec.step("!운세", ctx.probe)
+        await self._think()
+        inter = await _click(ctx.probe.view, "개인" if personal else "종합", user)
+        self.rec.step("[개인]" if personal else "[종합]", inter.probe, interaction=True)
+        if not personal or inter.probe.modal is None:
+            return
+        await self._think()
+        modal = inter.probe.modal
+        modal.name_input._value = self._pick_name()
+        sub = FakeInteraction(user)
+        await modal.on_submit(sub)
+        self.rec.step("개인 운세 모달", sub.probe, interaction=True)
+
+    async def flow_dice(self, user: FakeUser):
+        ctx = FakeContext(user)
+        await self._command("다이스")(ctx)
+        self.rec.step("!다이스", ctx.probe)
+        await self._think()
+        inter = await _click(ctx.probe.view, self.rnd.choice(["1d6", "1d10", "1d100"]), user)
+        self.rec.step("[주사위]", inter.probe, interaction=True)
+
+    async def flow_gunbeon(self, user: FakeUser):
+        ctx = FakeContext(user)
+        option = "강제" if self.rnd.random() < self.sc["force_rate"] else ""
+        await self._command("군번")(ctx, self._pick_name(), option)
+        self.rec.step("!군번", ctx.probe)
+
+    async def flow_draw(self, user: FakeUser):
+        ctx = FakeContext(user)
+        await self._command("추첨")(ctx, str(self.rnd.randint(1, 5)))
+        self.rec.step("!추첨", ctx.probe)
+
+    async def user(self, uid: int):
+        user = FakeUser(uid, f"user{uid}")
+        await asyncio.sleep(self.rnd.uniform(0, self.sc["duration"]))
+        kinds, weights = zip(*self.sc["mix"].items())
+        for _ in range(self.sc["flows"]):
+            kind = self.rnd.choices(kinds, weights)[0]
+            try:
+                if kind == "운세.개인":
+                    await self.flow_fortune(user, personal=True)
+                elif kind == "운세.종합":
+                    await self.flow_fortune(user, personal=False)
+                elif kind == "다이스":
+                    await self.flow_dice(user)
+                elif kind == "군번":
+                    await self.flow_gunbeon(user)
+                elif kind == "추첨":
+                    await self.flow_draw(user)
+                else:
+                    raise ValueError(f"알 수 없는 흐름: {kind}")
+            except Exception as e:
+                self.rec.errors[f"{kind} (예외)"] = self.rec.errors.get(f"{kind} (예외)", 0) + 1
+                print(f"[WARN] {kind} 흐름 예외: {e!r}")
+            self.flows_done += 1
+
+
+async def _watch_stalls(stats: dict, interval: float = 0.01):
+    """sleep(interval) 이 늦게 깨어난 만큼을 루프 정지 시간으로 누적."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - t - interval
+        stats["max"] = max(stats["max"], lag)
+        if lag >= STALL_THRESHOLD:
+            stats["stalls"] += 1
+            stats["total"] += lag
+
+
+async def simulate(scenario: dict) -> dict:
+    sheet_cfg = scenario["sheets"]
+    roster = make_roster_sheet(scenario["roster_size"], scenario["seed"])
+    doc = FakeSpreadsheet(
+        "loadsim",
+        {"군번": roster, "운세": make_fortune(60, scenario["seed"]), "연결 확인": []},
+        latency=sheet_cfg.get("latency", 0.0), jitter=sheet_cfg.get("jitter", 0.0),
+        error_rate=sheet_cfg.get("error_rate", 0.0), quota_per_min=sheet_cfg.get("quota_per_min"),
+        seed=scenario["seed"],
+    )
+    bot_main = load_bot(doc, scenario["env"])
+    names = [r[1] for r in roster[1:]]
+
+    client = FakeClient(doc)
+    bot_main._open_snapshots()   # 실제 실행(_run_bot)처럼 테넌트를 만들기 전에
+    tenant = bot_main.tenants.default   # 가짜 ctx/상호작용은 서버가 없으므로 기본 테넌트
+    tenant.started = asyncio.get_running_loop().create_task(
+        bot_main._connect_sheets(tenant, lambda creds: client)
+    )
+    await tenant.started
+    await tenant.sheets.run(tenant.book.refresh)
+    await bot_main._ensure_gunbeon_text_format(tenant)
+    if scenario["warm"]:
+        await tenant.roster_cache.get()
+        await tenant.fortune_cache.get()
+    doc.calls.clear()
+    doc.throttled.clear()
+
+    sim = Simulation(scenario, bot_main, doc, names)
+    stall = {"max": 0.0, "total": 0.0, "stalls": 0}
+    watcher = asyncio.get_running_loop().create_task(_watch_stalls(stall))
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(sim.user(uid) for uid in range(1, scenario["users"] + 1)))
+        await tenant.gunbeon_writer.close()
+        await tenant.audit.close()
+        await tenant.writes.close()
+    finally:
+        watcher.cancel()
+        if bot_main.sheet_share is not None:
+            await bot_main.sheet_share.close()
+        bot_main.sheet_executor.shutdown(wait=False, cancel_futures=True)
+    wall = time.perf_counter() - started
+    return report(sim, doc, bot_main, stall, wall)
+
+
+def report(sim: Simulation, doc: FakeSpreadsheet, bot_main, stall: dict, wall: float) -> dict:
+    rec = sim.rec
+    latency = {}
+    for key, w in sorted(rec.windows.items()):
+        latency[key] = {
+            "n": len(w._samples),
+            "p50": w.percentile(50),
+            "p95": w.percentile(95),
+            "p99": w.percentile(99),
+            "max": w.percentile(100),
+        }
+    return {
+        "wall_seconds": wall,
+        "flows": sim.flows_done,
+        "flows_per_sec": sim.flows_done / wall if wall else 0.0,
+        "steps": rec.counts,
+        "errors": rec.errors,
+        "deadline_missed": rec.deadline_missed,
+        "latency": latency,
+        "loop_stall": stall,
+        "sheet_calls": dict(doc.calls),
+        "sheet_throttled": dict(doc.throttled),
+        "quota": bot_main.tenants.default.quota.report(),
+        "sheet_coalesced": dict(bot_main.tenants.default.sheets.coalesced),
+        "startup": dict(bot_main.startup_marks),
+        "audit": {k: getattr(bot_main.tenants.default.audit, k) for k in ("recorded", "flushed", "pending", "failures")},
+    }
+
+
+def print_report(res: dict):
+    print(f"\n=== 부하 시뮬레이션 결과 ({res['wall_seconds']:.1f}s) ===")
+    print(f"흐름 {res['flows']}건, {res['flows_per_sec']:.2f} 흐름/s")
+    print(f"{'단계':<20}{'건수':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for key, v in res["latency"].items():
+        print(f"{key:<20}{v['n']:>6}" + "".join(f"{v[p] * 1000:>7.0f}ms" for p in ("p50", "p95", "p99", "max")))
+    missed = sum(res["deadline_missed"].values())
+    print(f"3초 상호작용 제한 초과: {missed}건 {res['deadline_missed'] or ''}")
+    print(f"오류 응답: {sum(res['errors'].values())}건 {res['errors'] or ''}")
+    st = res["loop_stall"]
+    print(f"이벤트 루프 정지: {st['stalls']}회, 합계 {st['total'] * 1000:.0f}ms, 최대 {st['max'] * 1000:.0f}ms")
+    print(f"시트 호출: {sum(res['sheet_calls'].values())}건 {res['sheet_calls']}")
+    print(f"시트 429: {sum(res['sheet_throttled'].values())}건 {res['sheet_throttled'] or ''}")
+    print(f"합쳐진 읽기(single-flight): {sum(res['sheet_coalesced'].values())}건 {res['sheet_coalesced'] or ''}")
+    marks = res.get("startup") or {}
+    if marks:
+        print("시작 후 도달(초): " + ", ".join(f"{k} {v:.2f}" for k, v in marks.items()))
+    au = res.get("audit")
+    if au:
+        print(f"감사 기록: {au['recorded']}건 중 {au['flushed']}건 업로드 (대기 {au['pending']}, 실패 {au['failures']})")
+    for kind, q in res["quota"].items():
+        print(f"할당량[{kind}]: 대기 {q['waited']}건 (평균 {q['wait_avg']:.2f}s, 최대 {q['wait_max']:.2f}s), "
+              f"재시도 {q['retries']}, 실패 {q['failures']}")
+
+
+def load_scenario(path: str | None, overrides: dict) -> dict:
+    sc = json.loads(json.dumps(DEFAULT_SCENARIO))
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for k, v in data.items():
+            if isinstance(v, dict) and isinstance(sc.get(k), dict) and k != "mix":
+                sc[k].update(v)
+            else:
+                sc[k] = v
+    sc.update({k: v for k, v in overrides.items() if v is not None})
+    return sc
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="봇 종단 간 부하 시뮬레이터 (가짜 디스코드/시트)")
+    ap.add_argument("scenario", nargs="?", help="시나리오 JSON 파일")
+    ap.add_argument("--users", type=int)
+    ap.add_argument("--duration", type=float)
+    ap.add_argument("--seed", type=int)
+    ap.add_argument("--json", help="결과를 JSON 으로 저장")
+    args = ap.parse_args(argv)
+
+    sc = load_scenario(args.scenario, {"users": args.users, "duration": args.duration, "seed": args.seed})
+    res = asyncio.run(simulate(sc))
+    print_report(res)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scenario": sc, "result": res}, f, ensure_ascii=False, indent=1)
+    return 1 if sum(res["deadline_missed"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
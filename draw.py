@@ -0,0 +1,242 @@
+# 🎯 !추첨 표본 추출
+# 명단 인덱스(B6 이후 이름)를 추첨 후보 배열로 한 번만 정리해 두고, 추첨마다
+# 열 전체를 다시 받지 않는다. 필터 없이 뽑으면 O(k), 계급 필터/가중치 추첨은
+# 조합별로 캐시한 펜윅 트리에서 O(k log n) 비복원 추출.
+import math
+
+from roster import DRAW_FIRST_ROW
+
+WEIGHT_MAX = 1000.0   # 계급 가중치 상한 (합이 부동소수 범위를 넘거나 한 명이 확률을 독차지하지 않게)
+
+
+def _clean_weights(weights) -> list:
+    """가중치 → float 목록 (음수는 0). inf/nan 은 추출이 한쪽으로 쏠리므로 ValueError."""
+    out = []
+    for w in weights:
+        w = float(w)
+        if not math.isfinite(w):
+            raise ValueError(f"가중치는 유한한 수여야 합니다: {w}")
+        out.append(max(0.0, w))
+    return out
+
+
+class FenwickTree:
+    """누적 가중치 트리 (0-based 인덱스). 가중치 합이 유한하지 않으면 ValueError."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        tree = [0.0] * (n + 1)
+        for i, w in enumerate(weights, start=1):   # O(n) 구성
+            tree[i] += w
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.n = n
+        self._tree = tree
+        self._top = 1 << max(n.bit_length() - 1, 0) if n else 0
+        if not math.isfinite(self.total):
+            raise ValueError("가중치 합이 너무 큽니다.")
+
+    def add(self, i: int, delta: float):
+        i += 1
+        while i <= self.n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> float:
+        """앞 i 개 가중치 합."""
+        s = 0.0
+        while i > 0:
+            s += self._tree[i]
+            i -= i & -i
+        return s
+
+    @property
+    def total(self) -> float:
+        return self.prefix(self.n)
+
+    def find(self, u: float) -> int:
+        """누적합이 u 를 처음 넘는 인덱스 (O(log n))."""
+        pos, step = 0, self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self._tree[nxt] <= u:
+                pos = nxt
+                u -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+def weighted_sample(weights, k: int, rng) -> list:
+    """가중치에 비례해 서로 다른 인덱스 최대 k 개 (가중치 0 은 뽑히지 않음)."""
+    cur = _clean_weights(weights)
+    tree = FenwickTree(cur)
+    out = []
+    while len(out) < k:
+        total = tree.total
+        if total <= 1e-12:
+            break
+        i = tree.find(rng.random() * total)
+        if i >= len(cur) or cur[i] <= 0:   # 부동소수 오차로 끝을 넘은 경우
+            i = max((j for j in range(len(cur)) if cur[j] > 0), default=None)
+            if i is None:
+                break
+        out.append(i)
+        tree.add(i, -cur[i])
+        cur[i] = 0.0
+    return out
+
+
+class DrawPool:
+    """명단 인덱스 → B6 이후 추첨 후보 (행 순서, 빈칸 제외).
+
+    - 필터 없음: O(k) / 누적 제외만: 거절 표본 추출 O(k + 제외 수)
+    - 계급 필터·가중치: (계급, 가중치) 조합별 펜윅 트리를 한 번 만들어 두고
+      추첨마다 제외/당첨 위치만 잠시 0 으로 → O((k + 제외 수) log n)
+    - 군번 유무: 봇이 방금 기록한 군번도 반영해야 하므로 매번 확인 (O(n))
+    """
+
+    _TREE_CACHE = 16        # 캐시할 (계급, 가중치) 조합 수
+    _TREE_REBUILD = 1000    # 부동소수 오차 누적 방지: 이 횟수만큼 쓰면 다시 구성
+
+    def __init__(self, idx):
+        self.idx = idx
+        self.rows = sorted(r for r in idx.names if r >= DRAW_FIRST_ROW)
+        self.names = [idx.names[r] for r in self.rows]
+        self.ranks = [idx.rank(r) for r in self.rows]
+        self._pos_by_name = {}
+        for i, name in enumerate(self.names):
+            self._pos_by_name.setdefault(name, []).append(i)
+        self._trees = {}   # 키 → [트리, 기본 가중치, 양수 가중치 수, 사용 횟수]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _excluded_positions(self, exclude) -> set:
+        return {i for name in exclude for i in self._pos_by_name.get(name, ())}
+
+    def select(self, ranks=None, has_id: bool | None = None, exclude=()) -> list:
+        """조건에 맞는 후보 위치 목록 (O(n))."""
+        idx = self.idx
+        out = []
+        for i, (row, name) in enumerate(zip(self.rows, self.names)):
+            if exclude and name in exclude:
+                continue
+            if ranks and self.ranks[i] not in ranks:
+                continue
+            if has_id is not None and bool(idx.gunbeon(row)) != has_id:
+                continue
+            out.append(i)
+        return out
+
+    def draw(self, k: int, rng, ranks=None, has_id: bool | None = None, exclude=(), weights=None):
+        """(당첨자 이름 목록, 조건에 맞는 후보 수). weights: 계급 → 가중치 (없는 계급은 1)."""
+        if has_id is not None:
+            pos = self.select(ranks, has_id, exclude)
+            if weights:
+                w = [weights.get(self.ranks[i], 1.0) for i in pos]
+                picks = [pos[j] for j in weighted_sample(w, k, rng)]
+            else:
+                picks = rng.sample(pos, min(k, len(pos)))
+            return [self.names[i] for i in picks], len(pos)
+        if ranks or weights:
+            return self._draw_tree(k, rng, ranks, exclude, weights)
+        return self._draw_uniform(k, rng, exclude)
+
+    def _draw_uniform(self, k: int, rng, exclude):
+        n = len(self.rows)
+        removed = self._excluded_positions(exclude) if exclude else set()
+        eligible = n - len(removed)
+        k = min(k, eligible)
+        if not removed:
+            picks = rng.sample(range(n), k)
+        elif 2 * (k + len(removed)) > n:
+            picks = rng.sample([i for i in range(n) if i not in removed], k)
+        else:
+            picked, picks = set(), []
+            while len(picks) < k:   # 거절 표본: 제외/중복이면 다시 뽑기
+                i = rng.randrange(n)
+                if i in removed or i in picked:
+                    continue
+                picked.add(i)
+                picks.append(i)
+        return [self.names[i] for i in picks], eligible
+
+    def _tree_for(self, ranks, weights):
+        key = (frozenset(ranks) if ranks else None, tuple(sorted((weights or {}).items())))
+        entry = self._trees.get(key)
+        if entry is None or entry[3] >= self._TREE_REBUILD:
+            base = [
+                (weights.get(rk, 1.0) if weights else 1.0) if (not ranks or rk in ranks) else 0.0
+                for rk in self.ranks
+            ]
+            base = _clean_weights(base)
+            if entry is None and len(self._trees) >= self._TREE_CACHE:
+                self._trees.clear()
+            entry = self._trees[key] = [FenwickTree(base), base, sum(1 for w in base if w > 0), 0]
+        entry[3] += 1
+        return entry
+
+    def _draw_tree(self, k: int, rng, ranks, exclude, weights):
+        tree, base, positive, _ = self._tree_for(ranks, weights)
+        # 계급 필터만 있을 때 후보 수 = 해당 계급 인원, 가중치 0 인 사람은 후보에서 빠진다
+        removed = [i for i in (self._excluded_positions(exclude) if exclude else ()) if base[i] > 0]
+        eligible = positive - len(removed)
+        taken, taken_set = list(removed), set(removed)
+        for i in removed:
+            tree.add(i, -base[i])
+        picks = []
+        try:
+            while len(picks) < k:
+                total = tree.total
+                if total <= 1e-9:
+                    break
+                i = tree.find(rng.random() * total)
+                if i >= len(base) or base[i] <= 0 or i in taken_set:   # 오차로 경계를 넘은 경우
+                    i = next((j for j in range(len(base)) if base[j] > 0 and j not in taken_set), None)
+                    if i is None:
+                        break
+                picks.append(i)
+                taken.append(i)
+                taken_set.add(i)
+                tree.add(i, -base[i])
+        finally:
+            for i in taken:   # 다음 추첨을 위해 원래 가중치로 되돌림
+                tree.add(i, base[i])
+        return [self.names[i] for i in picks], eligible
+
+
+def parse_draw_options(tokens, max_weight: float = WEIGHT_MAX):
+    """
+    !추첨 옵션 예: 누적 / 군번있음 / 군번없음 / 계급=병장,상병 / 가중=병장:3,상병:2
+    returns: (opts:dict, None) 또는 (None, error_msg)
+    """
+    opts = {"ranks": None, "has_id": None, "cumulative": False, "weights": None}
+    for token in tokens:
+        t = token.strip()
+        key, sep, value = t.partition("=")
+        if not sep:
+            key, sep, value = t.partition(":")
+        if t in ("누적", "제외"):
+            opts["cumulative"] = True
+        elif t == "군번있음":
+            opts["has_id"] = True
+        elif t == "군번없음":
+            opts["has_id"] = False
+        elif sep and key == "계급":
+            opts["ranks"] = {r.strip() for r in value.split(",") if r.strip()}
+        elif sep and key in ("가중", "가중치"):
+            weights = {}
+            for part in value.split(","):
+                rank, _, w = part.partition(":")
+                try:
+                    weight = float(w)
+                except ValueError:
+                    return None, f"⚠️ 가중치 형식이 잘못되었습니다: `{part}` (예: `가중=병장:3,상병:2`)"
+                if not (math.isfinite(weight) and 0 <= weight <= max_weight):   # nan 도 여기서 걸림
+                    return None, f"⚠️ 가중치는 0 이상 {max_weight:g} 이하의 수여야 합니다: `{part}`"
+                weights[rank.strip()] = weight
+            opts["weights"] = weights
+        else:
+            return None, f"⚠️ 알 수 없는 옵션: `{t}` (누적 / 군번있음 / 군번없음 / 계급=병장,상병 / 가중=병장:3)"
+    return opts, None
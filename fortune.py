@@ -0,0 +1,97 @@
+# 🔮 '운세' 시트 파싱
+# get_all_values() 결과를 헤더맵 + 필수 열별 배열로 한 번만 정리해 두고,
+# 하루(KST) 고정 운세 결과는 날짜가 바뀔 때 한 번 미리 계산한다.
+import random
+
+FORTUNE_COLUMNS = ("계급", "운세", "조언", "행운 아이템")
+
+
+class FortuneTable:
+    """파싱된 '운세' 시트: 헤더 인덱스 + 필수 열별 값 배열(앞뒤 공백 제거)."""
+
+    __slots__ = ("col_idx", "columns")
+
+    def __init__(self, col_idx: dict, columns: dict):
+        self.col_idx = col_idx
+        self.columns = columns
+
+    def column(self, name: str) -> list:
+        return self.columns[name]
+
+    def to_dict(self) -> dict:
+        return {"col_idx": self.col_idx, "columns": self.columns}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FortuneTable":
+        return cls(dict(data["col_idx"]), {k: list(v) for k, v in data["columns"].items()})
+
+
+def parse_fortune_table(values) -> FortuneTable:
+    """'운세' 시트 전체 값 → FortuneTable. 필수 열 검사."""
+    if not values:
+        raise RuntimeError("운세 시트가 비어 있습니다.")
+    header = [h.strip() for h in values[0]]
+    col_idx = {name: i for i, name in enumerate(header)}
+    for need in FORTUNE_COLUMNS:
+        if need not in col_idx:
+            raise RuntimeError(f"운세 시트에 '{need}' 열이 없습니다. (헤더 1행 확인)")
+    rows = values[1:]  # 헤더 제외
+    columns = {}
+    for need in FORTUNE_COLUMNS:
+        i = col_idx[need]
+        columns[need] = [(r[i] if i < len(r) else "").strip() for r in rows]
+    return FortuneTable(col_idx, columns)
+
+
+def unique_nonempty(items):
+    out, seen = [], set()
+    for s in items:
+        s2 = (s or "").strip()
+        if s2 and s2 not in seen:
+            seen.add(s2); out.append(s2)
+    return out
+
+
+PERSONAL_COLUMNS = ("운세", "조언", "행운 아이템")
+PERSONAL_SEEDS = ("fortune", "advice", "lucky")
+_PERSONAL_MEMO_MAX = 20000
+
+
+class DailyFortune:
+    """KST 하루(day) 동안 고정되는 운세 결과를 미리 계산해 둔 것.
+
+    시드 규칙은 기존과 동일하다 (같은 날짜·이름이면 결과도 바이트 단위로 같음).
+    - 종합: Random(f"{day}|overall|{계급 수}") 로 계급 목록 셔플
+    - 개인: Random(f"{day}|{이름}|{fortune|advice|lucky}|{후보 수}") 로 한 개 선택
+    """
+
+    def __init__(self, table: FortuneTable, day: str):
+        self.table = table
+        self.day = day
+        self.ranks = unique_nonempty(table.column("계급"))
+        order = self.ranks[:]
+        random.Random(f"{day}|overall|{len(self.ranks)}").shuffle(order)
+        self.order = order
+        lines = ["오늘의 종합 운세 순위"]
+        for i, rank in enumerate(order, start=1):   # 전체 랭크 전부 출력
+            lines.append(f"{i}위: {rank}")
+        self.overall_text = "\n".join(lines)
+        self._pools = {c: [p for p in table.column(c) if p] for c in PERSONAL_COLUMNS}
+        self._personal = {}
+
+    def pick(self, column: str, seed_key: str) -> str:
+        """해당 컬럼에서 '하루 고정'으로 하나 선택 (seed_key 포함)"""
+        pool = self._pools[column]
+        if not pool:
+            return ""
+        return random.Random(f"{self.day}|{seed_key}|{len(pool)}").choice(pool)
+
+    def personal(self, name: str) -> tuple:
+        """(운세, 조언, 행운 아이템) — 같은 날 같은 이름은 메모해 둔 결과 재사용."""
+        hit = self._personal.get(name)
+        if hit is None:
+            hit = tuple(self.pick(c, f"{name}|{k}") for c, k in zip(PERSONAL_COLUMNS, PERSONAL_SEEDS))
+            if len(self._personal) >= _PERSONAL_MEMO_MAX:
+                self._personal.clear()
+            self._personal[name] = hit
+        return hit
@@ -0,0 +1,191 @@
+# 🔢 군번(72000000~72999999) 할당기
+# 100만 개 번호 공간을 "앞쪽 free 개 = 미사용" 순열(무작위 순서 free-list)과
+# 번호 → 위치 역인덱스로 관리한다. 할당/해제/사용 표시가 모두 O(1)이고,
+# 남은 번호 수를 정확히 알 수 있다.
+# 순열은 처음에 항등(위치 i = 번호 i)이고, 자리를 바꾼 칸만 딕셔너리에 둔다 →
+# 만들 때 비용이 없고 메모리는 쓴 번호 수에 비례 (테넌트마다 하나씩 있어도 부담 없음).
+# 바꾼 칸이 많아져 딕셔너리가 배열보다 커지면 그때 배열 2개(× 4MB)로 바꾼다.
+import random
+import struct
+from array import array
+
+PREFIX = "72"
+SPACE = 1_000_000
+_MAGIC = b"GBA1"
+_DENSE_AT = SPACE // 32   # 바꾼 칸이 이보다 많으면 배열로 (딕셔너리 항목당 ~250B vs 배열 8B/번호)
+
+
+class GunbeonAllocator:
+    """중복 없는 72****** 군번 할당기.
+
+    - allocate(): 무작위 미사용 번호 하나 (없으면 None)
+    - release(gid): 번호 반납 (재발급으로 풀린 번호)
+    - reserve(gid): 시트에 이미 있는 번호를 사용 중으로 표시
+    - take(n, reserve) / release_many(ids): 배치 단위 (공유 할당기 SharedAllocator 와 같은 모양)
+    """
+
+    def __init__(self, used=(), rng: random.Random | None = None):
+        self._ids = {}   # 위치 → 번호 (항등이 아닌 칸만). [0, _free) 구간이 미사용 번호
+        self._pos = {}   # 번호 → 위치 (항등이 아닌 번호만)
+        self._dense = False   # True 면 둘 다 SPACE 칸 배열
+        self._free = SPACE
+        self._rng = rng or random.SystemRandom()
+        for gid in used:
+            self.reserve(gid)
+
+    @staticmethod
+    def parse(gid) -> int | None:
+        """'72123456' → 123456 (형식이 아니면 None)."""
+        s = (gid or "").strip()
+        if len(s) != 8 or not s.startswith(PREFIX) or not s.isdigit():
+            return None
+        return int(s[2:])
+
+    @staticmethod
+    def format(n: int) -> str:
+        return f"{PREFIX}{n:06d}"
+
+    @property
+    def free_count(self) -> int:
+        return self._free
+
+    @property
+    def used_count(self) -> int:
+        return SPACE - self._free
+
+    def _position(self, n: int) -> int:
+        return self._pos[n] if self._dense else self._pos.get(n, n)
+
+    def _id_at(self, i: int) -> int:
+        return self._ids[i] if self._dense else self._ids.get(i, i)
+
+    def is_used(self, gid) -> bool:
+        n = self.parse(gid)
+        return n is not None and self._position(n) >= self._free
+
+    def used_ids(self):
+        """사용 중인 번호(정수) 목록 (순서 없음)."""
+        return [self._id_at(i) for i in range(self._free, SPACE)]
+
+    def _swap(self, n: int, j: int):
+        """번호 n 을 위치 j 로 (j 에 있던 번호 m 은 n 의 자리 i 로)."""
+        ids, pos = self._ids, self._pos
+        if self._dense:
+            i, m = pos[n], ids[j]
+            ids[i], ids[j] = m, n
+            pos[m], pos[n] = i, j
+            return
+        i, m = pos.get(n, n), ids.get(j, j)
+        # 항등이 되는 칸은 지워서 딕셔너리를 작게 유지
+        if i == m:
+            ids.pop(i, None)
+            pos.pop(m, None)
+        else:
+            ids[i] = m
+            pos[m] = i
+        if j == n:
+            ids.pop(j, None)
+            pos.pop(n, None)
+        else:
+            ids[j] = n
+            pos[n] = j
+        if len(pos) > _DENSE_AT:
+            self._densify()
+
+    def _densify(self):
+        ids, pos = array("i", range(SPACE)), array("i", range(SPACE))
+        for i, n in self._ids.items():
+            ids[i] = n
+        for n, i in self._pos.items():
+            pos[n] = i
+        self._ids, self._pos, self._dense = ids, pos, True
+
+    def _take(self, n: int):
+        """미사용 번호 n 을 사용 중 구간으로 옮긴다 (마지막 미사용 칸과 교환)."""
+        self._swap(n, self._free - 1)
+        self._free -= 1
+
+    def reserve(self, gid) -> bool:
+        n = self.parse(gid)
+        if n is None or self._position(n) >= self._free:
+            return False
+        self._take(n)
+        return True
+
+    def allocate(self) -> str | None:
+        if self._free == 0:
+            return None
+        n = self._id_at(self._rng.randrange(self._free))
+        self._take(n)
+        return self.format(n)
+
+    def release(self, gid) -> bool:
+        n = self.parse(gid)
+        if n is None or self._position(n) < self._free:
+            return False
+        self._swap(n, self._free)   # 첫 사용 중 칸과 교환 → 미사용 구간 끝
+        self._free += 1
+        return True
+
+    def take(self, n: int, reserve=()) -> list:
+        """reserve 번호를 사용 중으로 표시한 뒤 새 번호 최대 n 개 (배치 1회분)."""
+        for gid in reserve:
+            self.reserve(gid)
+        out = []
+        while len(out) < n:
+            gid = self.allocate()
+            if gid is None:
+                break
+            out.append(gid)
+        return out
+
+    def release_many(self, ids) -> int:
+        return sum(1 for gid in ids if self.release(gid))
+
+    def sync(self, ids) -> int:
+        """시트에서 읽은 군번들을 사용 중으로 합친다. 새로 표시된 개수 반환.
+
+        해제는 하지 않는다: 방금 봇이 쓴 번호가 아직 반영 안 된 읽기 결과로
+        풀려 버리면 중복 할당이 생길 수 있기 때문 (해제는 release 로만).
+        """
+        return sum(1 for gid in ids if self.reserve(gid))
+
+    # ── 스냅샷 (재시작 시 재계산 생략) ──────────────────────────────────
+    def to_bytes(self, version: str = "") -> bytes:
+        bits = bytearray(SPACE // 8)
+        for n in self.used_ids():
+            bits[n >> 3] |= 1 << (n & 7)
+        ver = (version or "").encode("utf-8")
+        return _MAGIC + struct.pack(">I", len(ver)) + ver + bytes(bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """스냅샷 → (할당기, 버전 표식). 형식이 다르면 ValueError."""
+        if data[:4] != _MAGIC:
+            raise ValueError("군번 할당기 스냅샷 형식이 아닙니다.")
+        (n_ver,) = struct.unpack(">I", data[4:8])
+        version = data[8:8 + n_ver].decode("utf-8")
+        bits = data[8 + n_ver:]
+        if len(bits) != SPACE // 8:
+            raise ValueError("군번 할당기 스냅샷 크기가 맞지 않습니다.")
+        alloc = cls()
+        for byte_i, b in enumerate(bits):
+            if not b:
+                continue
+            base = byte_i << 3
+            for bit in range(8):
+                if b >> bit & 1:
+                    alloc._take(base + bit)
+        return alloc, version
+
+    @classmethod
+    def load(cls, path: str):
+        """스냅샷 파일 → (할당기, 버전). 없거나 깨졌으면 (None, None)."""
+        try:
+            with open(path, "rb") as f:
+                return cls.from_bytes(f.read())
+        except FileNotFoundError:
+            return None, None
+        except Exception as e:
+            print(f"[WARN] 군번 할당기 스냅샷 읽기 실패: {e}")
+            return None, None
@@ -0,0 +1,277 @@
+# ✍️ 군번 부여 단일 작성자(write-behind) 큐
+# 여러 명이 동시에 !군번 을 쓰면 각자 D열을 읽고 각자 batch_update 를 보내서
+# 요청 수가 N배가 되고, 같은 (오래된) 군번 집합을 보고 중복 번호를 고를 수도 있다.
+# 여기서는 짧은 시간(window) 동안 들어온 요청을 모아 한 번 읽고 한 번 쓴다.
+# 번호는 공용 할당기(GunbeonAllocator)에서 뽑으므로 배치 안팎 모두 중복이 없고,
+# 읽기는 명단 인덱스로 찾은 대상 행의 B:D 셀만 확인한다 (열 전체 다운로드 없음).
+import asyncio
+import contextvars
+import inspect
+
+FORCE_OPTIONS = {"강제", "--force", "force", "재발급"}
+
+
+class AssignResult:
+    """군번 부여 결과.
+
+    status: "assigned"(신규) / "reissued"(재발급) / "exists"(이미 있음) / "not_found" / "exhausted"
+    """
+
+    __slots__ = ("status", "name", "row", "current", "new_id")
+
+    def __init__(self, status: str, name: str, row: int | None = None, current: str = "", new_id: str = ""):
+        self.status = status
+        self.name = name
+        self.row = row
+        self.current = current
+        self.new_id = new_id
+
+
+class _Pending:
+    __slots__ = ("name", "force", "future", "context")
+
+    def __init__(self, name, force, future):
+        self.name = name
+        self.force = force
+        self.future = future
+        self.context = contextvars.copy_context()   # 요청한 쪽의 추적/우선순위
+
+
+def _items(entry) -> list:
+    """큐 항목 → 요청 목록 (submit_many 는 목록 하나로 들어온다)."""
+    return list(entry) if isinstance(entry, list) else [entry]
+
+
+async def _resolved(value):
+    """동기 할당기(값)와 공유 할당기(코루틴) 결과를 똑같이 받기."""
+    return await value if inspect.isawaitable(value) else value
+
+
+def scan_gunbeon_rows(rows):
+    """'군번' B:D 값 → (이름 → 첫 행(2행부터), 행 → 현재 군번)."""
+    first_row, current = {}, {}
+    for i, r in enumerate(rows, start=1):
+        if i < 2:
+            continue
+        current[i] = (r[2] if len(r) > 2 else "").strip()
+        name = (r[0] if r else "").strip()
+        if name and name not in first_row:
+            first_row[name] = i
+    return first_row, current
+
+
+class GunbeonWriter:
+    """군번 부여 요청을 모아 배치당 읽기 1회 + 쓰기 1회로 처리하는 단일 작성자.
+
+    - find_rows(names): {이름: 행 또는 None} — 메모리 명단 인덱스 조회 (시트 호출 없음)
+    - read_cells(rows): 각 행의 [이름, 계급, 군번] 목록을 돌려주는 코루틴 함수 (batch_get 1회)
+    - read_all(): '군번' B:D 전체 값 (인덱스에 없거나 행이 바뀐 경우에만)
+    - write_cells(data): [{"range": "D5", "values": [["72..."]]}, ...] 를 RAW 로 쓰는 코루틴 함수
+    - allocator: GunbeonAllocator 또는 SharedAllocator (take/release_many — 배치당 1회씩)
+    - on_full_read(rows): 전체 읽기 결과 전달 (명단 인덱스 재구성/할당기 동기화)
+    - on_written(row, new_id): 쓰기 성공 후 호출 (명단 인덱스 갱신 등)
+    """
+
+    def __init__(self, find_rows, read_cells, read_all, write_cells, allocator,
+                 window: float = 0.3, max_batch: int = 50, on_full_read=None, on_written=None):
+        self._find_rows = find_rows
+        self._read_cells = read_cells
+        self._read_all = read_all
+        self._write_cells = write_cells
+        self.allocator = allocator
+        self._on_full_read = on_full_read
+        self.window = window
+        self.max_batch = max_batch
+        self._on_written = on_written
+        self._queue = None
+        self._task = None
+        self._closing = False
+        self.batches = 0
+        self.coalesced = 0
+        self.full_reads = 0
+
+    async def submit(self, name: str, force: bool = False) -> AssignResult:
+        """부여 요청을 큐에 넣고, 해당 배치가 시트에 쓰일 때까지 기다린다."""
+        if self._closing:
+            raise RuntimeError("군번 작성 큐가 종료 중입니다.")
+        self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending((name or "").strip(), force, fut))
+        return await fut
+
+    async def submit_many(self, names, force: bool = False) -> list:
+        """여러 이름을 한 배치로 처리 (max_batch 와 상관없이 나누지 않음).
+
+        이름 순서대로 AssignResult 또는 예외 객체(쓰기 실패 등) 목록을 돌려준다.
+        """
+        if self._closing:
+            raise RuntimeError("군번 작성 큐가 종료 중입니다.")
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        items = [_Pending((n or "").strip(), force, loop.create_future()) for n in names]
+        if not items:
+            return []
+        await self._queue.put(items)
+        return list(await asyncio.gather(*(p.future for p in items), return_exceptions=True))
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """새 요청을 막고 대기 중인 요청을 모두 처리한 뒤 종료."""
+        self._closing = True
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch, stop = _items(first), False
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.extend(_items(item))
+            while not stop and len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stop = True
+                else:
+                    batch.extend(_items(item))
+            await self._flush_in_context(batch)
+            if stop:
+                # 종료 신호 뒤에 남은 요청까지 모두 처리
+                rest = []
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not None:
+                        rest.extend(_items(item))
+                if rest:
+                    await self._flush_in_context(rest)
+                return
+
+    async def _flush_in_context(self, batch):
+        """배치의 첫 요청 컨텍스트에서 처리 → 시트 호출이 그 요청의 추적(span)에 남는다."""
+        ctx = batch[0].context if batch else contextvars.copy_context()
+        await asyncio.get_running_loop().create_task(self._flush(batch), context=ctx)
+
+    async def _locate(self, names):
+        """{이름: (행, 현재 군번)}. 인덱스로 찾은 행의 셀만 읽어 확인하고,
+        인덱스에 없거나 행 내용이 달라졌으면 B:D 전체를 한 번 읽는다."""
+        rows = self._find_rows(names)
+        targets = sorted({r for r in rows.values() if r})
+        if targets and all(rows.get(n) for n in names):
+            cells = dict(zip(targets, await self._read_cells(targets)))
+            located = {}
+            for n in names:
+                r = rows[n]
+                vals = list(cells.get(r) or []) + ["", "", ""]
+                if vals[0].strip() != n:
+                    break
+                located[n] = (r, vals[2].strip())
+            else:
+                return located
+        self.full_reads += 1
+        all_rows = await self._read_all()
+        if self._on_full_read is not None:
+            self._on_full_read(all_rows)
+        first_row, current = scan_gunbeon_rows(all_rows)
+        return {n: (first_row[n], current.get(first_row[n], "")) for n in names if n in first_row}
+
+    async def _flush(self, batch):
+        batch = [p for p in batch if not p.future.done()]   # 취소된 요청 제외
+        if not batch:
+            return
+        self.batches += 1
+        self.coalesced += len(batch) - 1
+        try:
+            located = await self._locate(list(dict.fromkeys(p.name for p in batch)))
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+
+        alloc = self.allocator
+        current = {row: cur for row, cur in located.values()}
+        # 새 번호가 필요한 요청 수를 먼저 세어 한 번에 받는다 (공유 할당기면 왕복 1회)
+        plan, need = dict(current), 0
+        for p in batch:
+            hit = located.get(p.name)
+            if hit and (p.force or not plan.get(hit[0])):
+                need += 1
+                plan[hit[0]] = True
+        try:
+            # 시트에 직접 적힌 번호도 사용 중으로
+            fresh = iter(await _resolved(alloc.take(need, list(current.values()))))
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+        results, data, written, replaced = [], [], [], []
+        for p in batch:
+            hit = located.get(p.name)
+            if not hit:
+                results.append((p, AssignResult("not_found", p.name)))
+                continue
+            row = hit[0]
+            cur = current.get(row, "")
+            if cur and not p.force:
+                results.append((p, AssignResult("exists", p.name, row, cur)))
+                continue
+            new_id = next(fresh, None)
+            if not new_id:
+                results.append((p, AssignResult("exhausted", p.name, row, cur)))
+                continue
+            if cur:
+                replaced.append(cur)
+            current[row] = new_id   # 같은 배치에서 같은 행을 또 요청하면 이 값을 기준으로
+            data.append({"range": f"D{row}", "values": [[new_id]]})
+            written.append((row, new_id))
+            results.append((p, AssignResult("reissued" if cur else "assigned", p.name, row, cur, new_id)))
+
+        if data:
+            try:
+                await self._write_cells(data)
+            except Exception as e:
+                await self._give_back([new_id for _, new_id in written])   # 쓰지 못한 번호 반납
+                for p, res in results:
+                    if p.future.done():
+                        continue
+                    if res.new_id:
+                        p.future.set_exception(e)
+                    else:
+                        p.future.set_result(res)
+                return
+            await self._give_back(replaced)   # 재발급으로 풀린 번호 반납
+            if self._on_written is not None:
+                for row, new_id in written:
+                    self._on_written(row, new_id)
+
+        for p, res in results:
+            if not p.future.done():
+                p.future.set_result(res)
+
+    async def _give_back(self, ids):
+        if not ids:
+            return
+        try:
+            await _resolved(self.allocator.release_many(ids))
+        except Exception as e:
+            print(f"[WARN] 군번 반납 실패({len(ids)}개): {e}")
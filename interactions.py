@@ -0,0 +1,220 @@
+# ⏳ 버튼/모달 상호작용 자동 defer (3초 응답 제한 대응)
+# 디스코드는 상호작용을 받은 뒤 3초 안에 첫 응답(메시지/defer/모달)이 없으면 실패 처리한다.
+# 콜백마다 최근 처리 시간(EWMA)을 기억해 두고, 이번에도 예산을 넘길 것 같으면 바로 defer,
+# 아니면 그대로 응답하되 예산 시각까지 응답이 없으면 타이머가 defer 한다.
+# defer 된 뒤의 send_message 는 followup 으로 보내지므로 콜백 코드는 그대로 쓰면 된다.
+# defer 후 첫 followup 은 '생각 중' 메시지를 대신하므로 공개 범위가 defer 를 따른다. 콜백이 요청한
+# 공개 범위(ephemeral)가 defer 와 다르면 그 메시지를 지우고 새로 보내서 비공개 응답이 공개되지 않게 한다.
+import asyncio
+import functools
+import time
+from datetime import datetime, timezone
+
+from tracing import span
+
+ACK_DEADLINE = 3.0   # 디스코드 첫 응답 제한(초)
+
+
+class LatencyEstimator:
+    """콜백별 처리 시간 EWMA(평균 + 편차)."""
+
+    def __init__(self, alpha: float = 0.2, k: float = 2.0):
+        self.alpha = alpha
+        self.k = k
+        self._stats = {}   # 이름 → [평균, 평균 절대 편차]
+
+    def observe(self, name: str, seconds: float):
+        st = self._stats.get(name)
+        if st is None:
+            self._stats[name] = [seconds, seconds / 2]
+            return
+        err = seconds - st[0]
+        st[0] += self.alpha * err
+        st[1] += self.alpha * (abs(err) - st[1])
+
+    def predict(self, name: str) -> float:
+        """예상 처리 시간 (평균 + k·편차, 기록이 없으면 0)."""
+        st = self._stats.get(name)
+        return st[0] + self.k * st[1] if st else 0.0
+
+
+class _Ack:
+    """상호작용 하나의 첫 응답 상태. defer 타이머와 콜백의 응답이 겹치지 않게 lock 으로 정리한다."""
+
+    def __init__(self, owner: "AutoDefer", component: str, interaction, elapsed: float, ephemeral: bool = False):
+        self.owner = owner
+        self.component = component
+        self.inter = interaction
+        self.started = time.perf_counter() - elapsed   # 상호작용 생성 시각 기준
+        self.state = "pending"   # pending / deferred / responded
+        self.ephemeral = ephemeral   # defer('생각 중' 메시지)의 공개 범위
+        self.replaced = False        # defer 후 첫 followup 을 보냈는지
+        self._lock = asyncio.Lock()
+
+    def age(self) -> float:
+        return time.perf_counter() - self.started
+
+    def _acked(self):
+        self.owner._observe_ack(self.component, self.age())
+
+    async def defer(self, reason: str, **kwargs):
+        async with self._lock:
+            if self.state != "pending":
+                return
+            kwargs.setdefault("thinking", True)
+            kwargs.setdefault("ephemeral", self.ephemeral)
+            with span(f"discord.defer({reason})"):
+                await self.inter.response.defer(**kwargs)
+            self.ephemeral = bool(kwargs["ephemeral"])
+            self.state = "deferred"
+            self._acked()
+            self.owner._deferred(self.component, reason)
+
+    async def send(self, *args, **kwargs):
+        async with self._lock:
+            if self.state == "pending":
+                with span("discord.send"):
+                    await self.inter.response.send_message(*args, **kwargs)
+                self.state = "responded"
+                self._acked()
+                return None
+            if self.state == "deferred" and not self.replaced:
+                self.replaced = True
+                if bool(kwargs.get("ephemeral", False)) != self.ephemeral:
+                    # 이대로면 '생각 중' 메시지의 공개 범위로 나간다 → 지우고 새 followup 으로
+                    with span("discord.delete"):
+                        await self.inter.delete_original_response()
+        with span("discord.followup"):
+            return await self.inter.followup.send(*args, **kwargs)
+
+    async def send_modal(self, modal):
+        async with self._lock:
+            if self.state != "pending":
+                raise RuntimeError("이미 응답(defer)한 상호작용에는 입력창을 띄울 수 없습니다.")
+            with span("discord.modal"):
+                await self.inter.response.send_modal(modal)
+            self.state = "responded"
+            self._acked()
+
+
+class _ResponseProxy:
+    def __init__(self, ack: _Ack):
+        self._ack = ack
+
+    def is_done(self) -> bool:
+        return self._ack.state != "pending"
+
+    async def send_message(self, *args, **kwargs):
+        return await self._ack.send(*args, **kwargs)
+
+    async def defer(self, **kwargs):
+        await self._ack.defer("explicit", **kwargs)
+
+    async def send_modal(self, modal):
+        await self._ack.send_modal(modal)
+
+
+class _FollowupProxy:
+    def __init__(self, ack: _Ack):
+        self._ack = ack
+
+    async def send(self, *args, **kwargs):
+        return await self._ack.send(*args, **kwargs)
+
+
+class InteractionProxy:
+    """콜백에 넘기는 Interaction 대역: response/followup 만 가로채고 나머지는 원본 그대로."""
+
+    def __init__(self, interaction, ack: _Ack):
+        self._interaction = interaction
+        self.response = _ResponseProxy(ack)
+        self.followup = _FollowupProxy(ack)
+
+    def __getattr__(self, name):
+        return getattr(self._interaction, name)
+
+
+def _age_of(interaction) -> float:
+    """상호작용이 만들어진 뒤 지난 초 (게이트웨이 지연 포함, 알 수 없으면 0)."""
+    created = getattr(interaction, "created_at", None)
+    if not isinstance(created, datetime):
+        return 0.0
+    return max(0.0, (datetime.now(timezone.utc) - created).total_seconds())
+
+
+class AutoDefer:
+    """버튼/모달 콜백 데코레이터 공장.
+
+    @auto_defer("OverallButton")            → 예측/타이머로 자동 defer (공개 '생각 중')
+    @auto_defer("X", ephemeral=True)        → 주로 본인에게만 보이게 답하는 콜백 (비공개 '생각 중')
+    @auto_defer("PersonalButton", defer=False) → 입력창을 띄우는 콜백 (defer 불가, 응답 시간만 기록)
+
+    - budget: 상호작용 생성 후 이 초까지 응답이 없으면 defer
+    - near_miss: 첫 응답이 이 초를 넘기면 아슬아슬(near-miss)로 집계
+    """
+
+    def __init__(self, registry=None, budget: float = 2.0, near_miss: float = 2.0,
+                 estimator: LatencyEstimator | None = None):
+        self.budget = budget
+        self.near_miss = near_miss
+        self.estimator = estimator or LatencyEstimator()
+        self._m = None
+        if registry is not None:
+            self._m = {
+                "ack": registry.histogram(
+                    "bot_interaction_ack_seconds", "상호작용 첫 응답까지 걸린 시간(초)", ("component",),
+                    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0),
+                ),
+                "deferred": registry.counter(
+                    "bot_interaction_deferred_total", "자동 defer 수", ("component", "reason"),
+                ),
+                "near_miss": registry.counter(
+                    "bot_interaction_near_miss_total", "첫 응답이 near-miss 기준을 넘긴 수", ("component",),
+                ),
+                "missed": registry.counter(
+                    "bot_interaction_ack_missed_total", "3초 제한을 넘긴 첫 응답 수", ("component",),
+                ),
+            }
+
+    def _observe_ack(self, component: str, seconds: float):
+        if self._m is None:
+            return
+        self._m["ack"].observe(seconds, component=component)
+        if seconds > ACK_DEADLINE:
+            self._m["missed"].inc(component=component)
+        elif seconds > self.near_miss:
+            self._m["near_miss"].inc(component=component)
+
+    def _deferred(self, component: str, reason: str):
+        if self._m is not None:
+            self._m["deferred"].inc(component=component, reason=reason)
+
+    def __call__(self, component: str, defer: bool = True, ephemeral: bool = False):
+        def deco(fn):
+            @functools.wraps(fn)
+            async def wrapper(self_, interaction, *args, **kwargs):
+                ack = _Ack(self, component, interaction, _age_of(interaction), ephemeral)
+                timer = None
+                if defer:
+                    remaining = self.budget - ack.age()
+                    if self.estimator.predict(component) >= remaining:
+                        await ack.defer("predicted")
+                    else:
+                        timer = asyncio.get_running_loop().create_task(self._defer_later(ack, remaining))
+                started = time.perf_counter()
+                try:
+                    return await fn(self_, InteractionProxy(interaction, ack), *args, **kwargs)
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                    self.estimator.observe(component, time.perf_counter() - started)
+            return wrapper
+        return deco
+
+    @staticmethod
+    async def _defer_later(ack: _Ack, delay: float):
+        await asyncio.sleep(max(0.0, delay))
+        try:
+            await ack.defer("timer")
+        except Exception as e:
+            print(f"[WARN] {ack.component} 자동 defer 실패: {e}")
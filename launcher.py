@@ -0,0 +1,114 @@
+# 🚀 샤딩 실행기: 디스코드 샤드를 워커 프로세스 여러 개에 나눠 띄운다
+# 사용법: python launcher.py
+#   SHARD_COUNT     전체 샤드 수 (기본 auto → 디스코드 권장값 /gateway/bot)
+#   SHARD_WORKERS   워커 프로세스 수 (기본 CPU 수, 샤드 수보다 많으면 샤드 수)
+#                   워커에는 실제 워커 수로 넘긴다 (공유 서비스가 없을 때 시트 할당량을 나누는 몫)
+#   SHEET_SHARE_SOCKET  공유 캐시/군번 할당 서비스 소켓 경로 (기본 ./sheet_share.sock)
+#   METRICS_PORT    워커 i 는 METRICS_PORT + i 에서 지표 제공 (0 이면 끔)
+#
+# 워커 i 는 샤드 i, i+W, i+2W ... 를 맡는다. 명단/운세 캐시와 군번 할당기는 이 프로세스가
+# 띄우는 ShareServer(sheet_share.py)를 함께 쓰므로, 워커를 늘려도 시트 읽기가 늘지 않고
+# 군번이 겹치지 않는다. 시트 분당 할당량 토큰도 여기서 받으므로 워커 수와 관계없이 한도는 그대로다. 죽은 워커는 다시 띄운다(지수 백오프).
+import asyncio
+import os
+import signal
+import sys
+
+import requests
+
+from sheet_share import ShareServer
+
+RESTART_MAX = 60.0   # 워커 재시작 최대 간격(초)
+STABLE_AFTER = 60.0  # 이만큼 살아 있었으면 재시작 간격 초기화
+
+
+def recommended_shards(token: str) -> int:
+    """디스코드 권장 샤드 수 (GET /gateway/bot)."""
+    res = requests.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}"}, timeout=10,
+    )
+    res.raise_for_status()
+    return int(res.json()["shards"])
+
+
+def plan_shards(shard_count: int, workers: int) -> list:
+    """워커별 샤드 id 목록 (라운드 로빈)."""
+    workers = max(1, min(workers, shard_count))
+    return [list(range(i, shard_count, workers)) for i in range(workers)]
+
+
+async def _run_worker(i: int, shard_ids, shard_count: int, workers: int, env: dict,
+                      stopping: asyncio.Event, procs: dict):
+    """워커 하나를 띄우고, 멈추라는 신호가 올 때까지 죽으면 다시 띄운다."""
+    loop = asyncio.get_running_loop()
+    delay = 1.0
+    metrics_port = int(env.get("METRICS_PORT", "9100"))
+    worker_env = dict(env)
+    worker_env.update({
+        "SHARD_COUNT": str(shard_count),
+        "SHARD_IDS": ",".join(map(str, shard_ids)),
+        "SHARD_WORKERS": str(workers),
+        "METRICS_PORT": str(metrics_port + i if metrics_port else 0),
+    })
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    while not stopping.is_set():
+        started = loop.time()
+        proc = await asyncio.create_subprocess_exec(sys.executable, main_py, env=worker_env)
+        procs[i] = proc
+        print(f"🧩 워커 {i} 시작 (pid {proc.pid}, 샤드 {shard_ids})")
+        code = await proc.wait()
+        procs.pop(i, None)
+        if stopping.is_set():
+            break
+        if loop.time() - started > STABLE_AFTER:
+            delay = 1.0
+        print(f"[WARN] 워커 {i} 종료(코드 {code}) → {delay:g}초 후 다시 시작")
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, RESTART_MAX)
+
+
+async def main() -> int:
+    token = os.getenv("DISCORD_BOT_TOKEN")
+    if not token:
+        print("❌ 누락된 환경변수: DISCORD_BOT_TOKEN")
+        return 1
+    count = os.getenv("SHARD_COUNT", "auto")
+    shard_count = recommended_shards(token) if count == "auto" else int(count)
+    plan = plan_shards(shard_count, int(os.getenv("SHARD_WORKERS", str(os.cpu_count() or 1))))
+    socket_path = os.path.abspath(os.getenv("SHEET_SHARE_SOCKET", "sheet_share.sock"))
+
+    share = ShareServer(socket_path)
+    await share.start()
+    print(f"🔗 공유 캐시 서비스: {socket_path} / 샤드 {shard_count}개 → 워커 {len(plan)}개")
+
+    env = dict(os.environ, SHEET_SHARE_SOCKET=socket_path)
+    stopping = asyncio.Event()
+    procs = {}
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:
+            pass  # Windows
+    runners = [
+        loop.create_task(_run_worker(i, ids, shard_count, len(plan), env, stopping, procs))
+        for i, ids in enumerate(plan)
+    ]
+    try:
+        await stopping.wait()
+    finally:
+        # 워커에 SIGTERM → 각자 대기 중인 군번 쓰기를 마무리하고 끝난다
+        for proc in list(procs.values()):
+            if proc.returncode is None:
+                proc.send_signal(signal.SIGTERM)
+        await asyncio.gather(*runners, return_exceptions=True)
+        await share.close()   # 군번 할당기 스냅샷 저장
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,22 +1,58 @@
 # 🔐 라이브러리 및 기본 설정
+import time
+PROCESS_STARTED = time.perf_counter()   # 콜드 스타트 측정 기준 (라이브러리 import 포함)
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ui import Button, View
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone, time as dtime
 import random
 import os
 import json
 import sys
+import signal
 import asyncio
+import functools
+import io
 import unicodedata, re
+from concurrent.futures import ThreadPoolExecutor
+from sheet_gateway import SheetBook, SheetGateway, configure_session
+from sheet_quota import BACKGROUND, QuotaScheduler, priority_var
+from sheet_cache import VersionedCache, WriteFence
+from sheet_snapshot import SnapshotStore
+from fortune import DailyFortune, FortuneTable, parse_fortune_table
+from roster import RosterIndex
+from draw import DrawPool, parse_draw_options
+from perf import LatencyWindow
+from interactions import AutoDefer
+from admission import Admission
+from tracing import SamplingProfiler, Tracer, add_span, span
+from tenants import ClientPool, TenantRegistry, TenantSpec, parse_routes
+from sheet_share import SharedAllocator, SharedBucket, SharedSlot, ShareClient
+import metrics
+from metrics import REGISTRY
+from gunbeon_writer import FORCE_OPTIONS, GunbeonWriter
+from gunbeon_alloc import SPACE as GUNBEON_SPACE, GunbeonAllocator
+from audit import AUDIT_HEADER, AuditTrail
 
 KST = timezone(timedelta(hours=9))
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+
+# 🧩 샤딩: SHARD_COUNT(숫자 또는 auto)가 있으면 AutoShardedBot. 여러 프로세스로 나눌 때는
+# launcher.py 가 프로세스마다 SHARD_IDS(쉼표 구분)와 SHEET_SHARE_SOCKET 을 넣어 실행한다.
+SHARD_COUNT = os.getenv("SHARD_COUNT", "")
+SHARD_IDS = [int(x) for x in os.getenv("SHARD_IDS", "").split(",") if x.strip()]
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix='!', intents=intents,
+        shard_count=None if SHARD_COUNT == "auto" else int(SHARD_COUNT),
+        shard_ids=SHARD_IDS or None,
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents)
 
 # 🔐 환경변수 확인
 DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
@@ -32,24 +68,252 @@ if missing:
     print(f"❌ 누락된 환경변수: {', '.join(missing)}")
     sys.exit(1)
 
-# 🔐 구글 시트 인증
+# 🔐 구글 시트 인증 설정 (실제 인증은 시작 후 백그라운드에서, _connect_sheets)
 scope = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive"
 ]
-try:
-    creds_dict = json.loads(GOOGLE_CREDS)
+
+SHEETS_WORKERS = int(os.getenv("SHEETS_WORKERS", "4"))
+SHEETS_TIMEOUT = float(os.getenv("SHEETS_TIMEOUT", "15"))
+SHEETS_READY_WAIT = float(os.getenv("SHEETS_READY_WAIT", "5"))   # 인증 전 시트 명령이 기다리는 최대 초
+SHEETS_CLIENT_POOL = int(os.getenv("SHEETS_CLIENT_POOL", "8"))    # 공유할 인증 클라이언트 최대 수
+
+def _authorize_google(creds_json: str):
+    """서비스 계정 인증 → gspread 클라이언트 + keep-alive 세션 설정 (블로킹, 워커 스레드에서 호출)"""
+    creds_dict = json.loads(creds_json)
     creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    gclient = gspread.authorize(creds)
+    client = gspread.authorize(creds)
+    configure_session(client, pool_size=SHEETS_WORKERS, timeout=SHEETS_TIMEOUT)
+    return client
+
+# 🏘️ 서버별 스프레드시트: TENANTS(JSON) 또는 TENANTS_FILE 로 서버 id → 시트 키(+인증정보)
+# 설정에 없는 서버/DM 은 SHEET_KEY + GOOGLE_CREDS (기본 테넌트)
+try:
+    _tenants_raw = os.getenv("TENANTS", "")
+    if os.getenv("TENANTS_FILE"):
+        with open(os.getenv("TENANTS_FILE"), encoding="utf-8") as f:
+            _tenants_raw = f.read()
+    TENANT_ROUTES = parse_routes(_tenants_raw, GOOGLE_CREDS, os.environ)
 except Exception as e:
-    print("❌ 구글 스프레드시트 인증/접속 실패:", e)
+    print(f"❌ 테넌트 설정 오류: {e}")
     sys.exit(1)
 
-# 🔧 시트 핸들러 유틸 (누락 보완)
-def ws(title: str):
-    """같은 문서 내 워크시트 핸들러"""
-    return gclient.open_by_key(SHEET_KEY).worksheet(title)
+# 인증 클라이언트(토큰·세션)와 시트 워커 스레드는 모든 테넌트가 공유
+client_pool = ClientPool(_authorize_google, max_clients=SHEETS_CLIENT_POOL)
+sheet_executor = ThreadPoolExecutor(max_workers=SHEETS_WORKERS, thread_name_prefix="sheets")
+
+# 🔗 프로세스 간 공유 캐시/군번 할당 서비스 (launcher.py 가 띄움, 없으면 프로세스 혼자 씀)
+SHEET_SHARE_SOCKET = os.getenv("SHEET_SHARE_SOCKET", "")
+SHEET_SHARE_PROBE_TTL = float(os.getenv("SHEET_SHARE_PROBE_TTL", "5"))   # 다른 프로세스의 변경 확인 결과를 믿는 시간(초)
+sheet_share = ShareClient(SHEET_SHARE_SOCKET) if SHEET_SHARE_SOCKET else None
+
+# 📁 로컬 파일(스냅샷·군번 할당기·감사 저널) 기본 위치: BOT_DATA_DIR, 없으면 이 파일이 있는 폴더
+# (실행 위치(cwd)에 따라 파일이 흩어지지 않게. 경로를 환경변수로 직접 주면 그 값을 그대로 쓴다)
+DATA_DIR = os.getenv("BOT_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+
+def _data_path(name: str) -> str:
+    return os.path.join(DATA_DIR, name)
+
+# 💾 로컬 스냅샷: 재시작 직후에도 명단/운세를 바로 쓰고, 시트 확인은 백그라운드에서
+SHEET_SNAPSHOT_PATH = os.getenv("SHEET_SNAPSHOT_PATH", _data_path("sheet_snapshot.db"))   # 빈 값이면 끔
+sheet_snapshots = None   # 실행 시작 때 _open_snapshots() 가 연다 (import 만으로는 파일을 만들지 않음)
+
+def _open_snapshots():
+    """스냅샷 저장소 열기 (테넌트를 만들기 전, 한 번)"""
+    global sheet_snapshots
+    if sheet_snapshots is not None or not SHEET_SNAPSHOT_PATH:
+        return
+    try:
+        sheet_snapshots = SnapshotStore(SHEET_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"[WARN] 스냅샷 저장소 열기 실패({SHEET_SNAPSHOT_PATH}): {e}")
+
+def _snapshot_name(t, title: str) -> str:
+    return f"{t.key}/{title}"
+
+def _snapshot_saver(t, title: str, encode):
+    """캐시 재적재 시 호출: 값 → JSON 형태로 바꾼 뒤 파일 쓰기는 워커 스레드에서"""
+    def save(value, version):
+        if sheet_snapshots is None:
+            return
+        data = encode(value)
+        asyncio.get_running_loop().run_in_executor(
+            None, sheet_snapshots.save, _snapshot_name(t, title), version, data
+        )
+    return save
+
+# 📈 지표 (/metrics)
+COMMAND_SECONDS = REGISTRY.histogram("bot_command_seconds", "명령 처리 시간(초)", ("command",))
+COMMAND_TOTAL = REGISTRY.counter("bot_commands_total", "명령 처리 수", ("command", "status"))
+UI_SECONDS = REGISTRY.histogram("bot_ui_callback_seconds", "버튼/모달 콜백 처리 시간(초)", ("component",))
+UI_TOTAL = REGISTRY.counter("bot_ui_callbacks_total", "버튼/모달 콜백 수", ("component", "status"))
+SHEET_SECONDS = REGISTRY.histogram("sheets_call_seconds", "시트 호출 시간(초)", ("op", "status"))
+LOOP_LAG = REGISTRY.gauge("bot_event_loop_lag_seconds", "이벤트 루프 지연(초, 최근 측정값)")
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds_hist", "이벤트 루프 지연 분포(초)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# 🚀 콜드 스타트: 프로세스 시작 → 단계별 도달 시간 (단계마다 처음 한 번만 기록)
+STARTUP_SECONDS = REGISTRY.gauge("bot_startup_seconds", "프로세스 시작 후 단계별 도달 시간(초)", ("phase",))
+startup_marks = {}
+
+def _startup_mark(phase: str):
+    """imported → gateway_ready / sheets_ready → sheets_warm, first_response"""
+    if phase in startup_marks:
+        return
+    t = startup_marks[phase] = time.perf_counter() - PROCESS_STARTED
+    STARTUP_SECONDS.set(t, phase=phase)
+    print(f"🚀 시작 후 {t:.2f}초: {phase}")
+
+def _observe_sheet_call(name: str, seconds: float, ok: bool):
+    SHEET_SECONDS.observe(seconds, op=name, status="ok" if ok else "error")
+    add_span(f"sheets:{name}", seconds, ok)
+
+# 🔎 요청별 추적: 명령/버튼 하나의 시트 호출·주요 단계 소요 시간, 느리면 로그로 남김
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))   # 0 이면 느린 요청 로그 끔
+SLOW_TRACES = REGISTRY.counter("bot_slow_traces_total", "느린 요청(추적 로그를 남긴) 수", ("name",))
+tracer = Tracer(slow=TRACE_SLOW_MS / 1000, on_slow=lambda tr: SLOW_TRACES.inc(name=tr.name))
+
+# 🚦 분당 읽기/쓰기 할당량 (테넌트마다 버킷 따로, Tenant 참고)
+# 여러 워커 프로세스일 때(launcher.py)는 공유 서비스의 버킷 하나를 함께 쓰므로 이 값이 전체 합이다.
+# 공유 서비스에 연결할 수 없는 동안에는 워커마다 이 값을 SHARD_WORKERS 로 나눈 몫만 쓴다.
+SHEETS_READ_PER_MIN = int(os.getenv("SHEETS_READ_PER_MIN", "60"))
+SHEETS_WRITE_PER_MIN = int(os.getenv("SHEETS_WRITE_PER_MIN", "60"))
+SHARD_WORKERS = max(1, int(os.getenv("SHARD_WORKERS", "1") or 1))   # launcher.py 가 실제 워커 수로 넣어 준다
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+
+def _quota_field(field: str):
+    return lambda: {(t.name, k): v[field] for t in tenants.active() for k, v in t.quota.report().items()}
+
+REGISTRY.gauge("sheets_quota_queue_depth", "할당량 토큰 대기 중인 호출 수", ("tenant", "kind"), fn=_quota_field("queue"))
+REGISTRY.gauge("sheets_quota_wait_max_seconds", "할당량 토큰 최대 대기(초)", ("tenant", "kind"), fn=_quota_field("wait_max"))
+REGISTRY.gauge("sheets_quota_waited_total", "토큰을 기다려야 했던 호출 수", ("tenant", "kind"), fn=_quota_field("waited"), kind="counter")
+REGISTRY.gauge("sheets_quota_throttled_total", "429 응답 수", ("tenant", "kind"), fn=_quota_field("throttled"), kind="counter")
+REGISTRY.gauge("sheets_quota_retries_total", "재시도 수", ("tenant", "kind"), fn=_quota_field("retries"), kind="counter")
+REGISTRY.gauge(
+    "sheets_singleflight_saved_total", "진행 중인 같은 읽기에 합쳐져 보내지 않은 시트 호출 수", ("tenant", "op"),
+    fn=lambda: {(t.name, op): n for t in tenants.active() for op, n in t.sheets.coalesced.items()}, kind="counter",
+)
+REGISTRY.gauge("bot_tenants_active", "만들어진(사용 중인) 테넌트 수", fn=lambda: len(tenants.active()))
+REGISTRY.gauge("sheets_clients_pooled", "공유 중인 구글 인증 클라이언트 수", fn=lambda: len(client_pool))
+
+def _instrumented(component: str):
+    """버튼/모달 콜백 처리 시간·결과 기록"""
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, interaction, *args, **kwargs):
+            started, status = time.perf_counter(), "error"
+            trace, token = tracer.start(
+                component, user=getattr(interaction.user, "display_name", interaction.user.id),
+            )
+            try:
+                result = await fn(self, interaction, *args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                tracer.finish(trace, token)
+                UI_SECONDS.observe(time.perf_counter() - started, component=component)
+                UI_TOTAL.inc(component=component, status=status)
+                _startup_mark("first_response")
+        return wrapper
+    return deco
+
+# ⏳ 버튼/모달: 예상 처리 시간이 예산을 넘거나 예산 시각까지 응답이 없으면 자동 defer
+auto_defer = AutoDefer(
+    REGISTRY,
+    budget=float(os.getenv("INTERACTION_DEFER_BUDGET", "2.0")),
+    near_miss=float(os.getenv("INTERACTION_NEAR_MISS", "2.0")),
+)
+
+# 🚧 입장 제어: 시트를 쓰는 명령/버튼만 — 사용자·채널 토큰 버킷 + 명령별 동시 실행/대기열 제한
+# 대기열까지 차면 바로 거절하고 [결과] 형식으로 다시 시도할 시각을 안내한다.
+# 버튼/모달은 auto_defer 안쪽에 두므로 대기가 길어지면 defer 후 followup 으로 안내된다.
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "4"))   # 명령별 동시 실행 수
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "16"))              # 명령별 대기열 크기 (넘치면 바로 거절)
+admission = Admission(
+    REGISTRY,
+    user_per_min=int(os.getenv("ADMISSION_USER_PER_MIN", "20")),
+    user_burst=int(os.getenv("ADMISSION_USER_BURST", "5")),
+    channel_per_min=int(os.getenv("ADMISSION_CHANNEL_PER_MIN", "60")),
+    channel_burst=int(os.getenv("ADMISSION_CHANNEL_BURST", "15")),
+    user_inflight=int(os.getenv("ADMISSION_USER_INFLIGHT", "2")),
+    wait=float(os.getenv("ADMISSION_WAIT", "10")),
+    render=lambda text: f"[결과]\n{text}\n{now_kst_str()}",
+)
+for _name in ("군번", "추첨", "OverallButton", "NameModal"):
+    admission.limit(_name, ADMISSION_CONCURRENCY, ADMISSION_QUEUE)
+admission.limit("시트테스트", 1, 2)
+# PersonalButton(입력창 띄우기)은 버킷만: 입력창은 바로 첫 응답이어야 하므로 대기열에 두지 않음
+
+@bot.before_invoke
+async def _before_any_command(ctx):
+    ctx.started_at = time.perf_counter()
+    ctx.trace, ctx.trace_token = tracer.start(
+        f"!{ctx.command.qualified_name}", user=getattr(ctx.author, "display_name", ctx.author.id),
+    )
+    send = ctx.send
+
+    async def traced_send(*args, **kwargs):
+        with span("discord.send"):
+            return await send(*args, **kwargs)
+    ctx.send = traced_send
+
+@bot.after_invoke
+async def _after_any_command(ctx):
+    started = getattr(ctx, "started_at", None)
+    if started is None or ctx.command is None:
+        return
+    tracer.finish(ctx.trace, ctx.trace_token)
+    name = ctx.command.qualified_name
+    COMMAND_SECONDS.observe(time.perf_counter() - started, command=name)
+    COMMAND_TOTAL.inc(command=name, status="error" if ctx.command_failed else "ok")
+    _startup_mark("first_response")
+
+async def _watch_loop_lag(interval: float = 0.5):
+    """sleep(interval) 이 늦게 깨어난 만큼 = 이벤트 루프가 막혀 있던 시간"""
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - t - interval)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_SECONDS.observe(lag)
+
+_loop_lag_task = None
+
+async def _sheet_modified_time(t):
+    """문서 수정 시각 (캐시 변경 확인용). 공유 서비스가 있으면 다른 프로세스가 방금 확인한 값을 같이 쓴다"""
+    if t.probe_slot is not None:
+        version = await t.probe_slot.fetch(max_age=SHEET_SHARE_PROBE_TTL)
+        if version is not None:
+            return version
+    version = await _fresh_modified_time(t)
+    await _publish_modified_time(t, version)
+    return version
+
+async def _fresh_modified_time(t):
+    """문서 수정 시각을 지금 직접 확인 (쓰기 후 확인용, 공유 값을 쓰지 않음)"""
+    return await t.sheets.run(t.book.modified_time)
+
+async def _publish_modified_time(t, version):
+    if t.probe_slot is not None:
+        await t.probe_slot.publish(version, version)
+
+@tasks.loop(minutes=5)
+async def _sheet_token_refresher():
+    """OAuth 토큰을 만료 전에 미리 갱신 (요청 경로에서 갱신 대기 방지)"""
+    refreshed = set()
+    for t in tenants.active():
+        if not t.sheets.is_ready or id(t.book.client) in refreshed:
+            continue   # 아직 인증 전(_connect_sheets 가 재시도 중)이거나 공유 클라이언트를 이미 갱신함
+        refreshed.add(id(t.book.client))
+        try:
+            await t.sheets.run(t.book.refresh_token, kind=None)
+        except Exception as e:
+            print(f"[WARN] 구글 토큰 갱신 실패({t.name}): {e}")
 
 # 🧰 유틸
 def now_kst_str(fmt="%Y-%m-%d %H:%M:%S"):
@@ -91,7 +355,80 @@ def _parse_names_and_amount(args):
 
 @bot.event
 async def on_ready():
-    print(f'✅ Logged in as {bot.user} ({bot.user.id})')
+    shards = f" [샤드 {bot.shard_ids}/{bot.shard_count}]" if SHARD_COUNT else ""
+    print(f'✅ Logged in as {bot.user} ({bot.user.id}){shards}')
+    priority_var.set(BACKGROUND)   # 주기 작업의 시트 호출은 사용자 명령보다 뒤에서
+    global _loop_lag_task
+    if _loop_lag_task is None or _loop_lag_task.done():
+        _loop_lag_task = asyncio.get_running_loop().create_task(_watch_loop_lag())
+    if not _sheet_token_refresher.is_running():
+        _sheet_token_refresher.start()
+    if not _daily_fortune_rollover.is_running():
+        _daily_fortune_rollover.start()
+    _startup_mark("gateway_ready")
+
+# 🚀 지연 시작: 디스코드 접속은 바로, 구글 인증·시트 워밍업은 백그라운드에서
+# 인증 전에는 시트를 쓰는 명령만 SHEETS_READY_WAIT 초까지 기다리고(그 뒤엔 준비 중 안내),
+# !접속 / !다이스 / !랜덤 은 시트와 무관하므로 바로 응답한다.
+# 테넌트마다 처음 쓰일 때(설정된 테넌트는 시작 시) 한 번씩 연결·워밍업한다.
+SHEETS_AUTH_RETRY_MAX = float(os.getenv("SHEETS_AUTH_RETRY_MAX", "60"))   # 인증 재시도 최대 간격(초)
+
+async def _connect_sheets(t, authorize=None):
+    """구글 인증(공유 풀) → 게이트웨이 준비 (성공할 때까지 지수 백오프로 재시도)"""
+    authorize = authorize or client_pool.get
+    loop = asyncio.get_running_loop()
+    delay = 1.0
+    while True:
+        try:
+            client = await loop.run_in_executor(None, authorize, t.creds)
+            t.book.attach(client)
+            break
+        except Exception as e:
+            print(f"[WARN] 구글 스프레드시트 인증/접속 실패({t.name}, {delay:g}초 후 재시도): {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SHEETS_AUTH_RETRY_MAX)
+    t.sheets.set_ready()
+    _startup_mark("sheets_ready")
+
+async def _warm_sheets(t):
+    """첫 명령이 기다리지 않도록 시트 쪽을 미리 준비 (하나가 실패해도 나머지는 계속)"""
+    priority_var.set(BACKGROUND)   # 워밍업 호출은 사용자 명령보다 뒤에서
+    # D열 TEXT 포맷은 명령마다가 아니라 시작 시 한 번만
+    try:
+        await _ensure_gunbeon_text_format(t)
+    except Exception as e:
+        print(f"[WARN] 군번 D열 포맷 설정 실패({t.name}): {e}")
+    # 워크시트 핸들 미리 적재 (첫 명령이 메타데이터 조회를 기다리지 않도록)
+    try:
+        await t.sheets.run(t.book.refresh)
+    except Exception as e:
+        print(f"[WARN] 워크시트 핸들 적재 실패({t.name}): {e}")
+    # 명단/운세 캐시 워밍업 (스냅샷이 있으면 바로 끝나고 시트 확인은 백그라운드)
+    for cache in (t.roster_cache, t.fortune_cache):
+        try:
+            await cache.get()
+        except Exception as e:
+            print(f"[WARN] {cache.name} 캐시 워밍업 실패({t.name}): {e}")
+    _startup_mark("sheets_warm")
+
+async def _start_sheets(t):
+    await _connect_sheets(t)
+    t.audit.start()
+    await _warm_sheets(t)
+
+async def _tenant_of(spec: TenantSpec):
+    """테넌트 (처음 쓰이면 워커 스레드에서 만들고, 시트 연결·워밍업을 백그라운드로 시작)"""
+    t = await tenants.aget(spec, _build_tenant)
+    if t.started is None:
+        t.started = asyncio.get_running_loop().create_task(_start_sheets(t))
+    return t
+
+async def _tenant(guild_id: int | None):
+    """서버 → 테넌트"""
+    return await _tenant_of(tenants.spec_for(guild_id))
+
+async def _ctx_tenant(ctx):
+    return await _tenant(ctx.guild.id if ctx.guild else None)
 
 @bot.command(name="접속", help="현재 봇이 정상 작동 중인지 확인합니다. 예) !접속")
 async def 접속(ctx):
@@ -99,204 +436,361 @@ async def 접속(ctx):
 
 # ✅ 연결 테스트용 커맨드 (원하면 삭제 가능)
 @bot.command(name="시트테스트", help="연결 확인 시트의 A1에 현재 시간을 기록하고 값을 확인합니다. 예) !시트테스트")
+@admission.command("시트테스트")
 async def 시트테스트(ctx):
+    t = await _ctx_tenant(ctx)
     try:
-        sh = ws("연결 확인")  # '연결 확인' 시트 핸들러
-        sh.update_acell("A1", f"✅ 연결 OK @ {now_kst_str()}")
-        val = sh.acell("A1").value
+        await t.writes.write(t.sheets.call, "연결 확인", "update_acell", "A1", f"✅ 연결 OK @ {now_kst_str()}")
+        val = (await t.sheets.call("연결 확인", "acell", "A1")).value
         await ctx.send(f"A1 = {val}")
     except Exception as e:
         await ctx.send(f"❌ 시트 접근 실패: {e}")
 
+# ✅ 상태 없는 영구 버튼
+# 버튼마다 View 객체/타이머를 들고 있지 않고, custom_id 에 "동작:소유자:발급시각"을 담는다.
+# 클릭은 bot.add_dynamic_items 로 등록한 템플릿이 custom_id 를 해석해 처리하므로
+# 메시지별 메모리·타임아웃 edit 이 없고 재시작 후에도 버튼이 동작한다.
+# 만료는 발급 시각으로 판단한다 (버튼 모양은 그대로, 누르면 만료 안내).
+async def _check_button_owner(interaction: discord.Interaction, owner_id: int, issued: int, ttl: int) -> bool:
+    # 버튼 제한: 명령어 사용한 사람만
+    if interaction.user.id != owner_id:
+        await interaction.response.send_message("이 버튼은 명령어를 사용한 사람만 누를 수 있어요.", ephemeral=True)
+        return False
+    if ttl and time.time() - issued > ttl:
+        await interaction.response.send_message("⌛ 시간이 지난 버튼이에요. 명령어를 다시 입력해 주세요.", ephemeral=True)
+        return False
+    return True
+
+def _button_view(*items) -> View:
+    """타이머 없는 View (DynamicItem 만 담으므로 전송 후 보관되지 않음)"""
+    view = View(timeout=None)
+    for item in items:
+        view.add_item(item)
+    return view
+
 # ✅ 다이스 버튼
-class DiceButton(Button):
-    def __init__(self, sides: int, style: discord.ButtonStyle, owner_id: int):
-        super().__init__(label=f"1d{sides}", style=style)
+DICE_BUTTON_TTL = int(os.getenv("DICE_BUTTON_TTL", "60"))   # 초, 0 이면 만료 없음
+# 버튼 색: 빨강(위험)=1d6, 파랑(기본)=1d10, 초록(성공)=1d100
+DICE_STYLES = {6: discord.ButtonStyle.danger, 10: discord.ButtonStyle.primary, 100: discord.ButtonStyle.success}
+
+class DiceButton(discord.ui.DynamicItem[Button], template=r"dice:(?P<sides>6|10|100):(?P<owner>\d+):(?P<issued>\d+)"):
+    def __init__(self, sides: int, owner_id: int, issued: int):
+        super().__init__(Button(
+            label=f"1d{sides}", style=DICE_STYLES[sides], custom_id=f"dice:{sides}:{owner_id}:{issued}",
+        ))
         self.sides = sides
         self.owner_id = owner_id
+        self.issued = issued
 
-    async def callback(self, interaction: discord.Interaction):
-        # 버튼 제한: 명령어 사용한 사람만
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message(
-                "이 버튼은 명령어를 사용한 사람만 누를 수 있어요.", ephemeral=True
-            )
-            return
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(int(match["sides"]), int(match["owner"]), int(match["issued"]))
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await _check_button_owner(interaction, self.owner_id, self.issued, DICE_BUTTON_TTL)
+
+    @_instrumented("DiceButton")
+    @auto_defer("DiceButton")
+    async def callback(self, interaction: discord.Interaction):
         roll = random.randint(1, self.sides)
         await interaction.response.send_message(
             f"{interaction.user.mention}의 **1d{self.sides}** 결과: **{roll}**\n{now_kst_str()}"
         )
 
-class DiceView(View):
-    def __init__(self, owner_id: int, timeout: int = 60):
-        super().__init__(timeout=timeout)
-        # 버튼 색: 빨강(위험)=1d6, 파랑(기본)=1d10, 초록(성공)=1d100
-        self.add_item(DiceButton(6,   discord.ButtonStyle.danger,  owner_id))
-        self.add_item(DiceButton(10,  discord.ButtonStyle.primary, owner_id))
-        self.add_item(DiceButton(100, discord.ButtonStyle.success, owner_id))
-        self.message = None
-
-    async def on_timeout(self):
-        # 타임아웃 시 버튼 비활성화
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except Exception:
-                pass
-
 @bot.command(name="다이스", help="버튼으로 1d6/1d10/1d100을 굴립니다. 예) !다이스")
 async def 다이스(ctx):
-    view = DiceView(owner_id=ctx.author.id)
-    msg = await ctx.send(f"{ctx.author.mention} 굴릴 주사위를 선택하세요:", view=view)
-    view.message = msg
+    issued = int(time.time())
+    view = _button_view(*(DiceButton(sides, ctx.author.id, issued) for sides in DICE_STYLES))
+    await ctx.send(f"{ctx.author.mention} 굴릴 주사위를 선택하세요:", view=view)
 
 # ─────────────────────────────────────────────────────────
 # ✅ 추가: !군번 / !추첨 / !랜덤 (통일된 [결과] 포맷)
 # ─────────────────────────────────────────────────────────
 
+# ===== 군번 명단 인덱스 (B/C/D열) — 이름 조회는 메모리에서 (캐시는 테넌트마다, Tenant 참고) =====
+async def _load_roster(t):
+    idx = RosterIndex(await t.sheets.call("군번", "get_values", "B:D"))
+    _sync_gunbeon_alloc(t, idx)
+    return idx
+
+ROSTER_CHECK_INTERVAL = float(os.getenv("ROSTER_CHECK_INTERVAL", "60"))
+ROSTER_TTL = float(os.getenv("ROSTER_TTL", "600"))
+ROSTER_MISS_REFRESH = float(os.getenv("ROSTER_MISS_REFRESH", "10"))  # 조회 실패 시 재확인 최소 간격(초)
+
+async def _roster_lookup(t, find):
+    """명단 인덱스에서 행 찾기 → (인덱스, 행). 못 찾으면 시트 변경 확인 후 한 번 더."""
+    cache = t.roster_cache
+    with span("roster.get"):
+        idx = await cache.get()
+    with span("roster.find"):
+        row = find(idx)
+    if row is None and cache.since_checked() > ROSTER_MISS_REFRESH:
+        cache.invalidate()   # 방금 시트에 추가된 이름일 수 있음
+        with span("roster.refresh"):
+            idx = await cache.refresh()
+        row = find(idx)
+    return idx, row
+
 # ===== 군번(72******) 부여/재발급 — 수식 제거 + 텍스트 고정 =====
 import re
 
-def _find_row_by_exact_name_colB(sh, target: str) -> int | None:
-    """'군번' 시트 B열에서 2행부터 '정확 일치' 행 번호 반환(헤더 제외)."""
-    tgt = (target or "").strip()
-    if not tgt:
-        return None
-    # 1) 정규식 정확일치로 시도
+# ── 군번 할당기: 100만 개 번호 공간 O(1) 할당, 스냅샷으로 재시작 시 바로 사용 ──────
+GUNBEON_ALLOC_SNAPSHOT = os.getenv("GUNBEON_ALLOC_SNAPSHOT", _data_path("gunbeon_alloc.bin"))
+
+def _tenant_file(path: str, key: str) -> str:
+    """테넌트별 로컬 파일: 기본 테넌트는 path 그대로, 나머지는 파일명에 시트 키를 붙인다"""
+    if key == SHEET_KEY:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{key}{ext}"
+
+def _sync_gunbeon_alloc(t, idx: RosterIndex):
+    """시트 D열 번호를 할당기에 반영 (새로 표시된 번호가 있으면 스냅샷 저장)"""
+    if t.gunbeon_alloc.sync(idx.ids.values()):
+        _save_gunbeon_alloc(t)
+
+def _save_gunbeon_alloc(t):
+    """할당기 스냅샷 저장 예약 (1초 안의 여러 변경은 한 번에 저장, 공유 할당기는 서비스가 저장)"""
+    if t.alloc_save_pending or t.shared_alloc:
+        return
+    t.alloc_save_pending = True
+    asyncio.get_running_loop().call_later(1.0, _flush_gunbeon_alloc, t)
+
+def _flush_gunbeon_alloc(t):
+    t.alloc_save_pending = False
+    data = t.gunbeon_alloc.to_bytes(t.roster_cache.version or "")   # 직렬화는 루프에서(일관성)
+    asyncio.get_running_loop().run_in_executor(None, _write_snapshot_file, t.alloc_path, data)
+
+def _write_snapshot_file(path: str, data: bytes):
     try:
-        cell = sh.find(f"^{re.escape(tgt)}$", in_column=2, case_sensitive=True, regex=True)
-        if cell and cell.row >= 2:
-            return cell.row
-    except Exception:
-        pass
-    # 2) 수동 스캔 (2행부터)
-    col_vals = sh.col_values(2)
-    for idx, val in enumerate(col_vals[1:], start=2):
-        if (val or "").strip() == tgt:
-            return idx
-    return None
-
-def _gunbeon_existing_set(sh):
-    """D열 기존 군번(공백 제외) 집합."""
-    return {v.strip() for v in sh.col_values(4) if v and v.strip()}
-
-def _gen_unique_gunbeon(existing: set, max_tries=2000) -> str | None:
-    """기존과 중복되지 않는 72****** 생성."""
-    for _ in range(max_tries):
-        cand = f"72{random.randint(0, 999999):06d}"
-        if cand not in existing:
-            return cand
-    return None
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARN] 스냅샷 저장 실패({path}): {e}")
+
+async def _ensure_gunbeon_text_format(t):
+    """D열 전체를 TEXT 포맷으로 고정 (자동 숫자/전화번호 변환 방지). 테넌트당 1회."""
+    if t.gunbeon_format_done:
+        return
+    await t.writes.write(t.sheets.call, "군번", "format", "D:D", {"numberFormat": {"type": "TEXT"}})
+    t.gunbeon_format_done = True
+
+# ── 단일 작성자 큐: 동시에 들어온 !군번 을 모아 배치당 읽기 1회 + 쓰기 1회 ─────
+def _find_gunbeon_rows(t, names):
+    """메모리 명단 인덱스에서 B열 정확 일치 행 (인덱스 미적재 시 None)"""
+    idx = t.roster_cache.value
+    return {n: (idx.find_exact(n) if idx is not None else None) for n in names}
+
+async def _read_gunbeon_cells(t, rows):
+    """대상 행들의 B~D 셀만 한 번에 읽기"""
+    ranges = await t.sheets.call("군번", "batch_get", [f"B{r}:D{r}" for r in rows])
+    return [(vr[0] if vr else []) for vr in ranges]
+
+async def _read_gunbeon_rows(t):
+    """'군번' B(이름)~D(군번) 전체 한 번에 읽기"""
+    return (await t.sheets.call("군번", "batch_get", ["B:D"]))[0]
+
+def _on_gunbeon_full_read(t, rows):
+    # 전체를 읽은 김에 명단 인덱스/할당기도 최신으로
+    idx = RosterIndex(rows)
+    _sync_gunbeon_alloc(t, idx)
+    t.roster_cache.put(idx, t.roster_cache.version)
+
+async def _write_gunbeon_cells(t, data):
+    """D{row} 값(RAW → 수식 제거 + 텍스트 그대로)을 한 번에 쓰기 (최종 수정자는 감사 기록 업로드 때)"""
+    await t.writes.write(t.sheets.call, "군번", "batch_update", data, value_input_option="RAW")
+
+def _on_gunbeon_written(t, row: int, new_id: str):
+    # 명단 인덱스 증분 갱신 (다음 조회는 시트 호출 없이)
+    if t.roster_cache.value is not None:
+        t.roster_cache.value.set_gunbeon(row, new_id)
+
+# ── 감사 기록: 부여/재발급 이력은 메모리 버퍼 + 로컬 저널 → 주기적으로 '감사기록' 탭에 한 번에 ──
+# 최종 수정자(I13)도 명령마다가 아니라 이 업로드에서 함께 갱신 (spreadsheets.batchUpdate 1회)
+AUDIT_SHEET = os.getenv("AUDIT_SHEET", "감사기록")
+AUDIT_EDITOR_CELL = os.getenv("AUDIT_EDITOR_CELL", "I13")   # '군번' 탭, 빈 값이면 갱신 안 함
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "10"))
+AUDIT_BUFFER = int(os.getenv("AUDIT_BUFFER", "5000"))   # 메모리 링 버퍼 크기 (넘치면 저널에만)
+AUDIT_JOURNAL = os.getenv("AUDIT_JOURNAL", _data_path("audit_journal.jsonl"))   # 빈 값이면 저널 끔
+if AUDIT_JOURNAL and SHARD_IDS:
+    # 여러 워커 프로세스가 같은 저널에 쓰지 않도록 (launcher.py)
+    _root, _ext = os.path.splitext(AUDIT_JOURNAL)
+    AUDIT_JOURNAL = f"{_root}.shard{SHARD_IDS[0]}{_ext}"
+
+async def _write_audit(t, rows, editor: str):
+    """감사 행 추가 + 최종 수정자 칸 갱신을 한 번에 (탭이 없으면 머리글과 함께 만든다)"""
+    await t.writes.write(
+        t.sheets.run, t.book.append_with_cell, AUDIT_SHEET, rows, AUDIT_HEADER,
+        "군번", AUDIT_EDITOR_CELL or None, editor, kind="write", priority=BACKGROUND,
+    )
+
+def _audit_gunbeon(t, ctx, results):
+    """부여/재발급된 결과만 감사 기록에 (시트에는 다음 업로드 때)"""
+    actor = getattr(ctx.author, "display_name", "unknown")
+    at = now_kst_str()
+    for res in results:
+        if getattr(res, "new_id", ""):
+            t.audit.record(at, "!군번", actor, res.name, res.current, res.new_id, res.status)
+
+GUNBEON_BATCH_WINDOW = float(os.getenv("GUNBEON_BATCH_WINDOW", "0.3"))
+GUNBEON_BATCH_MAX = int(os.getenv("GUNBEON_BATCH_MAX", "50"))
+
+gunbeon_latency = LatencyWindow("!군번", report_every=int(os.getenv("GUNBEON_PERF_EVERY", "20")))
+
+GUNBEON_BULK_MAX = int(os.getenv("GUNBEON_BULK_MAX", "200"))   # 한 번에 부여할 수 있는 최대 인원
+
+def _parse_gunbeon_args(args):
+    """
+    args 예: ("홍길동",) / ("홍길동", "강제") / ("홍길동,", "김철수", "강제")
+    returns: (names:list[str], force:bool)
+    """
+    tokens = list(args)
+    force = bool(tokens) and tokens[-1].strip().lower() in FORCE_OPTIONS
+    if force:
+        tokens = tokens[:-1]
+    names = []
+    for token in tokens:
+        for part in token.split(","):
+            nm = part.strip()
+            if nm:
+                names.append(nm)
+    return list(dict.fromkeys(names)), force   # 중복 제거(순서 유지)
+
+async def _send_lines(ctx, lines, limit: int = 1900):
+    """디스코드 2000자 제한에 맞춰 줄 단위로 나눠 보내기"""
+    chunk = ""
+    for line in lines:
+        if chunk and len(chunk) + len(line) + 1 > limit:
+            await ctx.send(chunk)
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        await ctx.send(chunk)
+
+GUNBEON_BULK_LABELS = (
+    ("assigned", "✅ 부여"),
+    ("reissued", "🔁 재발급"),
+    ("exists", "ℹ️ 이미 있음"),
+    ("not_found", "❌ 명단에 없음"),
+    ("exhausted", "❌ 남은 군번 없음"),
+    ("error", "❌ 기록 실패"),
+)
+
+def _gunbeon_bulk_summary(names, results):
+    """이름별 결과 → 상태별 묶음 요약 줄 목록"""
+    groups = {status: [] for status, _ in GUNBEON_BULK_LABELS}
+    for name, res in zip(names, results):
+        if isinstance(res, Exception):
+            groups["error"].append(f"{name}({res})")
+        elif res.status == "assigned":
+            groups["assigned"].append(f"{name} `{res.new_id}`")
+        elif res.status == "reissued":
+            groups["reissued"].append(f"{name} `{res.current}`→`{res.new_id}`")
+        elif res.status == "exists":
+            groups["exists"].append(f"{name} `{res.current}`")
+        else:
+            groups[res.status].append(name)
+    lines = [f"[결과]\n군번 일괄 처리 ({len(names)}명)"]
+    for status, label in GUNBEON_BULK_LABELS:
+        if groups[status]:
+            lines.append(f"{label} ({len(groups[status])}명)")
+            lines.extend(f"- {item}" for item in groups[status])
+    lines.append(now_kst_str())
+    return lines
 
 @bot.command(
     name="군번",
-    help="!군번 이름 [강제|--force|force|재발급] → '군번' 시트 B열에서 이름을 찾아 D열에 고유 군번(72******)을 기입합니다."
+    help="!군번 이름 [이름2, 이름3 ...] [강제|--force|force|재발급] → '군번' 시트 B열에서 이름을 찾아 D열에 고유 군번(72******)을 기입합니다. 여러 명은 한 번에 처리합니다."
 )
-async def 군번(ctx, 이름: str, 옵션: str = ""):
-    try:
-        sh = ws("군번")
-        row = _find_row_by_exact_name_colB(sh, 이름)
-        if not row:
-            await ctx.send(f"[결과]\n❌ '군번' 시트 B열에서 '{이름}'을(를) 찾지 못했습니다.\n{now_kst_str()}")
+@admission.command("군번")
+async def 군번(ctx, *args):
+    t = await _ctx_tenant(ctx)
+    with gunbeon_latency.timer():
+        names, force = _parse_gunbeon_args(args)
+        if not names:
+            await ctx.send(f"[결과]\n⚠️ 이름을 입력하세요. 예) `!군번 홍길동` / `!군번 홍길동, 김철수 강제`\n{now_kst_str()}")
             return
-
-        current = (sh.cell(row, 4).value or "").strip()   # D열 현재 값
-        force = (옵션 or "").strip().lower() in {"강제", "--force", "force", "재발급"}
-        if current and not force:
-            await ctx.send(f"[결과]\nℹ️ '{이름}'은(는) 이미 군번 `{current}`가 있습니다.\n{now_kst_str()}")
+        if len(names) > GUNBEON_BULK_MAX:
+            await ctx.send(f"[결과]\n⚠️ 한 번에 최대 {GUNBEON_BULK_MAX}명까지 처리할 수 있습니다. (입력 {len(names)}명)\n{now_kst_str()}")
             return
-
-        # 중복 방지 집합 준비
-        existing = _gunbeon_existing_set(sh)
-        if current in existing:
-            existing.remove(current)
-
-        new_id = _gen_unique_gunbeon(existing)
-        if not new_id:
-            await ctx.send(f"[결과]\n❌ 군번 생성 실패: 잠시 후 다시 시도해 주세요.\n{now_kst_str()}")
+        if len(names) > 1:
+            # 일괄: 대상 행 읽기 1회 + 쓰기 1회 (명단에 없는 이름이 있으면 B:D 전체 읽기 1회)
+            try:
+                with span(f"gunbeon.submit_many({len(names)})"):
+                    results = await t.gunbeon_writer.submit_many(names, force=force)
+                if any(getattr(r, "new_id", "") for r in results):
+                    _save_gunbeon_alloc(t)
+                    _audit_gunbeon(t, ctx, results)
+                await _send_lines(ctx, _gunbeon_bulk_summary(names, results))
+            except Exception as e:
+                await ctx.send(f"[결과]\n❌ 군번 처리 실패: {e}\n{now_kst_str()}")
             return
 
-        # ===== 핵심: 해당 D{row} 셀의 수식을 제거하고 TEXT 형식으로 값을 '고정' =====
-        doc = gclient.open_by_key(SHEET_KEY)
-        ws_obj = doc.worksheet("군번")
-        sheet_id = ws_obj._properties.get("sheetId")
-
-        requests = []
-
-        # (A) D열 전체를 TEXT 포맷으로 고정 (자동 숫자/전화번호 변환 방지)
-        if sheet_id is not None:
-            requests.append({
-                "repeatCell": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startColumnIndex": 3,  # D (0-based)
-                        "endColumnIndex": 4
-                    },
-                    "cell": {
-                        "userEnteredFormat": {"numberFormat": {"type": "TEXT"}}
-                    },
-                    "fields": "userEnteredFormat.numberFormat"
-                }
-            })
-
-            # (B) 대상 셀(D{row})의 기존 수식/값 제거
-            requests.append({
-                "updateCells": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": row - 1,
-                        "endRowIndex": row,
-                        "startColumnIndex": 3,
-                        "endColumnIndex": 4
-                    },
-                    "fields": "userEnteredValue"
-                }
-            })
-
-            # (C) 대상 셀(D{row})에 텍스트로 값 쓰기
-            requests.append({
-                "updateCells": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": row - 1,
-                        "endRowIndex": row,
-                        "startColumnIndex": 3,
-                        "endColumnIndex": 4
-                    },
-                    "rows": [{
-                        "values": [{
-                            "userEnteredValue": {"stringValue": new_id}
-                        }]
-                    }],
-                    "fields": "userEnteredValue"
-                }
-            })
-
-            doc.batch_update({"requests": requests})
-        else:
-            # sheetId를 못얻은 예외적 상황: RAW로 직접 기록(대부분 충분)
-            sh.update(f"D{row}", [[new_id]], value_input_option="RAW")
-
-        # 최종 수정자 기록(실패 무시)
+        이름 = names[0]
         try:
-            sh.update_acell("I13", getattr(ctx.author, "display_name", "unknown"))
-        except Exception as e:
-            print(f"[WARN] I13 갱신 실패: {e}")
-
-        # 응답
-        if force and current:
-            await ctx.send(f"[결과]\n✅ '{이름}' 군번 재발급 완료: `{current}` → `{new_id}`\n{now_kst_str()}")
-        else:
-            await ctx.send(f"[결과]\n✅ '{이름}'에게 군번 `{new_id}` 부여 완료.\n{now_kst_str()}")
+            with span("gunbeon.submit"):
+                res = await t.gunbeon_writer.submit(이름, force=force)
+            if res.new_id:
+                _save_gunbeon_alloc(t)
+                _audit_gunbeon(t, ctx, [res])
+
+            # 응답
+            if res.status == "not_found":
+                await ctx.send(f"[결과]\n❌ '군번' 시트 B열에서 '{이름}'을(를) 찾지 못했습니다.\n{now_kst_str()}")
+            elif res.status == "exists":
+                await ctx.send(f"[결과]\nℹ️ '{이름}'은(는) 이미 군번 `{res.current}`가 있습니다.\n{now_kst_str()}")
+            elif res.status == "exhausted":
+                await ctx.send(f"[결과]\n❌ 군번 생성 실패: 남은 군번이 없습니다. (72000000~72999999, {GUNBEON_SPACE:,}개 모두 사용 중)\n{now_kst_str()}")
+            elif res.status == "reissued":
+                await ctx.send(f"[결과]\n✅ '{이름}' 군번 재발급 완료: `{res.current}` → `{res.new_id}`\n{now_kst_str()}")
+            else:
+                await ctx.send(f"[결과]\n✅ '{이름}'에게 군번 `{res.new_id}` 부여 완료.\n{now_kst_str()}")
 
-    except Exception as e:
-        await ctx.send(f"[결과]\n❌ 군번 처리 실패: {e}\n{now_kst_str()}")
+        except Exception as e:
+            await ctx.send(f"[결과]\n❌ 군번 처리 실패: {e}\n{now_kst_str()}")
+
+# ===== !추첨: 캐시된 명단(B6~)에서 추첨 — 계급 필터/군번 유무/누적 제외/가중치 =====
+_draw_excluded = {}   # "시트키/추첨제외/서버 id" → 누적 제외(이전 당첨자) 이름 집합
+
+async def _current_draw_pool(t) -> DrawPool:
+    """명단 인덱스가 바뀌었을 때만 후보 배열을 다시 만든다"""
+    with span("roster.get"):
+        idx = await t.roster_cache.get()
+    if t.draw_pool is None or t.draw_pool.idx is not idx:
+        with span("draw.pool_build"):
+            t.draw_pool = DrawPool(idx)
+    return t.draw_pool
+
+def _draw_exclusion_key(t, ctx) -> str:
+    return _snapshot_name(t, f"추첨제외/{ctx.guild.id if ctx.guild else 0}")
+
+async def _draw_exclusions(t, ctx) -> set:
+    """서버별 누적 제외 목록 (메모리, 처음 쓸 때만 로컬 저장소에서 워커 스레드로 읽음)"""
+    key = _draw_exclusion_key(t, ctx)
+    excluded = _draw_excluded.get(key)
+    if excluded is None:
+        got = None
+        if sheet_snapshots is not None:
+            got = await asyncio.get_running_loop().run_in_executor(None, sheet_snapshots.load, key)
+        # 읽는 동안 같은 서버의 다른 명령이 먼저 채웠으면 그것을 쓴다 (그사이 추가된 당첨자 유지)
+        excluded = _draw_excluded.setdefault(key, set(got[0]) if got else set())
+    return excluded
+
+def _save_draw_exclusions(t, ctx):
+    if sheet_snapshots is None:
+        return
+    key = _draw_exclusion_key(t, ctx)
+    data = sorted(_draw_excluded.get(key, ()))
+    asyncio.get_running_loop().run_in_executor(None, sheet_snapshots.save, key, None, data)
 
-@bot.command(name="추첨", help="!추첨 숫자 → '군번' 시트 B6 이후 이름 중에서 무작위 추첨")
-async def 추첨(ctx, 숫자: str):
+@bot.command(
+    name="추첨",
+    help="!추첨 숫자 [누적] [군번있음|군번없음] [계급=병장,상병] [가중=병장:3,상병:2] → '군번' 시트 B6 이후 이름 중에서 무작위 추첨"
+)
+@admission.command("추첨")
+async def 추첨(ctx, 숫자: str, *옵션):
     if not 숫자.isdigit():
         await ctx.send(f"[결과]\n⚠️ 숫자를 입력하세요. 예) `!추첨 3`\n{now_kst_str()}")
         return
@@ -304,22 +798,51 @@ async def 추첨(ctx, 숫자: str):
     if k <= 0:
         await ctx.send(f"[결과]\n⚠️ 1 이상의 숫자를 입력하세요.\n{now_kst_str()}")
         return
+    opts, err = parse_draw_options(옵션)
+    if err:
+        await ctx.send(f"[결과]\n{err}\n{now_kst_str()}")
+        return
+    t = await _ctx_tenant(ctx)
     try:
-        sh = ws("군번")
-        colB = sh.col_values(2)
-        candidates = [v.strip() for v in colB[5:] if v and v.strip()]  # B6~
-        total = len(candidates)
-        if total == 0:
+        pool = await _current_draw_pool(t)  # B6~
+        if len(pool) == 0:
             await ctx.send(f"[결과]\n⚠️ 추첨 대상이 없습니다. (B6 이후가 비어 있음)\n{now_kst_str()}")
             return
+        excluded = await _draw_exclusions(t, ctx) if opts["cumulative"] else ()
+        with span("draw.sample"):
+            winners, total = pool.draw(
+                k, random, ranks=opts["ranks"], has_id=opts["has_id"], exclude=excluded, weights=opts["weights"],
+            )
+        if total == 0:
+            await ctx.send(f"[결과]\n⚠️ 조건에 맞는 추첨 대상이 없습니다.\n{now_kst_str()}")
+            return
         if k > total:
             await ctx.send(f"[결과]\n⚠️ 추첨 인원이 대상 수({total}명)를 초과합니다.\n{now_kst_str()}")
             return
-        winners = random.sample(candidates, k)
-        await ctx.send(f"[결과]\n추첨 결과 ({k}명): {', '.join(winners)}\n{now_kst_str()}")
+        if len(winners) < k:
+            await ctx.send(f"[결과]\n⚠️ 가중치가 0보다 큰 대상이 {len(winners)}명뿐입니다.\n{now_kst_str()}")
+            return
+        note = ""
+        if opts["cumulative"]:
+            excluded.update(winners)
+            _save_draw_exclusions(t, ctx)
+            note = f" (누적 제외 {len(excluded)}명)"
+        await ctx.send(f"[결과]\n추첨 결과 ({k}명): {', '.join(winners)}{note}\n{now_kst_str()}")
     except Exception as e:
         await ctx.send(f"[결과]\n❌ 추첨 실패: {e}\n{now_kst_str()}")
 
+@bot.command(name="추첨초기화", help="(관리자) !추첨초기화 → '누적' 추첨의 이전 당첨자 제외 목록을 비웁니다.")
+async def 추첨초기화(ctx):
+    if not _is_manager(ctx):
+        await ctx.send(f"[결과]\n⛔ 서버 관리 권한이 있는 사람만 사용할 수 있습니다.\n{now_kst_str()}")
+        return
+    t = await _ctx_tenant(ctx)
+    excluded = await _draw_exclusions(t, ctx)
+    n = len(excluded)
+    excluded.clear()
+    _save_draw_exclusions(t, ctx)
+    await ctx.send(f"[결과]\n누적 추첨 제외 목록을 비웠습니다. ({n}명)\n{now_kst_str()}")
+
 def _parse_names_and_k_for_random(args):
     if len(args) < 2:
         return None, "⚠️ 최소 1명 이상의 이름과 추첨 인원 수를 입력하세요."
@@ -367,131 +890,260 @@ def _today_kst_str():
     return datetime.now(KST).date().strftime("%Y-%m-%d")
 
 # ── 시트 유틸 ─────────────────────────────────────────────────────────
-def _fortune_sheet_data():
-    """'운세' 시트: (헤더맵, 데이터행) 반환. 필수 열 검사."""
-    sh = ws("운세")
-    values = sh.get_all_values()
-    if not values:
-        raise RuntimeError("운세 시트가 비어 있습니다.")
-    header = [h.strip() for h in values[0]]
-    col_idx = {name: i for i, name in enumerate(header)}
-    for need in ("계급", "운세", "조언", "행운 아이템"):
-        if need not in col_idx:
-            raise RuntimeError(f"운세 시트에 '{need}' 열이 없습니다. (헤더 1행 확인)")
-    return col_idx, values[1:]  # 헤더 제외
-
-def _get_all_from_col(rows, col_i):
-    return [(r[col_i] if col_i < len(r) else "").strip() for r in rows]
-
-def _unique_nonempty(items):
-    out, seen = [], set()
-    for s in items:
-        s2 = (s or "").strip()
-        if s2 and s2 not in seen:
-            seen.add(s2); out.append(s2)
-    return out
-
-def _pick_daily_from_col(rows, col_i, seed_key: str):
-    """해당 컬럼에서 '하루 고정(KST)'으로 하나 선택 (seed_key 포함)"""
-    pool = [ (r[col_i] if col_i < len(r) else "").strip() for r in rows ]
-    pool = [p for p in pool if p]
-    if not pool:
-        return ""
-    today_key = _today_kst_str()
-    rnd = random.Random(f"{today_key}|{seed_key}|{len(pool)}")
-    return rnd.choice(pool)
-
-def _normalize_name(s: str) -> str:
-    """공백/제로폭/유사문자 제거 및 NFKC 정규화"""
-    if s is None:
-        return ""
-    # 유니코드 정규화
-    s = unicodedata.normalize("NFKC", s)
-    # 제로폭 문자 제거
-    s = re.sub(r"[\u200B-\u200D\uFEFF]", "", s)
-    # 앞뒤 공백 + 연속 공백 단일화
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def _find_row_by_name_in_gunbeon(name: str) -> int | None:
-    """
-    '군번' 시트 B열(이름)에서 2행부터 '정규화 후' 정확 일치 검색.
-    - 1차: 정규화 정확 일치
-    - 2차: 정규화 부분 일치(후보가 1개일 때만 채택)
-    """
-    sh = ws("군번")
-    tgt = _normalize_name(name)
-    if not tgt:
-        return None
-
-    colB = sh.col_values(2)
-    normB = [_normalize_name(v) for v in colB]  # 1행 포함
-
-    # 1차: 정확 일치 (2행부터)
-    for idx, v in enumerate(normB[1:], start=2):
-        if v == tgt:
-            return idx
+async def _load_fortune_table(t):
+    return parse_fortune_table(await t.sheets.call("운세", "get_all_values"))
+
+# '운세' 시트는 거의 안 바뀜 → 파싱 결과를 메모리에 두고 수정 시각이 바뀔 때만 다시 읽음
+FORTUNE_CHECK_INTERVAL = float(os.getenv("FORTUNE_CHECK_INTERVAL", "60"))
+FORTUNE_TTL = float(os.getenv("FORTUNE_TTL", "3600"))
+
+def _load_snapshots(t):
+    """로컬 스냅샷 → (명단 인덱스, 버전, 저장 시각) / (운세 표, 버전, 저장 시각). 없으면 None (블로킹: 워커 스레드에서)"""
+    if sheet_snapshots is None:
+        return None, None
+    roster = fortune = None
+    got = sheet_snapshots.load(_snapshot_name(t, "군번"))
+    if got is not None:
+        rows, version, saved_at = got
+        roster = RosterIndex(rows), version, saved_at
+    got = sheet_snapshots.load(_snapshot_name(t, "운세"))
+    if got is not None:
+        data, version, saved_at = got
+        fortune = FortuneTable.from_dict(data), version, saved_at
+    return roster, fortune
+
+def _restore_snapshots(t, roster, fortune):
+    """읽어 둔 스냅샷 → 명단/운세 캐시 (시트 호출 없음, 첫 get() 때 백그라운드 확인)"""
+    if roster is not None:
+        idx, version, saved_at = roster
+        if t.shared_alloc:
+            _sync_gunbeon_alloc(t, idx)   # 서비스로 보내기만 (로컬 할당기는 _prepare_tenant 에서 반영)
+        t.roster_cache.seed(idx, version)
+        print(f"💾 '군번' 스냅샷 적재({t.name}): {len(idx)}명 ({datetime.fromtimestamp(saved_at, KST):%m-%d %H:%M} 저장)")
+    if fortune is not None:
+        table, version, saved_at = fortune
+        t.fortune_cache.seed(table, version)
+        print(f"💾 '운세' 스냅샷 적재({t.name}) ({datetime.fromtimestamp(saved_at, KST):%m-%d %H:%M} 저장)")
+
+# ===== 🏘️ 테넌트: 스프레드시트 1개분의 시트 핸들·할당량·캐시·군번 상태 =====
+class Tenant:
+    """서버(여러 곳 가능)가 쓰는 스프레드시트 1개의 상태. TenantRegistry 가 처음 쓸 때 만든다."""
+
+    def __init__(self, spec: TenantSpec):
+        self.key, self.creds, self.name = spec.key, spec.creds, spec.name
+        self.book = SheetBook(None, spec.key)   # 클라이언트는 인증 후 attach (공유 풀)
+        # 🚦 분당 읽기/쓰기 할당량 + 우선순위(명령 > 백그라운드) + 429/5xx 백오프 — 테넌트마다 따로
+        # (여러 프로세스일 때 토큰은 공유 서비스에서: 워커마다 할당량 전체를 쓰면 합이 워커 수 배가 된다)
+        self.quota = QuotaScheduler(
+            read_per_min=SHEETS_READ_PER_MIN, write_per_min=SHEETS_WRITE_PER_MIN, max_retries=SHEETS_MAX_RETRIES,
+            buckets={
+                kind: SharedBucket(sheet_share, f"{spec.key}:{kind}", per_min, workers=SHARD_WORKERS)
+                for kind, per_min in (("read", SHEETS_READ_PER_MIN), ("write", SHEETS_WRITE_PER_MIN))
+            } if sheet_share else None,
+        )
+        # 🔌 모든 gspread 호출은 공유 워커 풀에서 실행 (이벤트 루프 블로킹 방지)
+        self.sheets = SheetGateway(
+            self.book, max_workers=SHEETS_WORKERS, timeout=SHEETS_TIMEOUT,
+            scheduler=self.quota, observer=_observe_sheet_call,
+            ready=False, ready_wait=SHEETS_READY_WAIT, executor=sheet_executor,
+        )
+        self.started = None   # 시트 연결·워밍업 작업 (_tenant 가 시작)
+        share = sheet_share
+        # 여러 프로세스일 때: 변경 확인 결과와 명단/운세를 공유 서비스로 함께 씀
+        self.probe_slot = SharedSlot(share, _snapshot_name(self, "수정시각")) if share else None
+        probe = functools.partial(_sheet_modified_time, self)
+        self.roster_cache = VersionedCache(
+            "군번", load=functools.partial(_load_roster, self), probe=probe,
+            check_interval=ROSTER_CHECK_INTERVAL, ttl=ROSTER_TTL,
+            on_reload=_snapshot_saver(self, "군번", RosterIndex.to_rows),
+            shared=SharedSlot(
+                share, _snapshot_name(self, "군번"), RosterIndex.to_rows, RosterIndex, lease=SHEETS_TIMEOUT,
+            ) if share else None,
+        )
+        self.fortune_cache = VersionedCache(
+            "운세", load=functools.partial(_load_fortune_table, self), probe=probe,
+            check_interval=FORTUNE_CHECK_INTERVAL, ttl=FORTUNE_TTL,
+            on_reload=_snapshot_saver(self, "운세", FortuneTable.to_dict),
+            shared=SharedSlot(
+                share, _snapshot_name(self, "운세"), FortuneTable.to_dict, FortuneTable.from_dict, lease=SHEETS_TIMEOUT,
+            ) if share else None,
+        )
+        # ✍️ 시트 쓰기는 모두 여기를 거친다: 자신의 쓰기로 바뀐 수정 시각이 캐시를 무효화하지 않게
+        self.writes = WriteFence(
+            functools.partial(_fresh_modified_time, self), (self.roster_cache, self.fortune_cache),
+            on_settled=functools.partial(_publish_modified_time, self),
+        )
+        self.daily = None       # 오늘의 운세 사전 계산
+        self.draw_pool = None   # !추첨 후보 배열
+        # 군번 할당기: 100만 개 번호 공간 O(1) 할당, 스냅샷으로 재시작 시 바로 사용
+        # 여러 프로세스일 때는 공유 서비스 안의 할당기 하나만 쓴다 (중복 군번 방지)
+        self.alloc_path = _tenant_file(GUNBEON_ALLOC_SNAPSHOT, spec.key)
+        self.shared_alloc = share is not None
+        if share is not None:
+            self.gunbeon_alloc = SharedAllocator(share, spec.key, os.path.abspath(self.alloc_path))
+        else:
+            self.gunbeon_alloc, _ = GunbeonAllocator.load(self.alloc_path)
+            if self.gunbeon_alloc is None:
+                self.gunbeon_alloc = GunbeonAllocator()
+        self.alloc_save_pending = False
+        self.gunbeon_format_done = False
+        self.gunbeon_writer = GunbeonWriter(
+            functools.partial(_find_gunbeon_rows, self),
+            functools.partial(_read_gunbeon_cells, self),
+            functools.partial(_read_gunbeon_rows, self),
+            functools.partial(_write_gunbeon_cells, self),
+            self.gunbeon_alloc,
+            window=GUNBEON_BATCH_WINDOW,
+            max_batch=GUNBEON_BATCH_MAX,
+            on_full_read=functools.partial(_on_gunbeon_full_read, self),
+            on_written=functools.partial(_on_gunbeon_written, self),
+        )
+        self.audit = AuditTrail(
+            functools.partial(_write_audit, self),
+            journal_path=_tenant_file(AUDIT_JOURNAL, spec.key) if AUDIT_JOURNAL else None,
+            capacity=AUDIT_BUFFER, interval=AUDIT_FLUSH_INTERVAL,
+        )
 
-    # 2차: 부분 일치(후보가 1개일 때만)
-    cand_rows = [i for i, v in enumerate(normB[1:], start=2) if v and (tgt in v or v in tgt)]
-    if len(cand_rows) == 1:
-        return cand_rows[0]
+def _prepare_tenant(spec: TenantSpec):
+    """테넌트 + 스냅샷/감사 저널 적재 (블로킹: 할당기·스냅샷 파일, SQLite, 명단 인덱스 구성 → 워커 스레드에서)"""
+    t = Tenant(spec)
+    snapshots = _load_snapshots(t)
+    alloc_changed = False
+    if snapshots[0] is not None and not t.shared_alloc:
+        # 아직 다른 곳에서 안 쓰는 로컬 할당기 → 스냅샷 번호 반영도 여기서 (루프에서는 저장 예약만)
+        alloc_changed = bool(t.gunbeon_alloc.sync(snapshots[0][0].ids.values()))
+    recovered = t.audit.recover()
+    return t, snapshots, alloc_changed, recovered
+
+def _finish_tenant(t, snapshots, alloc_changed, recovered) -> Tenant:
+    """_prepare_tenant 결과를 루프에서 마무리 (캐시 seed, 할당기 저장 예약)"""
+    _restore_snapshots(t, *snapshots)
+    if alloc_changed:
+        _save_gunbeon_alloc(t)
+    if recovered:
+        print(f"🧾 감사 저널에서 미업로드 {recovered}건 복구({t.name})")
+    return t
+
+def _make_tenant(spec: TenantSpec) -> Tenant:
+    return _finish_tenant(*_prepare_tenant(spec))
+
+async def _build_tenant(spec: TenantSpec) -> Tenant:
+    """처음 쓰이는 테넌트: 블로킹 적재는 워커 스레드에서, 캐시 반영만 루프에서"""
+    prepared = await asyncio.get_running_loop().run_in_executor(None, _prepare_tenant, spec)
+    return _finish_tenant(*prepared)
+
+tenants = TenantRegistry(_make_tenant, TenantSpec(SHEET_KEY, GOOGLE_CREDS, "default"), TENANT_ROUTES)
+
+def _cache_field(field: str):
+    return lambda: {
+        (t.name, c.name): getattr(c, field) for t in tenants.active() for c in (t.roster_cache, t.fortune_cache)
+    }
+
+def _writer_field(field: str):
+    return lambda: {(t.name,): getattr(t.gunbeon_writer, field) for t in tenants.active()}
+
+def _audit_field(field: str):
+    return lambda: {(t.name,): getattr(t.audit, field) for t in tenants.active()}
+
+REGISTRY.gauge("sheet_cache_hits_total", "캐시 적중 수", ("tenant", "cache"), fn=_cache_field("hits"), kind="counter")
+REGISTRY.gauge("sheet_cache_misses_total", "캐시 미스(동기 재검증) 수", ("tenant", "cache"), fn=_cache_field("misses"), kind="counter")
+REGISTRY.gauge("sheet_cache_reloads_total", "캐시 재적재 수", ("tenant", "cache"), fn=_cache_field("reloads"), kind="counter")
+REGISTRY.gauge(
+    "sheet_cache_shared_hits_total", "다른 프로세스가 읽은 값을 공유 서비스에서 받은 수", ("tenant", "cache"),
+    fn=_cache_field("shared_hits"), kind="counter",
+)
+REGISTRY.gauge(
+    "gunbeon_writer_batches_total", "군번 쓰기 배치 수", ("tenant",),
+    fn=_writer_field("batches"), kind="counter",
+)
+REGISTRY.gauge("audit_pending", "시트에 올리지 않은 감사 기록 수", ("tenant",), fn=_audit_field("pending"))
+REGISTRY.gauge(
+    "audit_dropped_total", "버퍼가 넘쳐 저널에만 남은 감사 기록 수", ("tenant",),
+    fn=_audit_field("dropped"), kind="counter",
+)
+REGISTRY.gauge(
+    "audit_flush_failures_total", "감사 기록 업로드 실패 수", ("tenant",),
+    fn=_audit_field("failures"), kind="counter",
+)
+REGISTRY.gauge(
+    "gunbeon_writer_coalesced_total", "배치로 합쳐져 절약된 군번 쓰기 수", ("tenant",),
+    fn=_writer_field("coalesced"), kind="counter",
+)
 
-    return None
+async def _fortune_sheet_data(t):
+    """'운세' 시트 파싱 결과(FortuneTable) 반환. 필수 열 검사."""
+    return await t.fortune_cache.get()
+
+# ── 하루 고정 결과 사전 계산 (KST 자정에 갱신, 시트가 바뀌면 다시 계산) ──────
+async def _daily_fortune(t) -> DailyFortune:
+    """오늘(KST) 날짜의 종합 순위/개인 결과 캐시"""
+    with span("fortune.get"):
+        table = await _fortune_sheet_data(t)
+    today = _today_kst_str()
+    if t.daily is None or t.daily.day != today or t.daily.table is not table:
+        with span("fortune.daily_build"):
+            t.daily = DailyFortune(table, today)
+    return t.daily
+
+@tasks.loop(time=dtime(hour=0, minute=0, second=1, tzinfo=KST))
+async def _daily_fortune_rollover():
+    priority_var.set(BACKGROUND)
+    for t in tenants.active():
+        try:
+            await _daily_fortune(t)
+        except Exception as e:
+            print(f"[WARN] 오늘의 운세 사전 계산 실패({t.name}): {e}")
 
-def _get_rank_from_gunbeon(name: str) -> str:
+async def _get_rank_from_gunbeon(t, name: str) -> str:
     """'군번' 시트에서 이름 행의 C열(계급) 반환 (없으면 빈문자열)"""
-    sh = ws("군번")
-    row = _find_row_by_name_in_gunbeon(name)
+    idx, row = await _roster_lookup(t, lambda idx: idx.find(name))
     if not row:
         return ""
-    try:
-        # 스샷 기준: C열이 '계급'
-        return (sh.cell(row, 3).value or "").strip()
-    except Exception:
-        return ""
+    # 스샷 기준: C열이 '계급'
+    return idx.rank(row)
+
+# ── UI 컴포넌트 (상태 없는 영구 버튼: custom_id = fortune:동작:소유자:발급시각) ──────
+FORTUNE_BUTTON_TTL = int(os.getenv("FORTUNE_BUTTON_TTL", "90"))   # 초, 0 이면 만료 없음
 
-# ── UI 컴포넌트 ───────────────────────────────────────────────────────
-class FortuneMenuView(View):
-    def __init__(self, owner_id: int, timeout: int = 90):
-        super().__init__(timeout=timeout)
+class _FortuneButton(discord.ui.DynamicItem[Button], template=r"fortune:(?P<action>overall|personal):(?P<owner>\d+):(?P<issued>\d+)"):
+    action = ""
+    label = ""
+    style = discord.ButtonStyle.secondary
+
+    def __init__(self, owner_id: int, issued: int):
+        super().__init__(Button(
+            label=self.label, style=self.style, custom_id=f"fortune:{self.action}:{owner_id}:{issued}",
+        ))
         self.owner_id = owner_id
-        self.add_item(OverallButton())  # 종합(빨강)
-        self.add_item(PersonalButton()) # 개인(파랑)
+        self.issued = issued
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        button = FORTUNE_BUTTONS[match["action"]]
+        return button(int(match["owner"]), int(match["issued"]))
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("이 버튼은 명령어를 사용한 사람만 누를 수 있어요.", ephemeral=True)
-            return False
-        return True
+        return await _check_button_owner(interaction, self.owner_id, self.issued, FORTUNE_BUTTON_TTL)
 
-class OverallButton(Button):
-    def __init__(self):
-        super().__init__(label="종합", style=discord.ButtonStyle.danger)
+class OverallButton(_FortuneButton, template=_FortuneButton.__discord_ui_compiled_template__):
+    action, label, style = "overall", "종합", discord.ButtonStyle.danger
 
+    @_instrumented("OverallButton")
+    @auto_defer("OverallButton")
+    @admission("OverallButton")
     async def callback(self, interaction: discord.Interaction):
         try:
-            col, rows = _fortune_sheet_data()
-            ranks = _unique_nonempty(_get_all_from_col(rows, col["계급"]))
-            if not ranks:
+            daily = await _daily_fortune(await _tenant(interaction.guild_id))
+            if not daily.ranks:
                 await interaction.response.send_message(
                     f"[결과]\n⚠️ '운세' 시트에 '계급' 데이터가 없습니다.\n{now_kst_str()}",
                     ephemeral=True
                 )
                 return
 
-            # KST 날짜 기반 결정적 셔플 → 하루 동안 동일
-            today_key = _today_kst_str()
-            rnd = random.Random(f"{today_key}|overall|{len(ranks)}")
-            order = ranks[:]
-            rnd.shuffle(order)
-
-            lines = ["오늘의 종합 운세 순위"]
-            for i, rank in enumerate(order, start=1):   # ✅ 전체 랭크 전부 출력
-                lines.append(f"{i}위: {rank}")
-
+            # KST 날짜 기반 결정적 셔플 → 하루 동안 동일 (미리 계산된 본문 사용)
             await interaction.response.send_message(
-                "[결과]\n" + "\n".join(lines) + f"\n{now_kst_str()}"
+                "[결과]\n" + daily.overall_text + f"\n{now_kst_str()}"
             )
         except Exception as e:
             await interaction.response.send_message(
@@ -507,10 +1159,10 @@ class NameModal(discord.ui.Modal, title="개인 운세"):
         )
         self.add_item(self.name_input)
 
+    @_instrumented("NameModal")
+    @auto_defer("NameModal")   # ✅ 3초 제한: 느릴 것 같으면 자동 defer(생각중 표시) 후 followup
+    @admission("NameModal")
     async def on_submit(self, interaction: discord.Interaction):
-        # ✅ 3초 제한 회피: 먼저 응답 예약(생각중 표시). 공개메시지로 보낼 땐 ephemeral=False
-        await interaction.response.defer(thinking=True, ephemeral=False)
-
         try:
             name = (self.name_input.value or "").strip()
             if not name:
@@ -518,7 +1170,8 @@ class NameModal(discord.ui.Modal, title="개인 운세"):
                 return
 
             # 군번 시트에서 계급 조회
-            rank = _get_rank_from_gunbeon(name)
+            t = await _tenant(interaction.guild_id)
+            rank = await _get_rank_from_gunbeon(t, name)
             if not rank:
                 await interaction.followup.send(
                     f"[결과]\n❌ '군번' 시트에서 '{name}'의 계급을 찾지 못했습니다.\n{now_kst_str()}"
@@ -526,10 +1179,10 @@ class NameModal(discord.ui.Modal, title="개인 운세"):
                 return
 
             # 운세 시트에서 (이름+날짜 기준) 하루 고정 랜덤
-            col, rows = _fortune_sheet_data()
-            fortune = _pick_daily_from_col(rows, col["운세"],        f"{name}|fortune") or "데이터 없음"
-            advice  = _pick_daily_from_col(rows, col["조언"],        f"{name}|advice")  or "데이터 없음"
-            lucky   = _pick_daily_from_col(rows, col["행운 아이템"], f"{name}|lucky")   or "데이터 없음"
+            fortune, advice, lucky = (await _daily_fortune(t)).personal(name)
+            fortune = fortune or "데이터 없음"
+            advice  = advice  or "데이터 없음"
+            lucky   = lucky   or "데이터 없음"
 
             msg = (
                 "[결과]\n"
@@ -547,10 +1200,12 @@ class NameModal(discord.ui.Modal, title="개인 운세"):
             # 에러도 followup으로 마무리
             await interaction.followup.send(f"[결과]\n❌ 개인 운세 실패: {e}\n{now_kst_str()}")
 
-class PersonalButton(Button):
-    def __init__(self):
-        super().__init__(label="개인", style=discord.ButtonStyle.primary)
+class PersonalButton(_FortuneButton, template=_FortuneButton.__discord_ui_compiled_template__):
+    action, label, style = "personal", "개인", discord.ButtonStyle.primary
 
+    @_instrumented("PersonalButton")
+    @auto_defer("PersonalButton", defer=False)   # 입력창은 첫 응답이어야 함
+    @admission("PersonalButton")
     async def callback(self, interaction: discord.Interaction):
         try:
             await interaction.response.send_modal(NameModal())
@@ -563,9 +1218,62 @@ class PersonalButton(Button):
 # ── 명령어: !운세 ────────────────────────────────────────────────────
 @bot.command(name="운세", help="!운세 → [종합](빨강)/[개인](파랑) 버튼 표시 (시트 '운세','군번' 연동, 전체 랭크)")
 async def 운세(ctx):
-    view = FortuneMenuView(owner_id=ctx.author.id)
+    issued = int(time.time())
+    view = _button_view(OverallButton(ctx.author.id, issued), PersonalButton(ctx.author.id, issued))  # 종합(빨강) / 개인(파랑)
     await ctx.send(f"{ctx.author.mention} 운세 메뉴를 선택하세요:", view=view)
 
+FORTUNE_BUTTONS = {"overall": OverallButton, "personal": PersonalButton}
+
+# 영구 버튼 등록: 재시작 전에 보낸 메시지의 버튼도 custom_id 로 처리
+bot.add_dynamic_items(DiceButton, _FortuneButton)
+
+# 🔬 관리자: 샘플링 프로파일러 (재배포 없이 실제 부하에서 N초 프로파일 → folded 스택 파일)
+# 결과는 flamegraph.pl(`flamegraph.pl profile.folded > out.svg`) 또는 speedscope 에 그대로 넣는다.
+ADMIN_USER_IDS = {int(x) for x in os.getenv("ADMIN_USER_IDS", "").split(",") if x.strip().isdigit()}
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+profiler = SamplingProfiler(interval=PROFILE_INTERVAL)
+
+def _is_admin(ctx) -> bool:
+    """ADMIN_USER_IDS 에 있거나 서버 관리자 권한"""
+    if ctx.author.id in ADMIN_USER_IDS:
+        return True
+    perms = getattr(ctx.author, "guild_permissions", None)
+    return bool(perms and perms.administrator)
+
+def _is_manager(ctx) -> bool:
+    """_is_admin 이거나 서버 관리(manage_guild) 권한 (관리자 권한이면 discord 가 모든 권한을 켠다)"""
+    if ctx.author.id in ADMIN_USER_IDS:
+        return True
+    perms = getattr(ctx.author, "guild_permissions", None)
+    return bool(perms and perms.manage_guild)
+
+@bot.command(name="프로파일", hidden=True, help="(관리자) !프로파일 [초] → N초 동안 샘플링 프로파일러를 켜고 플레임그래프용 파일을 보냅니다.")
+async def 프로파일(ctx, 초: str = "30"):
+    if not _is_admin(ctx):
+        await ctx.send(f"[결과]\n⛔ 관리자만 사용할 수 있습니다.\n{now_kst_str()}")
+        return
+    if not 초.isdigit() or not 1 <= int(초) <= PROFILE_MAX_SECONDS:
+        await ctx.send(f"[결과]\n⚠️ 1~{PROFILE_MAX_SECONDS} 사이의 초를 입력하세요. 예) `!프로파일 30`\n{now_kst_str()}")
+        return
+    if profiler.running:
+        await ctx.send(f"[결과]\n⚠️ 이미 프로파일 중입니다.\n{now_kst_str()}")
+        return
+    seconds = int(초)
+    profiler.start()
+    await ctx.send(f"[결과]\n🔬 {seconds}초 동안 프로파일합니다 ({PROFILE_INTERVAL * 1000:g}ms 간격).\n{now_kst_str()}")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    data = await asyncio.get_running_loop().run_in_executor(None, lambda: profiler.folded().encode("utf-8"))
+    name = f"profile-{datetime.now(KST):%Y%m%d-%H%M%S}.folded"
+    await ctx.send(
+        f"[결과]\n🔬 프로파일 완료: 샘플 {profiler.samples}회, 스택 {len(profiler.counts)}종\n"
+        f"flamegraph.pl / speedscope 로 열 수 있습니다.\n{now_kst_str()}",
+        file=discord.File(io.BytesIO(data), filename=name),
+    )
+
 # ✅ 도움말
 
 # 기본 help 제거 (중복 방지)
@@ -575,14 +1283,15 @@ bot.remove_command("help")
 HELP_OVERRIDES = {
     "도움말":  "현재 사용 가능한 명령어 목록을 표시합니다.",
     "접속":   "현재 봇이 정상 작동 중인지 확인합니다.",
-    "추첨":    "군번 시트 B6부터 마지막 행까지 이름 중에서 숫자만큼 무작위 추첨합니다. 예) !추첨 3",
+    "추첨":    "군번 시트 B6부터 마지막 행까지 이름 중에서 숫자만큼 무작위 추첨합니다. 예) !추첨 3 / !추첨 3 누적 계급=병장,상병 가중=병장:3",
+    "추첨초기화": "(서버 관리 권한) '누적' 추첨에서 제외된 이전 당첨자 목록을 비웁니다. 예) !추첨초기화",
     "랜덤":    "쉼표 제외 입력한 이름 중 하나를 무작위로 출력합니다. 예) !랜덤 김철수 신짱구 훈이",
     "다이스": "버튼으로 1d6/1d10/1d100을 굴립니다. 예) !다이스",
     "운세":    "하루 한 번 운세를 확인합니다. 전체는 종합 운세를, 개인은 이름을 입력하여 개인의 운세를 볼 수 있습니다."
 }
 
 # 표기 순서 고정
-HELP_ORDER = ["도움말", "접속", "추첨", "랜덤", "다이스", "운세"]
+HELP_ORDER = ["도움말", "접속", "추첨", "추첨초기화", "랜덤", "다이스", "운세"]
 
 @bot.command(name="도움말")
 async def 도움말(ctx):
@@ -605,5 +1314,46 @@ async def 도움말(ctx):
 
     await ctx.send(f"\n".join(lines))
 
+async def _run_bot():
+    """봇 실행 + 종료(SIGTERM 포함) 시 대기 중인 시트 쓰기 마무리"""
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(bot.close()))
+    except NotImplementedError:
+        pass  # Windows
+    _open_snapshots()
+    REGISTRY.bind_loop(loop)   # fn 지표(테넌트/캐시 상태)는 루프 스레드에서 읽는다
+    # 설정된 테넌트는 미리 만들어(스냅샷 적재) 연결·워밍업 시작 — 디스코드 접속을 기다리게 하지 않음
+    warmups = [loop.create_task(_tenant_of(spec)) for spec in tenants.specs()]
+    async with bot:
+        try:
+            await bot.start(DISCORD_TOKEN)
+        finally:
+            for task in warmups:
+                task.cancel()
+            for t in tenants.active():
+                if t.started is not None:
+                    t.started.cancel()
+                await t.gunbeon_writer.close()
+                await t.audit.close()   # 남은 감사 기록 업로드 (실패분은 저널에)
+                await t.writes.close()   # 쓰기 후 확인은 버림 (시트 워커 풀을 닫기 전에)
+                if not t.shared_alloc:
+                    _write_snapshot_file(t.alloc_path, t.gunbeon_alloc.to_bytes(t.roster_cache.version or ""))
+
+_startup_mark("imported")
+
 if __name__ == "__main__":
-    bot.run(DISCORD_TOKEN)
+    discord.utils.setup_logging()
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))   # 0 이면 끔
+    if METRICS_PORT:
+        try:
+            metrics.serve(os.getenv("METRICS_HOST", "0.0.0.0"), METRICS_PORT)
+            print(f"📈 metrics: http://{os.getenv('METRICS_HOST', '0.0.0.0')}:{METRICS_PORT}/metrics")
+        except Exception as e:
+            print(f"[WARN] 지표 서버 시작 실패: {e}")
+    try:
+        asyncio.run(_run_bot())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sheet_executor.shutdown(wait=False, cancel_futures=True)
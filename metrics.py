@@ -0,0 +1,220 @@
+# 📈 Prometheus 형식 지표 + 내장 HTTP 서버
+# 명령/버튼 처리 시간, 시트 호출 시간, 캐시 적중률, 이벤트 루프 지연 등을
+# /metrics 로 노출한다. (외부 라이브러리 없이 텍스트 형식을 직접 만든다)
+# fn= 게이지는 이벤트 루프가 가진 dict 를 읽으므로, 루프를 연결해 두면 수집 시점에
+# 루프 스레드에서 한 번에 읽어(call_soon_threadsafe) 값을 복사해 둔다.
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COLLECT_TIMEOUT = 2.0   # 루프가 이만큼 응답 없으면 직전에 읽은 값으로 내보낸다
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, registry, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = registry._lock
+        self._values = {}
+
+    def _key(self, labels) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """값을 직접 set 하거나, fn() 이 돌려주는 값(숫자 또는 {라벨튜플: 값})을 수집 시점에 읽는다.
+    fn 은 Registry 에 연결된 이벤트 루프 스레드에서 불린다 (collect)."""
+
+    kind = "gauge"
+
+    def __init__(self, registry, name, help, labelnames=(), fn=None, kind: str | None = None):
+        super().__init__(registry, name, help, labelnames)
+        self._fn = fn
+        self._collected = {}   # 마지막으로 fn 에서 읽은 값 (실패하면 이전 값 유지)
+        if kind:
+            self.kind = kind
+
+    def collect(self):
+        """fn() 값을 읽어 복사해 둔다."""
+        if self._fn is None:
+            return
+        try:
+            got = self._fn()
+            got = dict(got) if isinstance(got, dict) else {(): got}
+        except Exception as e:
+            print(f"[WARN] 지표 {self.name} 수집 실패(이전 값 유지): {e!r}")
+            return
+        with self._lock:
+            self._collected = got
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            values = dict(self._values)
+            values.update(self._collected)
+        for key, v in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            st = self._values.get(key)
+            if st is None:
+                st = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    st[0][i] += 1
+                    break
+            st[1] += value
+            st[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((k, (list(c), t, n)) for k, (c, t, n) in self._values.items())
+        for key, (counts, total, n) in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="' + _fmt_value(b) + '"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, [le])} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._loop = None
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), fn=None, kind=None) -> Gauge:
+        return self._add(Gauge(self, name, help, labelnames, fn=fn, kind=kind))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def bind_loop(self, loop):
+        """fn 게이지를 이 이벤트 루프 스레드에서 읽게 한다 (루프가 가진 dict 를 다른 스레드에서 돌지 않게)."""
+        self._loop = loop
+
+    def collect(self):
+        """fn 게이지 값을 모두 읽어 둔다. 루프가 연결돼 있으면 루프 스레드에서 한 번에."""
+        gauges = [m for m in list(self._metrics) if isinstance(m, Gauge) and m._fn is not None]
+        loop = self._loop
+        try:
+            here = asyncio.get_running_loop()
+        except RuntimeError:
+            here = None
+        if loop is None or loop is here or loop.is_closed() or not loop.is_running():
+            for g in gauges:
+                g.collect()
+            return
+        done = Future()
+
+        def run():
+            try:
+                for g in gauges:
+                    g.collect()
+            finally:
+                done.set_result(None)
+
+        try:
+            loop.call_soon_threadsafe(run)
+            done.result(timeout=COLLECT_TIMEOUT)
+        except FutureTimeout:
+            print(f"[WARN] 지표 수집: 이벤트 루프가 {COLLECT_TIMEOUT}초 동안 응답 없음 (이전 값으로)")
+        except RuntimeError:
+            pass   # 루프가 막 닫힘 → 이전 값으로
+
+    def render(self) -> str:
+        self.collect()
+        lines = []
+        for m in list(self._metrics):
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def serve(host: str = "0.0.0.0", port: int = 9100, registry: Registry = REGISTRY):
+    """/metrics, /healthz 를 제공하는 Flask 서버를 데몬 스레드로 시작."""
+    from flask import Flask, Response
+    from werkzeug.serving import make_server
+
+    app = Flask("metrics")
+
+    @app.get("/metrics")
+    def _metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/healthz")
+    def _healthz():
+        return "ok"
+
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,49 @@
+# ⏱️ 간단한 지연 시간 측정 (최근 N건 p50/p99)
+import time
+from collections import deque
+
+
+class LatencyWindow:
+    """최근 size 건의 소요 시간을 모아 report_every 건마다 p50/p99 를 로그로 남긴다."""
+
+    def __init__(self, name: str, size: int = 500, report_every: int = 50):
+        self.name = name
+        self.report_every = report_every
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        if self.report_every and self.count % self.report_every == 0:
+            print(f"[PERF] {self.summary()}")
+
+    def percentile(self, p: float) -> float:
+        if not self._samples:
+            return 0.0
+        data = sorted(self._samples)
+        k = min(len(data) - 1, max(0, int(round(p / 100 * (len(data) - 1)))))
+        return data[k]
+
+    def summary(self) -> str:
+        return (f"{self.name} p50={self.percentile(50) * 1000:.0f}ms "
+                f"p99={self.percentile(99) * 1000:.0f}ms (최근 {len(self._samples)}건)")
+
+    def timer(self):
+        """with 블록 소요 시간을 기록하는 컨텍스트 매니저."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("window", "started")
+
+    def __init__(self, window: LatencyWindow):
+        self.window = window
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.window.observe(time.perf_counter() - self.started)
+        return False
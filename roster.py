@@ -0,0 +1,163 @@
+# 🪖 '군번' 시트 명단 인덱스
+# B열(이름) / C열(계급) / D열(군번)을 한 번 읽어 정규화된 이름 → 행 번호 인덱스를 만든다.
+# 이름 조회는 시트 호출이나 셀별 정규화 없이 딕셔너리/n-gram 조회만으로 끝난다.
+import re
+import unicodedata
+
+_ZERO_WIDTH = re.compile(r"[\u200B-\u200D\uFEFF]")
+_SPACES = re.compile(r"\s+")
+
+FIRST_DATA_ROW = 2  # 1행은 헤더
+DRAW_FIRST_ROW = 6  # !추첨 대상은 B6부터
+
+
+def normalize_name(s: str) -> str:
+    """공백/제로폭/유사문자 제거 및 NFKC 정규화"""
+    if s is None:
+        return ""
+    # 유니코드 정규화
+    s = unicodedata.normalize("NFKC", s)
+    # 제로폭 문자 제거
+    s = _ZERO_WIDTH.sub("", s)
+    # 앞뒤 공백 + 연속 공백 단일화
+    s = _SPACES.sub(" ", s).strip()
+    return s
+
+
+def draw_candidates(col_b) -> list:
+    """B열 값(1행부터) → 추첨 대상 이름 목록 (B6 이후, 빈칸 제외)."""
+    return [v.strip() for v in col_b[DRAW_FIRST_ROW - 1:] if v and v.strip()]
+
+
+def _grams(s: str):
+    """부분 일치 후보용 n-gram (2글자, 한 글자 이름은 1글자)."""
+    if len(s) < 2:
+        return {s} if s else set()
+    return {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+class RosterIndex:
+    """'군번' 시트 명단 인덱스 (행 번호는 시트 기준 1-based).
+
+    - find(name): 정규화 정확 일치 → 없으면 정규화 부분 일치(후보 1개일 때만)
+    - find_exact(name): 앞뒤 공백만 제거한 원문 정확 일치
+    - rank(row) / gunbeon(row): C열 계급 / D열 군번
+    """
+
+    def __init__(self, rows=()):
+        self.names = {}   # row → 이름(원문, 앞뒤 공백 제거)
+        self.ranks = {}   # row → 계급
+        self.ids = {}     # row → 군번
+        self._norm = {}   # row → 정규화 이름
+        self._by_norm = {}   # 정규화 이름 → [row...] (행 순서)
+        self._by_raw = {}    # 원문 이름 → [row...]
+        self._grams = {}     # n-gram → {row...}
+        for i, r in enumerate(rows):
+            row = i + 1
+            if row < FIRST_DATA_ROW:
+                continue
+            self.set_row(row, *(list(r[:3]) + ["", "", ""])[:3])
+
+    def __len__(self):
+        return len(self.names)
+
+    # ── 조회 ──────────────────────────────────────────────────────────
+    def find(self, name: str) -> int | None:
+        tgt = normalize_name(name)
+        if not tgt:
+            return None
+        rows = self._by_norm.get(tgt)
+        if rows:
+            return rows[0]
+
+        # 부분 일치: (1) 이름이 tgt 를 포함 → n-gram 교집합 후 확인
+        # 한 글자 검색어는 2글자 n-gram 으로 찾을 수 없으므로 전체를 훑는다 (O(n))
+        cand = set()
+        if len(tgt) < 2:
+            cand.update(r for r, v in self._norm.items() if tgt in v)
+            postings = ()
+        else:
+            postings = sorted((self._grams.get(g, ()) for g in _grams(tgt)), key=len)
+        if postings and postings[0]:
+            base = set(postings[0])
+            for p in postings[1:]:
+                base &= p
+                if not base:
+                    break
+            cand.update(r for r in base if tgt in self._norm[r])
+        # (2) 이름이 tgt 의 부분 문자열 → tgt 의 모든 부분 문자열을 정확 일치 조회
+        n = len(tgt)
+        subs = {tgt[i:j] for i in range(n) for j in range(i + 1, n + 1)}
+        for sub in subs:
+            cand.update(self._by_norm.get(sub, ()))
+        if len(cand) == 1:
+            return cand.pop()
+        return None
+
+    def find_exact(self, name: str) -> int | None:
+        rows = self._by_raw.get((name or "").strip())
+        return rows[0] if rows else None
+
+    def rank(self, row: int) -> str:
+        return self.ranks.get(row, "")
+
+    def gunbeon(self, row: int) -> str:
+        return self.ids.get(row, "")
+
+    def to_rows(self) -> list:
+        """인덱스 → '군번' B:D 값 목록 (1행 헤더 자리는 빈 행). RosterIndex(rows) 로 되살린다."""
+        last = max(self.ranks, default=0)
+        return [[]] + [
+            [self.names.get(r, ""), self.ranks.get(r, ""), self.ids.get(r, "")]
+            for r in range(FIRST_DATA_ROW, last + 1)
+        ]
+
+    # ── 증분 갱신 (봇이 직접 쓴 행) ─────────────────────────────────────
+    def set_gunbeon(self, row: int, value: str):
+        self.ids[row] = (value or "").strip()
+
+    def set_row(self, row: int, name: str, rank: str = "", gunbeon: str = ""):
+        self._unlink(row)
+        raw = (name or "").strip()
+        self.ranks[row] = (rank or "").strip()
+        self.ids[row] = (gunbeon or "").strip()
+        if not raw:
+            return
+        norm = normalize_name(raw)
+        self.names[row] = raw
+        self._norm[row] = norm
+        _insert_sorted(self._by_raw.setdefault(raw, []), row)
+        if norm:
+            _insert_sorted(self._by_norm.setdefault(norm, []), row)
+            for g in _grams(norm):
+                self._grams.setdefault(g, set()).add(row)
+
+    def _unlink(self, row: int):
+        raw = self.names.pop(row, None)
+        norm = self._norm.pop(row, None)
+        if raw is not None:
+            _remove_key_row(self._by_raw, raw, row)
+        if norm:
+            _remove_key_row(self._by_norm, norm, row)
+            for g in _grams(norm):
+                s = self._grams.get(g)
+                if s is not None:
+                    s.discard(row)
+                    if not s:
+                        del self._grams[g]
+
+
+def _insert_sorted(rows: list, row: int):
+    if not rows or rows[-1] < row:
+        rows.append(row)
+    elif row not in rows:
+        rows.append(row)
+        rows.sort()
+
+
+def _remove_key_row(index: dict, key: str, row: int):
+    rows = index.get(key)
+    if rows and row in rows:
+        rows.remove(row)
+        if not rows:
+            del index[key]
@@ -0,0 +1,253 @@
+# 🗂️ 시트 데이터 읽기 통과(read-through) 캐시
+# 자주 바뀌지 않는 시트(운세 등)를 파싱된 형태로 메모리에 들고 있다가,
+# 저렴한 변경 확인(probe: Drive modifiedTime 등)이 "바뀌었다"고 할 때만 다시 읽는다.
+# probe 를 못 쓰는 경우를 대비해 TTL 이 지나면 무조건 다시 읽는다.
+# 확인 주기만 지난 값은 일단 그대로 돌려주고 확인은 백그라운드에서 한다.
+# 재시작 직후에는 로컬 스냅샷 값을 seed() 로 넣어 두고 바로 쓸 수 있다.
+# 여러 프로세스로 띄운 경우 shared(SharedSlot)로 같은 버전의 값을 한 프로세스만 읽는다.
+# 봇 자신의 쓰기(감사 기록, 군번)도 문서 수정 시각을 바꾸므로 WriteFence 로 감싸서
+# 그 쓰기로 바뀐 버전은 다시 읽지 않고 캐시의 새 버전으로 삼는다.
+import asyncio
+import time
+
+from sheet_quota import BACKGROUND, priority_var
+
+
+class VersionedCache:
+    """버전 확인 기반 무효화 캐시.
+
+    - load(): 실제 데이터를 읽어 파싱한 값을 돌려주는 코루틴 함수
+    - probe(): 데이터 버전 표식(수정 시각 등)을 돌려주는 저렴한 코루틴 함수 (선택)
+    - check_interval 초 안에는 probe 없이 메모리 값을 그대로 돌려준다.
+    - check_interval 이 지났지만 ttl 안이면 기존 값을 돌려주고 백그라운드에서 확인한다.
+    - ttl 초가 지나면 probe 결과와 상관없이 다시 읽는다 (요청이 기다림).
+    - on_reload(value, version): 시트에서 다시 읽을 때마다 호출 (스냅샷 저장 등)
+    - shared: 프로세스 간 공유 칸 (fetch(version) / publish(version, value) / abandon(version))
+    """
+
+    def __init__(self, name: str, load, probe=None, check_interval: float = 60.0, ttl: float = 3600.0,
+                 on_reload=None, shared=None):
+        self.name = name
+        self._load = load
+        self._probe = probe
+        self._on_reload = on_reload
+        self._shared = shared
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._value = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._bg_task = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.shared_hits = 0
+
+    def fresh(self):
+        """확인 주기 안의 값이면 그대로, 아니면 None (네트워크 호출 없음)."""
+        if self._value is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self._value
+        return None
+
+    def since_checked(self) -> float:
+        """마지막 확인(또는 적재) 후 지난 초."""
+        return time.monotonic() - self._checked_at
+
+    async def get(self):
+        value = self.fresh()
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._value is not None and time.monotonic() - self._loaded_at < self.ttl:
+            self.hits += 1
+            self._revalidate_in_background()
+            return self._value
+        return await self.refresh()
+
+    async def refresh(self):
+        """변경 확인을 지금 수행하고(필요하면 다시 읽고) 값을 돌려준다."""
+        async with self._lock:
+            value = self.fresh()
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return await self._revalidate()
+
+    def _revalidate_in_background(self):
+        if self._bg_task is not None and not self._bg_task.done():
+            return
+        self._bg_task = asyncio.get_running_loop().create_task(self._background())
+
+    async def _background(self):
+        priority_var.set(BACKGROUND)   # 사용자 명령보다 뒤에서 할당량 사용
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"[WARN] {self.name} 백그라운드 갱신 실패: {e}")
+
+    async def _revalidate(self):
+        now = time.monotonic()
+        version = None
+        if self._probe is not None:
+            try:
+                version = await self._probe()
+            except Exception as e:
+                print(f"[WARN] {self.name} 변경 확인 실패: {e}")
+                if self._value is not None and now - self._loaded_at < self.ttl:
+                    self._checked_at = now  # 확인 실패 시 TTL 안에서는 기존 값 유지
+                    return self._value
+        if self._value is not None and now - self._loaded_at < self.ttl:
+            if self._probe is None or (version is not None and version == self._version):
+                self._checked_at = now
+                return self._value
+        shared = self._shared if version is not None else None
+        if shared is not None:
+            value = await shared.fetch(version)   # 다른 프로세스가 이미 읽은 같은 버전
+            if value is not None:
+                self.put(value, version)
+                self.shared_hits += 1
+                return value
+        try:
+            value = await self._load()
+        except Exception:
+            if shared is not None:
+                await shared.abandon(version)
+            raise
+        self.put(value, version)
+        self.reloads += 1
+        if shared is not None:
+            await shared.publish(version, value)
+        if self._on_reload is not None:
+            try:
+                self._on_reload(value, version)
+            except Exception as e:
+                print(f"[WARN] {self.name} 재적재 후처리 실패: {e}")
+        return value
+
+    def put(self, value, version=None):
+        """외부에서 읽은 값을 캐시에 넣는다 (검증 시각 = 지금)."""
+        now = time.monotonic()
+        self._value = value
+        self._version = version
+        self._loaded_at = now
+        self._checked_at = now
+
+    def seed(self, value, version=None):
+        """스냅샷 등 확인 전 값을 넣는다. 바로 쓰이지만 첫 get() 때 백그라운드에서 확인한다."""
+        self.put(value, version)
+        self._checked_at = 0.0
+
+    def rebase(self, before, after) -> bool:
+        """봇 자신의 쓰기로 버전만 before → after 로 바뀐 경우: 다시 읽지 않고 버전만 옮긴다."""
+        if self._value is None or after is None or self._version != before:
+            return False
+        self._version = after
+        self._checked_at = time.monotonic()
+        return True
+
+    async def publish(self):
+        """현재 값을 공유 칸에 올린다 (rebase 뒤 다른 프로세스도 새 버전을 읽지 않게)."""
+        if self._shared is not None and self._value is not None:
+            await self._shared.publish(self._version, self._value)
+
+    def invalidate(self):
+        """다음 get() 때 변경 확인을 다시 하도록 만든다."""
+        self._checked_at = 0.0
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def version(self):
+        return self._version
+
+
+class WriteFence:
+    """봇 자신의 시트 쓰기를 감싸서, 그 쓰기로 바뀐 문서 수정 시각이 캐시를 무효화하지 않게 한다.
+
+    Drive modifiedTime 은 문서 전체 단위라 다른 탭(감사기록)이나 캐시가 이미 반영한 칸(군번 D열)을
+    써도 바뀐다. write(fn) 은 쓰기 경로에 시트 호출이나 대기를 더하지 않는다:
+    - 쓰기 시작 때 확인 주기(check_interval) 안에 확인된 캐시의 버전을 기준으로 기억하고
+    - 진행 중인 쓰기가 모두 끝나면 백그라운드에서 수정 시각을 한 번 확인해 (이어진 쓰기는 한 번으로)
+      캐시 버전이 아직 기준 그대로면 새 시각으로 옮긴다 (다시 읽지 않음).
+    기준을 잡은 뒤 확인할 때까지 들어온 외부 수정은 놓칠 수 있다 (캐시 ttl 이 지나면 다시 읽는다).
+    확인 주기를 넘긴 캐시는 기준을 잡지 않으므로 평소처럼 다시 확인·적재한다.
+
+    - caches: 버전을 옮길 VersionedCache 목록
+    - on_settled(version): 확인 뒤 호출하는 코루틴 함수 (공유 변경 확인 값 갱신 등)
+    """
+
+    def __init__(self, probe, caches=(), on_settled=None):
+        self._probe = probe
+        self.caches = list(caches)
+        self._on_settled = on_settled
+        self._base = None   # 아직 확인하지 않은 쓰기 묶음의 {캐시: 기준 버전}
+        self._active = 0    # 진행 중인 쓰기 수
+        self._gen = 0       # 쓰기 시작마다 +1 (확인 도중 새 쓰기가 있었는지)
+        self._settle = None
+        self.rebased = 0
+
+    async def write(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) 를 실행하고 결과를 돌려준다 (확인은 기다리지 않음)."""
+        if self._base is None:
+            self._base = {
+                c: c.version for c in self.caches
+                if c.value is not None and c.since_checked() < c.check_interval
+            }
+        self._active += 1
+        self._gen += 1
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            # 실패한 쓰기도 일부 반영됐을 수 있으므로 확인은 한다
+            self._active -= 1
+            if not self._active and (self._settle is None or self._settle.done()):
+                self._settle = asyncio.get_running_loop().create_task(self._settle_after())
+
+    async def settled(self):
+        """예약된 확인이 끝날 때까지 기다린다."""
+        while self._settle is not None and not self._settle.done():
+            await asyncio.shield(self._settle)
+
+    async def close(self):
+        """예약된 확인을 취소한다 (종료 시 시트 워커 풀을 닫기 전에)."""
+        if self._settle is not None and not self._settle.done():
+            self._settle.cancel()
+            try:
+                await self._settle
+            except asyncio.CancelledError:
+                pass
+        self._settle = None
+
+    async def _settle_after(self):
+        priority_var.set(BACKGROUND)
+        while True:
+            gen = self._gen
+            try:
+                after = await self._probe()
+            except Exception as e:
+                print(f"[WARN] 쓰기 후 변경 확인 실패: {e}")
+                self._base = None   # 기준을 버리면 캐시는 평소처럼 다시 확인한다
+                return
+            if self._active:
+                return   # 확인 도중 시작된 쓰기: 그 쓰기가 끝날 때 다시 확인
+            if gen == self._gen:
+                break
+            # 확인 도중 시작해서 이미 끝난 쓰기: 그것까지 반영된 값으로 한 번 더
+        base, self._base = self._base or {}, None
+        moved = [c for c, before in base.items() if after is not None and after != before and c.rebase(before, after)]
+        self.rebased += len(moved)
+        for cache in moved:
+            try:
+                await cache.publish()
+            except Exception as e:
+                print(f"[WARN] {cache.name} 공유 갱신 실패: {e}")
+        if self._on_settled is not None and after is not None:
+            try:
+                await self._on_settled(after)
+            except Exception as e:
+                print(f"[WARN] 쓰기 후처리 실패: {e}")
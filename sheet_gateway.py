@@ -0,0 +1,299 @@
+# 🔌 구글 시트 비동기 게이트웨이
+# gspread 는 동기(블로킹) HTTP 라이브러리라서 async 핸들러 안에서 바로 부르면
+# 디스코드 이벤트 루프 전체가 멈춘다. 모든 시트 호출은 여기를 거쳐
+# 제한된 크기의 워커 스레드 풀에서 실행하고, 호출마다 시간 제한을 건다.
+# 스케줄러(QuotaScheduler)가 있으면 호출마다 읽기/쓰기 할당량 토큰을 받고 나간다.
+# 같은 읽기(시트·메서드·인자)가 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받는다.
+# 구글 인증은 시작 후 백그라운드에서 하므로, 준비 전 호출은 잠시 기다렸다가 안 되면 SheetNotReady.
+import asyncio
+import functools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import gspread
+import requests
+from google.auth.transport.requests import Request
+
+from tracing import add_span
+
+
+# 쓰기 할당량을 쓰는 gspread 메서드 (나머지는 읽기)
+WRITE_OPS = frozenset({
+    "update", "update_acell", "update_cell", "update_cells", "batch_update",
+    "values_batch_update", "append_row", "append_rows", "format", "batch_format",
+    "clear", "batch_clear", "insert_row", "insert_rows", "delete_rows",
+})
+
+
+class SheetTimeout(RuntimeError):
+    """시트 호출이 제한 시간 안에 끝나지 않음."""
+
+
+class SheetNotReady(RuntimeError):
+    """구글 인증/접속이 아직 끝나지 않음 (시작 직후)."""
+
+
+def is_stale_handle_error(e: Exception) -> bool:
+    """탭 이름 변경/삭제로 캐시된 워크시트 핸들이 더 이상 유효하지 않은 경우."""
+    if isinstance(e, gspread.exceptions.WorksheetNotFound):
+        return True
+    return isinstance(e, gspread.exceptions.APIError) and "Unable to parse range" in str(e)
+
+
+class SheetBook:
+    """스프레드시트 1개의 문서/워크시트 핸들 캐시 (제목 → Worksheet).
+
+    open_by_key + worksheet 메타데이터 조회는 처음 한 번(또는 무효화 후)만 하고,
+    이후에는 캐시된 핸들로 바로 데이터 호출만 한다.
+    """
+
+    def __init__(self, client: gspread.Client | None, key: str):
+        self.client = client   # None 이면 attach() 전까지 시트 호출 불가
+        self.key = key
+        self._lock = threading.Lock()
+        self._doc = None
+        self._handles = {}
+
+    def attach(self, client: gspread.Client):
+        """인증이 끝난 클라이언트 연결 (지연 인증)."""
+        with self._lock:
+            self.client = client
+            self._doc = None
+            self._handles = {}
+
+    def doc(self):
+        """스프레드시트 핸들 (최초 1회만 open_by_key)."""
+        with self._lock:
+            if self.client is None:
+                raise SheetNotReady("구글 시트 인증 전입니다.")
+            if self._doc is None:
+                self._doc = self.client.open_by_key(self.key)
+            return self._doc
+
+    def refresh(self):
+        """탭 목록을 한 번에 다시 읽어 핸들 캐시를 새로 채운다."""
+        doc = self.doc()
+        handles = {w.title: w for w in doc.worksheets()}
+        with self._lock:
+            self._handles = handles
+
+    def worksheet(self, title: str):
+        """캐시된 워크시트 핸들. 없으면 탭 목록을 갱신한 뒤 다시 찾는다."""
+        handle = self._handles.get(title)
+        if handle is not None:
+            return handle
+        self.refresh()
+        handle = self._handles.get(title)
+        if handle is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return handle
+
+    def invalidate(self, title: str | None = None):
+        """핸들 무효화 (title 생략 시 전체). 다음 조회 때 다시 읽는다."""
+        with self._lock:
+            if title is None:
+                self._handles = {}
+            else:
+                self._handles.pop(title, None)
+
+    def append_with_cell(self, title: str, rows, header=None, cell_title: str | None = None,
+                         cell: str | None = None, value=None):
+        """title 탭 끝에 rows 추가 + (있으면) cell_title 탭 cell 에 value 를 spreadsheets.batchUpdate 1회로.
+
+        값은 문자열 그대로(RAW) 쓴다. title 탭이 없고 header 가 있으면 탭을 만들고 header 를 첫 행으로.
+        """
+        try:
+            target = self.worksheet(title)
+        except gspread.exceptions.WorksheetNotFound:
+            if header is None:
+                raise
+            target = self.doc().add_worksheet(title, rows=1, cols=len(header))
+            with self._lock:
+                self._handles[title] = target
+            rows = [header, *rows]
+        reqs = [{"appendCells": {
+            "sheetId": target.id, "rows": [_row_data(r) for r in rows], "fields": "userEnteredValue",
+        }}]
+        if cell:
+            r, c = gspread.utils.a1_to_rowcol(cell)
+            reqs.append({"updateCells": {
+                "start": {"sheetId": self.worksheet(cell_title).id, "rowIndex": r - 1, "columnIndex": c - 1},
+                "rows": [_row_data([value])], "fields": "userEnteredValue",
+            }})
+        try:
+            return self.doc().batch_update({"requests": reqs})
+        except gspread.exceptions.APIError:
+            self.invalidate()   # 탭이 지워졌으면 다음 호출 때 다시 조회(sheetId)
+            raise
+
+    def modified_time(self) -> str:
+        """문서 마지막 수정 시각(Drive modifiedTime). 캐시 변경 확인용 저렴한 호출."""
+        return self.doc().get_lastUpdateTime()
+
+    def refresh_token(self, margin: float = 300.0) -> bool:
+        """OAuth 토큰이 margin 초 안에 만료되면 미리 갱신. 갱신했으면 True."""
+        creds = self.client.http_client.auth
+        expiry = getattr(creds, "expiry", None)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth 는 naive UTC 사용
+        if creds.valid and expiry is not None and expiry - now > timedelta(seconds=margin):
+            return False
+        creds.refresh(Request())
+        return True
+
+
+def configure_session(client: gspread.Client, pool_size: int, timeout: float | None = None):
+    """클라이언트의 keep-alive 세션 커넥션 풀 크기/타임아웃 설정 (클라이언트를 공유하면 한 번만)."""
+    http = client.http_client
+    adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    http.session.mount("https://", adapter)
+    if timeout is not None:
+        http.set_timeout(timeout)
+
+
+class SheetGateway:
+    """워크시트 조회와 gspread 호출을 워커 풀에서 실행하는 게이트웨이.
+
+    - run(fn, *args, kind="read"): 임의의 블로킹 함수를 워커에서 실행
+      (kind=None 이면 할당량과 무관한 호출 — 토큰 갱신 등)
+    - call(title, op, *args): title 워크시트의 op 메서드를 워커에서 실행
+      (탭 이름 변경/삭제로 핸들이 무효해지면 한 번 다시 조회 후 재시도)
+      읽기는 같은 (title, op, 인자) 호출이 진행 중이면 그 결과를 공유한다(single-flight).
+      공유된 결과 객체는 여러 호출자가 함께 받으므로 수정하지 말 것.
+    - executor 를 넘기면 그 워커 풀을 여러 게이트웨이(테넌트)가 함께 쓴다 (shutdown 은 만든 쪽이)
+    - ready=False 로 만들면 set_ready() 전까지 호출이 최대 ready_wait 초 기다리고,
+      그래도 준비가 안 되면 SheetNotReady
+    """
+
+    def __init__(self, book: SheetBook, max_workers: int = 4, timeout: float = 15.0, scheduler=None,
+                 observer=None, ready: bool = True, ready_wait: float = 5.0, executor=None):
+        self.book = book
+        self.scheduler = scheduler
+        self.observer = observer   # observer(이름, 소요초, 성공여부) — 지표 수집용
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._owns_pool = executor is None
+        self._pool = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+        self._inflight = {}
+        self.coalesced = Counter()   # "title.op" → 합쳐져서 보내지 않은 호출 수
+        self.ready_wait = ready_wait
+        self._ready = asyncio.Event()
+        if ready:
+            self._ready.set()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def set_ready(self):
+        """인증/접속 완료 → 기다리던 호출 진행 (이벤트 루프에서 호출)."""
+        self._ready.set()
+
+    async def wait_ready(self, timeout: float | None = None):
+        """준비될 때까지 최대 timeout(기본 ready_wait) 초 대기, 넘기면 SheetNotReady."""
+        if self._ready.is_set():
+            return
+        limit = self.ready_wait if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._ready.wait(), limit)
+        except asyncio.TimeoutError:
+            raise SheetNotReady("⏳ 구글 시트 연결 준비 중입니다. 잠시 후 다시 시도해 주세요.") from None
+
+    async def run(self, fn, *args, kind: str | None = "read", priority: int | None = None,
+                  timeout: float | None = None, **kwargs):
+        """블로킹 함수 fn 을 워커 스레드에서 실행하고 결과를 기다린다."""
+        if not self._ready.is_set():
+            await self.wait_ready()
+        if self.scheduler is None or kind is None:
+            return await self._run(fn, args, kwargs, timeout)
+        queued = [time.perf_counter()]
+
+        async def attempt():
+            # 할당량 토큰/재시도 백오프를 기다린 시간도 요청 추적에 남긴다
+            waited = time.perf_counter() - queued[0]
+            if waited >= 0.001:
+                add_span(f"quota.{kind}.wait", waited)
+            try:
+                return await self._run(fn, args, kwargs, timeout)
+            finally:
+                queued[0] = time.perf_counter()
+        return await self.scheduler.execute(kind, attempt, priority=priority)
+
+    async def _run(self, fn, args, kwargs, timeout):
+        loop = asyncio.get_running_loop()
+        limit = self.timeout if timeout is None else timeout
+        name = getattr(fn, "__name__", "call")
+        started, ok = time.perf_counter(), False
+        fut = loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        try:
+            result = await asyncio.wait_for(fut, limit)
+            ok = True
+            return result
+        except asyncio.TimeoutError:
+            raise SheetTimeout(f"구글 시트 응답 시간 초과({limit:g}초): {name}") from None
+        finally:
+            if self.observer is not None:
+                self.observer(name, time.perf_counter() - started, ok)
+
+    async def call(self, title: str, op: str, *args, priority: int | None = None,
+                   timeout: float | None = None, **kwargs):
+        """워크시트 title 의 gspread 메서드 op 를 워커 스레드에서 호출."""
+        def job():
+            try:
+                return getattr(self.book.worksheet(title), op)(*args, **kwargs)
+            except Exception as e:
+                if not is_stale_handle_error(e):
+                    raise
+                self.book.invalidate(title)
+                return getattr(self.book.worksheet(title), op)(*args, **kwargs)
+        job.__name__ = f"{title}.{op}"
+        if op in WRITE_OPS:
+            return await self.run(job, kind="write", priority=priority, timeout=timeout)
+        key = _flight_key(title, op, args, kwargs)
+        if key is None:
+            return await self.run(job, kind="read", priority=priority, timeout=timeout)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(
+                self.run(job, kind="read", priority=priority, timeout=timeout)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._landed, key))
+        else:
+            self.coalesced[job.__name__] += 1
+        # 먼저 부른 쪽이 취소돼도 다른 대기자를 위해 호출은 끝까지 진행
+        return await asyncio.shield(task)
+
+    def _landed(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()   # 대기자가 모두 취소된 경우 "never retrieved" 경고 방지
+
+    def shutdown(self, wait: bool = False):
+        if self._owns_pool:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _row_data(values) -> dict:
+    """값 목록 → batchUpdate RowData (모두 문자열: 군번 등이 숫자로 바뀌지 않게)."""
+    return {"values": [{"userEnteredValue": {"stringValue": "" if v is None else str(v)}} for v in values]}
+
+
+def _flight_key(title: str, op: str, args: tuple, kwargs: dict):
+    """single-flight 키 (인자를 해시할 수 없으면 None → 합치지 않음)."""
+    key = (title, op, _freeze(args), _freeze(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _freeze(v):
+    if isinstance(v, (list, tuple)):
+        return tuple(_freeze(x) for x in v)
+    if isinstance(v, dict):
+        return tuple(sorted((k, _freeze(x)) for k, x in v.items()))
+    return v
@@ -0,0 +1,192 @@
+# 🚦 구글 시트 요청 스케줄러 (분당 할당량 + 우선순위 + 429 백오프)
+# Sheets API 는 읽기/쓰기 각각 분당 요청 수 제한이 있다. 모든 시트 호출은
+# 토큰 버킷에서 토큰을 받아야 나갈 수 있고, 기다리는 호출은 우선순위 순서로
+# (사용자 명령 > 백그라운드 갱신) 토큰을 받는다. 429/5xx 응답은 지수 백오프 +
+# 지터 후 다시 시도한다.
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import random
+import time
+
+import gspread
+import requests
+
+INTERACTIVE = 0   # 사용자 명령/버튼
+BACKGROUND = 1    # 캐시 재검증, 워밍업 등
+
+priority_var = contextvars.ContextVar("sheet_priority", default=INTERACTIVE)
+
+
+class SheetUnavailable(RuntimeError):
+    """재시도 후에도 시트가 429/5xx 를 돌려줌."""
+
+
+def error_status(e: Exception) -> int | None:
+    """gspread APIError 의 HTTP 상태 코드 (없으면 None)."""
+    if not isinstance(e, gspread.exceptions.APIError):
+        return None
+    code = getattr(e, "code", None)
+    if code is None and getattr(e, "response", None) is not None:
+        code = e.response.status_code
+    return code
+
+
+def is_retryable(e: Exception) -> bool:
+    code = error_status(e)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class TokenBucket:
+    """분당 quota 를 넘지 않는 토큰 버킷.
+
+    처음 burst 개는 바로 쓸 수 있고, 이후 (quota - burst)/60 개/초로 채워진다.
+    어떤 60초 구간에서도 burst + (quota - burst) = quota 를 넘지 않는다.
+    """
+
+    def __init__(self, per_minute: int, burst: int | None = None):
+        burst = max(1, min(per_minute, burst if burst is not None else max(1, per_minute // 6)))
+        self.capacity = burst
+        self.rate = max(per_minute - burst, 1) / 60.0
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """토큰 1개를 가져가면 0, 모자라면 다음 토큰까지 남은 초."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def give_back(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+async def _wait_of(value) -> float:
+    """로컬 버킷(값)과 공유 버킷(코루틴)의 try_take 결과를 똑같이 받기."""
+    return await value if inspect.isawaitable(value) else value
+
+
+class _LaneStats:
+    __slots__ = ("granted", "waited", "wait_total", "wait_max", "throttled", "retries", "failures")
+
+    def __init__(self):
+        self.granted = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+
+class QuotaScheduler:
+    """읽기/쓰기 토큰 버킷 + 우선순위 대기열 + 재시도.
+
+    buckets: {"read": 버킷, "write": 버킷} 을 직접 줄 때 (여러 프로세스가 함께 쓰는 SharedBucket 등).
+    버킷은 try_take() (0 또는 남은 초, 코루틴이어도 됨) 와 give_back() 만 있으면 된다.
+    """
+
+    def __init__(self, read_per_min: int = 60, write_per_min: int = 60, burst: int | None = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0,
+                 report_wait: float = 1.0, buckets: dict | None = None):
+        self.buckets = buckets or {
+            "read": TokenBucket(read_per_min, burst),
+            "write": TokenBucket(write_per_min, burst),
+        }
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.report_wait = report_wait
+        self._waiters = {kind: [] for kind in self.buckets}
+        self._pumps = {}
+        self._seq = itertools.count()
+        self._last_report = 0.0
+        self.stats = {kind: _LaneStats() for kind in self.buckets}
+
+    def queue_depth(self, kind: str) -> int:
+        return sum(1 for *_, fut in self._waiters[kind] if not fut.done())
+
+    async def acquire(self, kind: str, priority: int | None = None):
+        """kind("read"/"write") 토큰 1개를 받을 때까지 기다린다."""
+        bucket, st = self.buckets[kind], self.stats[kind]
+        if not self._waiters[kind] and await _wait_of(bucket.try_take()) == 0:
+            st.granted += 1
+            return
+        prio = priority_var.get() if priority is None else priority
+        fut = asyncio.get_running_loop().create_future()
+        started = time.monotonic()
+        heapq.heappush(self._waiters[kind], (prio, next(self._seq), fut))
+        pump = self._pumps.get(kind)
+        if pump is None or pump.done():
+            self._pumps[kind] = asyncio.get_running_loop().create_task(self._pump(kind))
+        await fut
+        waited = time.monotonic() - started
+        st.granted += 1
+        st.waited += 1
+        st.wait_total += waited
+        st.wait_max = max(st.wait_max, waited)
+        if waited >= self.report_wait and time.monotonic() - self._last_report > 10:
+            self._last_report = time.monotonic()
+            print(f"[QUOTA] {kind} 토큰 대기 {waited:.1f}s (대기열 {self.queue_depth(kind)})")
+
+    async def _pump(self, kind: str):
+        bucket, waiters = self.buckets[kind], self._waiters[kind]
+        while waiters:
+            if waiters[0][2].done():   # 취소된 대기자
+                heapq.heappop(waiters)
+                continue
+            wait = await _wait_of(bucket.try_take())
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, fut = heapq.heappop(waiters)
+            if fut.done():
+                bucket.give_back()
+            else:
+                fut.set_result(None)
+
+    async def execute(self, kind: str, attempt, priority: int | None = None):
+        """토큰 확보 → attempt() 실행. 429/5xx/연결 오류면 지수 백오프(지터) 후 재시도."""
+        st = self.stats[kind]
+        for n in range(self.max_retries + 1):
+            await self.acquire(kind, priority)
+            try:
+                return await attempt()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                code = error_status(e)
+                if code == 429:
+                    st.throttled += 1
+                if n == self.max_retries:
+                    st.failures += 1
+                    if code == 429:
+                        raise SheetUnavailable("구글 시트 요청 한도 초과 — 잠시 후 다시 시도해 주세요.") from e
+                    raise SheetUnavailable(f"구글 시트 일시 오류({code or e.__class__.__name__}) — 잠시 후 다시 시도해 주세요.") from e
+                st.retries += 1
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** n))
+                await asyncio.sleep(delay)
+
+    def report(self) -> dict:
+        """대기열 깊이/대기 시간 요약 (로그·지표용)."""
+        out = {}
+        for kind, st in self.stats.items():
+            out[kind] = {
+                "queue": self.queue_depth(kind),
+                "granted": st.granted,
+                "waited": st.waited,
+                "wait_avg": st.wait_total / st.waited if st.waited else 0.0,
+                "wait_max": st.wait_max,
+                "throttled": st.throttled,
+                "retries": st.retries,
+                "failures": st.failures,
+            }
+        return out
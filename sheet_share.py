@@ -0,0 +1,408 @@
+# 🔗 프로세스 간 공유 캐시/군번 할당 서비스 (로컬 유닉스 소켓)
+# 샤드를 여러 워커 프로세스로 나눠 띄우면 프로세스마다 명단/운세를 따로 읽고
+# 군번 할당기도 따로 갖게 된다. 실행기(launcher.py)가 이 서비스를 하나 띄우고,
+# 워커들은 여기를 거쳐
+# - 같은 버전의 명단/운세는 한 프로세스만 시트에서 읽고(임대) 나머지는 그 결과를 받고
+# - 문서 수정 시각(변경 확인)도 짧은 시간 동안 함께 쓰고
+# - 군번은 서비스 안의 할당기 하나에서만 뽑는다 (프로세스가 늘어도 중복 없음)
+# - 시트 분당 할당량 토큰도 서비스 안의 버킷 하나에서 받는다 (워커 수만큼 할당량이 늘지 않음)
+# 프레임: 4바이트 길이(big-endian) + JSON. 한 연결에서 요청 여러 개를 동시에 보낼 수 있다(id 로 구분).
+import asyncio
+import itertools
+import json
+import os
+import struct
+import time
+
+from gunbeon_alloc import GunbeonAllocator
+from sheet_quota import TokenBucket
+
+_HEADER = struct.Struct(">I")
+
+
+class ShareError(RuntimeError):
+    """공유 캐시 서비스에 연결할 수 없거나 요청이 실패함."""
+
+
+async def _read_frame(reader: asyncio.StreamReader):
+    try:
+        head = await reader.readexactly(_HEADER.size)
+        body = await reader.readexactly(_HEADER.unpack(head)[0])
+    except asyncio.IncompleteReadError:
+        return None
+    return json.loads(body)
+
+
+def _write_frame(writer: asyncio.StreamWriter, obj):
+    body = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    writer.write(_HEADER.pack(len(body)) + body)   # 한 번에 써야 프레임이 섞이지 않음
+
+
+def _write_file(path: str, data: bytes):
+    try:
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARN] 스냅샷 저장 실패({path}): {e}")
+
+
+class ShareServer:
+    """공유 캐시 + 테넌트별 군번 할당기. 요청은 이벤트 루프 하나에서 처리하므로 할당이 겹치지 않는다.
+
+    - get(name[, version, lease]): 값 조회. version 이 다르면 임대(lease)를 주거나,
+      다른 프로세스가 이미 읽는 중이면 그 결과(put)를 최대 lease 초 기다린다.
+    - put(name, version, data) / drop(name, version): 값 저장 / 읽기 실패로 임대 반납
+    - take / release / sync: 군번 할당기 (path 의 스냅샷으로 처음 한 번 적재)
+    - token / untake: 이름별 할당량 토큰 버킷 (처음 요청의 per_min/burst 로 만든다)
+    """
+
+    def __init__(self, path: str, save_delay: float = 1.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._server = None
+        self._conns = set()   # 연결별 처리 태스크
+        self._store = {}    # 이름 → (버전, 데이터, 저장 시각)
+        self._leases = {}   # (이름, 버전) → 읽는 중인 프로세스의 결과를 기다리는 future
+        self._allocs = {}   # 테넌트 키 → [할당기, 스냅샷 경로, 저장 예약 여부]
+        self._buckets = {}  # 버킷 이름 → TokenBucket
+        self.requests = 0
+        self.lease_waits = 0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)   # 이전 실행이 남긴 소켓 파일
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._conns):
+                task.cancel()
+            await asyncio.gather(*self._conns, return_exceptions=True)
+            await self._server.wait_closed()
+        for tenant in list(self._allocs):
+            self._save(tenant)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def _serve(self, reader, writer):
+        task = asyncio.current_task()
+        self._conns.add(task)
+        try:
+            while True:
+                req = await _read_frame(reader)
+                if req is None:
+                    break
+                # 임대 대기 중인 요청이 같은 연결의 다른 요청을 막지 않도록 요청마다 태스크
+                asyncio.get_running_loop().create_task(self._reply(req, writer))
+        except (ConnectionError, json.JSONDecodeError, asyncio.CancelledError):
+            pass   # 끊김/종료: 이 연결만 정리
+        finally:
+            self._conns.discard(task)
+            writer.close()
+
+    async def _reply(self, req, writer):
+        self.requests += 1
+        try:
+            res = {"id": req.get("id"), "ok": True, "value": await self._handle(req)}
+        except Exception as e:
+            res = {"id": req.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if not writer.is_closing():
+            _write_frame(writer, res)
+
+    async def _handle(self, req):
+        op = req.get("op")
+        if op == "get":
+            return await self._get(req["name"], req.get("version"), float(req.get("lease") or 0))
+        if op == "put":
+            self._store[req["name"]] = (req.get("version"), req.get("data"), time.monotonic())
+            self._resolve(req["name"], req.get("version"))
+            return True
+        if op == "drop":
+            self._resolve(req["name"], req.get("version"))
+            return True
+        if op in ("take", "release", "sync"):
+            alloc = self._alloc(req["tenant"], req.get("path"))
+            if op == "take":
+                ids = alloc.take(int(req["n"]), req.get("reserve") or ())
+            else:
+                ids = req.get("ids") or ()
+                ids = alloc.release_many(ids) if op == "release" else alloc.sync(ids)
+            self._schedule_save(req["tenant"])
+            return ids
+        if op in ("token", "untake"):
+            bucket = self._buckets.get(req["name"])
+            if bucket is None:
+                bucket = self._buckets[req["name"]] = TokenBucket(int(req["per_min"]), req.get("burst"))
+            if op == "token":
+                return bucket.try_take()
+            bucket.give_back()
+            return True
+        if op == "stats":
+            return {
+                "requests": self.requests, "entries": len(self._store), "lease_waits": self.lease_waits,
+                "free": {k: a[0].free_count for k, a in self._allocs.items()},
+            }
+        raise ValueError(f"알 수 없는 요청: {op}")
+
+    def _entry(self, name, version=None):
+        entry = self._store.get(name)
+        if entry is None or (version is not None and entry[0] != version):
+            return None
+        return {"version": entry[0], "data": entry[1], "age": time.monotonic() - entry[2]}
+
+    async def _get(self, name, version, lease):
+        hit = self._entry(name, version)
+        if hit is not None or version is None or lease <= 0:
+            return hit
+        key = (name, version)
+        pending = self._leases.get(key)
+        if pending is None or pending.done():
+            # 이 버전을 처음 찾는 프로세스가 시트에서 읽는다 (lease 초 안에 put/drop 이 없으면 만료)
+            fut = self._leases[key] = asyncio.get_running_loop().create_future()
+            asyncio.get_running_loop().call_later(lease, self._expire, key, fut)
+            return {"lease": True}
+        self.lease_waits += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(pending), lease)
+        except asyncio.TimeoutError:
+            pass
+        return self._entry(name, version)   # 그래도 없으면 None → 요청한 쪽이 직접 읽음
+
+    def _resolve(self, name, version):
+        fut = self._leases.pop((name, version), None)
+        if fut is not None and not fut.done():
+            fut.set_result(None)
+
+    def _expire(self, key, fut):
+        if self._leases.get(key) is fut:
+            del self._leases[key]
+        if not fut.done():
+            fut.set_result(None)
+
+    def _alloc(self, tenant: str, path: str | None):
+        entry = self._allocs.get(tenant)
+        if entry is None:
+            alloc = GunbeonAllocator.load(path)[0] if path else None
+            entry = self._allocs[tenant] = [alloc or GunbeonAllocator(), path, False]
+        return entry[0]
+
+    def _schedule_save(self, tenant: str):
+        entry = self._allocs[tenant]
+        if entry[1] is None or entry[2]:
+            return
+        entry[2] = True
+        asyncio.get_running_loop().call_later(self.save_delay, self._save_later, tenant)
+
+    def _save_later(self, tenant: str):
+        entry = self._allocs[tenant]
+        entry[2] = False
+        data = entry[0].to_bytes()   # 직렬화는 루프에서(일관성)
+        asyncio.get_running_loop().run_in_executor(None, _write_file, entry[1], data)
+
+    def _save(self, tenant: str):
+        alloc, path, _ = self._allocs[tenant]
+        if path:
+            _write_file(path, alloc.to_bytes())
+
+
+class ShareClient:
+    """ShareServer 클라이언트. 연결 하나로 요청을 동시에 보내고, 끊기면 다음 요청 때 다시 연결한다."""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                raise ShareError(f"공유 캐시 연결 실패({self.path}): {e}") from None
+            self._reader, self._writer = reader, writer
+            asyncio.get_running_loop().create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader):
+        try:
+            while True:
+                res = await _read_frame(reader)
+                if res is None:
+                    break
+                fut = self._pending.pop(res.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(res)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            if self._reader is reader:
+                self._writer = None
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ShareError("공유 캐시 연결이 끊겼습니다."))
+            self._pending.clear()
+
+    async def request(self, op: str, timeout: float | None = None, **fields):
+        await self._connect()
+        rid = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        try:
+            _write_frame(self._writer, {"id": rid, "op": op, **fields})
+            await self._writer.drain()
+            res = await asyncio.wait_for(fut, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            raise ShareError(f"공유 캐시 응답 시간 초과: {op}") from None
+        except ConnectionError as e:
+            raise ShareError(f"공유 캐시 요청 실패: {e}") from None
+        finally:
+            self._pending.pop(rid, None)
+        if not res["ok"]:
+            raise ShareError(res["error"])
+        return res["value"]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SharedSlot:
+    """공유 캐시의 한 칸 (VersionedCache 의 shared=, 또는 변경 확인 결과 공유).
+
+    서비스 오류는 경고만 하고 None → 호출한 쪽이 시트에서 직접 읽는다.
+    """
+
+    def __init__(self, client: ShareClient, name: str, encode=None, decode=None, lease: float = 15.0):
+        self._client = client
+        self.name = name
+        self._encode = encode or (lambda v: v)
+        self._decode = decode or (lambda v: v)
+        self.lease = lease
+
+    async def fetch(self, version=None, max_age: float | None = None):
+        """version 의 값 (없으면 임대를 받거나 다른 프로세스가 읽은 결과를 기다림). 없으면 None."""
+        lease = self.lease if version is not None else 0
+        try:
+            got = await self._client.request(
+                "get", name=self.name, version=version, lease=lease, timeout=lease + self._client.timeout,
+            )
+        except ShareError as e:
+            print(f"[WARN] 공유 캐시 조회 실패({self.name}): {e}")
+            return None
+        if not got or got.get("lease"):
+            return None
+        if max_age is not None and got["age"] > max_age:
+            return None
+        return self._decode(got["data"])
+
+    async def publish(self, version, value):
+        try:
+            await self._client.request("put", name=self.name, version=version, data=self._encode(value))
+        except ShareError as e:
+            print(f"[WARN] 공유 캐시 저장 실패({self.name}): {e}")
+
+    async def abandon(self, version):
+        """읽기 실패: 임대를 돌려줘서 기다리던 프로세스가 바로 직접 읽게 한다."""
+        try:
+            await self._client.request("drop", name=self.name, version=version)
+        except ShareError:
+            pass
+
+
+class SharedAllocator:
+    """ShareServer 안의 할당기를 쓰는 군번 할당기 (GunbeonWriter 용, take/release_many 는 코루틴).
+
+    할당기 연결이 안 되면 실패한다: 프로세스별로 따로 뽑으면 중복 군번이 생길 수 있으므로.
+    """
+
+    def __init__(self, client: ShareClient, tenant: str, path: str | None = None):
+        self._client = client
+        self.tenant = tenant
+        self.path = path
+        self._bg = set()
+
+    async def take(self, n: int, reserve=()) -> list:
+        if n <= 0 and not reserve:
+            return []
+        return await self._client.request(
+            "take", tenant=self.tenant, path=self.path, n=n, reserve=[r for r in reserve if r],
+        )
+
+    async def release_many(self, ids) -> int:
+        ids = [i for i in ids if i]
+        if not ids:
+            return 0
+        return await self._client.request("release", tenant=self.tenant, path=self.path, ids=ids)
+
+    def sync(self, ids) -> int:
+        """시트에서 읽은 군번을 서비스 할당기에 합친다 (백그라운드 전송, 항상 0 반환)."""
+        task = asyncio.get_running_loop().create_task(self._sync(list(ids)))
+        self._bg.add(task)
+        task.add_done_callback(self._bg.discard)
+        return 0
+
+    async def _sync(self, ids):
+        try:
+            await self._client.request("sync", tenant=self.tenant, path=self.path, ids=ids)
+        except ShareError as e:
+            print(f"[WARN] 공유 군번 할당기 동기화 실패({self.tenant}): {e}")
+
+
+class SharedBucket:
+    """ShareServer 안의 토큰 버킷 (QuotaScheduler 의 buckets=, try_take 는 코루틴).
+
+    워커가 각자 버킷을 가지면 분당 할당량이 워커 수만큼 늘어나므로 토큰은 서비스에서 받는다.
+    서비스에 연결할 수 없으면 할당량을 workers 로 나눈 로컬 버킷으로 대신한다 (합이 할당량을 넘지 않게).
+    """
+
+    def __init__(self, client: ShareClient, name: str, per_minute: int, burst: int | None = None,
+                 workers: int = 1):
+        self._client = client
+        self.name = name
+        self.per_minute = per_minute
+        self.burst = burst
+        workers = max(1, workers)
+        self.fallback = TokenBucket(
+            max(1, per_minute // workers), None if burst is None else max(1, burst // workers),
+        )
+        self._local = False   # 마지막 토큰을 로컬 버킷에서 받았는지 (give_back 대상)
+        self._warned = False
+        self._bg = set()
+
+    async def try_take(self) -> float:
+        try:
+            wait = await self._client.request("token", name=self.name, per_min=self.per_minute, burst=self.burst)
+        except ShareError as e:
+            if not self._warned:
+                self._warned = True
+                print(f"[WARN] 공유 할당량 버킷 사용 불가({self.name}) → 워커별 몫으로 제한: {e}")
+            self._local = True
+            return self.fallback.try_take()
+        self._warned = False
+        self._local = False
+        return float(wait)
+
+    def give_back(self):
+        if self._local:
+            self.fallback.give_back()
+            return
+        task = asyncio.get_running_loop().create_task(self._untake())
+        self._bg.add(task)
+        task.add_done_callback(self._bg.discard)
+
+    async def _untake(self):
+        try:
+            await self._client.request("untake", name=self.name, per_min=self.per_minute, burst=self.burst)
+        except ShareError:
+            pass   # 토큰 하나를 덜 돌려받는 것뿐
@@ -0,0 +1,56 @@
+# 💾 시트 데이터 로컬 스냅샷 (SQLite)
+# 재시작(배포/일일 재시작) 직후 첫 요청이 시트 전체 다운로드를 기다리지 않도록,
+# 파싱된 명단/운세 데이터를 버전 표식(수정 시각)과 함께 파일에 저장해 둔다.
+# 시작 시 스냅샷을 바로 캐시에 넣고, 시트와의 비교는 백그라운드 재검증에 맡긴다.
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+
+FORMAT = 1   # 값 직렬화 형식이 바뀌면 올린다 (이전 형식 스냅샷은 무시)
+
+
+class SnapshotStore:
+    """이름 → (값, 버전) 스냅샷 저장소. 값은 JSON 으로 직렬화 가능한 형태로 받는다.
+
+    호출마다 연결을 새로 여므로 워커 스레드에서 불러도 된다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " name TEXT PRIMARY KEY, format INTEGER NOT NULL, version TEXT,"
+                " saved_at REAL NOT NULL, data BLOB NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def save(self, name: str, version, value):
+        """값을 압축해 저장 (실패는 경고만)."""
+        try:
+            blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            with closing(self._connect()) as db, db:
+                db.execute(
+                    "INSERT OR REPLACE INTO snapshots (name, format, version, saved_at, data) VALUES (?, ?, ?, ?, ?)",
+                    (name, FORMAT, version, time.time(), blob),
+                )
+        except Exception as e:
+            print(f"[WARN] 스냅샷 저장 실패({name}): {e}")
+
+    def load(self, name: str):
+        """(값, 버전, 저장 시각). 없거나 형식이 다르거나 깨졌으면 None."""
+        try:
+            with closing(self._connect()) as db:
+                row = db.execute(
+                    "SELECT format, version, saved_at, data FROM snapshots WHERE name = ?", (name,)
+                ).fetchone()
+            if row is None or row[0] != FORMAT:
+                return None
+            return json.loads(zlib.decompress(row[3]).decode("utf-8")), row[1], row[2]
+        except Exception as e:
+            print(f"[WARN] 스냅샷 읽기 실패({name}): {e}")
+            return None
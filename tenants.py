@@ -0,0 +1,161 @@
+# 🏘️ 서버(길드)별 스프레드시트 라우팅
+# 서버 id → 스프레드시트 키(+선택: 다른 서비스 계정). 프로세스 하나가 여러 서버를 맡는다.
+# - 스프레드시트 키가 같은 서버들은 테넌트(문서 핸들·캐시·할당량 버킷) 하나를 공유
+# - 테넌트는 처음 쓰일 때 만든다 (설정만 많고 조용한 서버는 메모리를 쓰지 않음)
+#   만드는 일(스냅샷·저널 적재)은 블로킹이므로 명령 경로에서는 aget() 으로 워커 스레드에서 만들고 기다린다
+# - 인증된 gspread 클라이언트(토큰 + keep-alive 세션)는 인증정보별로 하나만 만들어 공유
+#
+# 설정 예 (TENANTS 환경변수 또는 TENANTS_FILE 의 JSON):
+#   {"123456789012345678": "시트키",
+#    "234567890123456789": {"sheet_key": "시트키2", "creds_env": "GOOGLE_CREDS_B", "name": "2중대"}}
+# 설정에 없는 서버와 DM 은 기본 테넌트(SHEET_KEY / GOOGLE_CREDS)를 쓴다.
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+
+
+class TenantSpec:
+    """테넌트 하나의 설정: 스프레드시트 키, 인증정보(JSON 문자열), 지표용 이름."""
+
+    __slots__ = ("key", "creds", "name")
+
+    def __init__(self, key: str, creds: str, name: str | None = None):
+        self.key = key
+        self.creds = creds
+        self.name = name or key[:8]
+
+
+def parse_routes(raw: str, default_creds: str, env=None) -> dict:
+    """TENANTS JSON → {서버 id: TenantSpec}. 형식이 잘못되면 ValueError."""
+    env = env if env is not None else {}
+    data = json.loads(raw) if raw.strip() else {}
+    if not isinstance(data, dict):
+        raise ValueError("TENANTS 는 {서버 id: 시트키 | {...}} 형태의 JSON 객체여야 합니다.")
+    routes = {}
+    for gid, v in data.items():
+        if not str(gid).isdigit():
+            raise ValueError(f"서버 id 가 숫자가 아닙니다: {gid!r}")
+        if isinstance(v, str):
+            v = {"sheet_key": v}
+        if not isinstance(v, dict) or not v.get("sheet_key"):
+            raise ValueError(f"서버 {gid}: sheet_key 가 없습니다.")
+        creds = default_creds
+        if v.get("creds_env"):
+            creds = env.get(v["creds_env"])
+            if not creds:
+                raise ValueError(f"서버 {gid}: 환경변수 {v['creds_env']} 가 비어 있습니다.")
+        routes[int(gid)] = TenantSpec(v["sheet_key"], creds, v.get("name"))
+    return routes
+
+
+class ClientPool:
+    """인증정보별 gspread 클라이언트 공유 풀 (LRU, 최대 max_clients 개).
+
+    get() 은 블로킹(인증)이므로 워커 스레드에서 부른다. 같은 인증정보로 동시에 불려도
+    인증은 한 번만 한다. 한도를 넘으면 가장 오래 안 쓴 클라이언트를 풀에서 뺀다
+    (이미 연결된 테넌트는 그 클라이언트를 계속 쓰고, 새 테넌트는 다시 인증).
+    """
+
+    def __init__(self, authorize, max_clients: int = 8):
+        self._authorize = authorize   # authorize(인증정보 JSON 문자열) → 클라이언트
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._creating = {}   # 인증정보 → 인증 중 lock
+        self.authorized = 0
+        self.evicted = 0
+
+    def get(self, creds: str):
+        with self._lock:
+            client = self._lookup(creds)
+            if client is not None:
+                return client
+            pending = self._creating.setdefault(creds, threading.Lock())
+        with pending:
+            with self._lock:
+                client = self._lookup(creds)
+                if client is not None:
+                    return client
+            client = self._authorize(creds)
+            with self._lock:
+                self._creating.pop(creds, None)
+                self._clients[creds] = client
+                self.authorized += 1
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+                    self.evicted += 1
+            return client
+
+    def _lookup(self, creds: str):
+        client = self._clients.get(creds)
+        if client is not None:
+            self._clients.move_to_end(creds)
+        return client
+
+    def __len__(self):
+        return len(self._clients)
+
+
+class TenantRegistry:
+    """서버 id → 테넌트. 테넌트는 스프레드시트 키별로 factory(spec) 를 불러 처음 쓸 때 만든다.
+
+    - get(spec): 없으면 factory(spec) 로 바로 만든다 (블로킹, 시작 전/테스트용)
+    - aget(spec, build): 없으면 await build(spec) 로 만든다. 같은 테넌트를 동시에 찾으면 한 번만 만들고
+      모두 그 결과를 기다린다 (만들기에 실패하면 다음 호출 때 다시)
+    """
+
+    def __init__(self, factory, default: TenantSpec, routes: dict | None = None):
+        self._factory = factory
+        self.default_spec = default
+        self.routes = dict(routes or {})
+        self._tenants = {}   # 스프레드시트 키 → 테넌트
+        self._building = {}  # 스프레드시트 키 → 만드는 중인 태스크
+
+    def spec_for(self, guild_id: int | None) -> TenantSpec:
+        return self.routes.get(guild_id, self.default_spec) if guild_id is not None else self.default_spec
+
+    def for_guild(self, guild_id: int | None):
+        return self.get(self.spec_for(guild_id))
+
+    def get(self, spec: TenantSpec):
+        tenant = self._tenants.get(spec.key)
+        if tenant is None:
+            tenant = self._tenants[spec.key] = self._factory(spec)
+        return tenant
+
+    async def aget(self, spec: TenantSpec, build):
+        tenant = self._tenants.get(spec.key)
+        if tenant is not None:
+            return tenant
+        task = self._building.get(spec.key)
+        if task is None:
+            task = self._building[spec.key] = asyncio.get_running_loop().create_task(self._build(spec, build))
+        return await asyncio.shield(task)   # 기다리던 명령이 취소돼도 만들기는 계속
+
+    async def _build(self, spec: TenantSpec, build):
+        try:
+            tenant = self._tenants[spec.key] = await build(spec)
+            return tenant
+        finally:
+            self._building.pop(spec.key, None)
+
+    async def afor_guild(self, guild_id: int | None, build):
+        return await self.aget(self.spec_for(guild_id), build)
+
+    @property
+    def default(self):
+        return self.get(self.default_spec)
+
+    def specs(self) -> list:
+        """설정된 테넌트 설정 (키 중복 제거, 기본 테넌트 먼저)."""
+        seen, out = set(), []
+        for spec in (self.default_spec, *self.routes.values()):
+            if spec.key not in seen:
+                seen.add(spec.key)
+                out.append(spec)
+        return out
+
+    def active(self) -> list:
+        """지금까지 만들어진 테넌트."""
+        return list(self._tenants.values())
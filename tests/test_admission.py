@@ -0,0 +1,100 @@
+# 🚧 입장 제어: 사용자·채널 버킷, 사용자별 동시 실행 수, 명령별 동시 실행 + 대기열
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from admission import Admission, AdmissionRejected
+
+
+def _reason(coro):
+    with pytest.raises(AdmissionRejected) as e:
+        asyncio.run(coro)
+    return e.value
+
+
+def test_user_rate_after_burst():
+    adm = Admission(user_per_min=60, user_burst=2, user_inflight=10)
+
+    async def run():
+        for _ in range(2):
+            await adm.enter("추첨", 1)
+            adm.leave("추첨", 1)
+        await adm.enter("추첨", 1)
+
+    e = _reason(run())
+    assert e.reason == "user_rate" and e.retry_after > 0
+    asyncio.run(adm.enter("추첨", 2))   # 다른 사용자는 영향 없음
+
+
+def test_channel_rate_gives_user_token_back():
+    adm = Admission(user_per_min=60, user_burst=1, channel_per_min=60, channel_burst=1)
+    asyncio.run(adm.enter("추첨", 1, channel_id=10))
+    adm.leave("추첨", 1)
+    assert _reason(adm.enter("추첨", 2, channel_id=10)).reason == "channel_rate"
+    asyncio.run(adm.enter("추첨", 2, channel_id=11))   # 2 의 사용자 토큰은 돌려받았음
+
+
+def test_user_busy():
+    adm = Admission(user_inflight=1)
+
+    async def run():
+        await adm.enter("추첨", 1)
+        await adm.enter("운세", 1)
+
+    assert _reason(run()).reason == "user_busy"
+
+
+def test_queue_full_and_give_back():
+    adm = Admission(user_burst=5, user_per_min=60, wait=5).limit("군번", 1, queue=1)
+
+    async def run():
+        await adm.enter("군번", 1)                     # 실행 중
+        waiter = asyncio.ensure_future(adm.enter("군번", 2))   # 대기열 1칸
+        await asyncio.sleep(0)
+        try:
+            await adm.enter("군번", 3)
+        except AdmissionRejected as e:
+            rejected = e
+        adm.leave("군번", 1)
+        await waiter                                   # 자리를 넘겨받음
+        adm.leave("군번", 2)
+        return rejected
+
+    rejected = asyncio.run(run())
+    assert rejected.reason == "queue_full"
+    # 몰려서 거절된 3 은 토큰을 돌려받고 처리 중 수도 남지 않는다
+    assert adm._users[3][0].tokens == pytest.approx(5, abs=0.1)
+    assert 3 not in adm._inflight and adm._gates["군번"].active == 0
+
+
+def test_queue_timeout():
+    adm = Admission(wait=0.05).limit("군번", 1, queue=1)
+
+    async def run():
+        await adm.enter("군번", 1)
+        await adm.enter("군번", 2)
+
+    assert _reason(run()).reason == "queue_timeout"
+    assert 2 not in adm._inflight
+
+
+def test_command_wrapper_notifies_once():
+    sent = []
+    adm = Admission(user_per_min=60, user_burst=1, render=lambda text: f"[결과]\n{text}", notify_every=60)
+
+    @adm.command("추첨")
+    async def cmd(ctx):
+        return "ok"
+
+    async def send(text):
+        sent.append(text)
+
+    ctx = SimpleNamespace(author=SimpleNamespace(id=1), channel=SimpleNamespace(id=10), send=send)
+
+    async def run():
+        return [await cmd(ctx) for _ in range(3)]
+
+    assert asyncio.run(run()) == ["ok", None, None]
+    assert len(sent) == 1 and sent[0].startswith("[결과]\n⏳")
+    assert adm._inflight == {}
@@ -0,0 +1,134 @@
+# 🧾 감사 기록: 일괄 업로드 + 저널에서 미업로드분 되살리기
+import asyncio
+import json
+
+import pytest
+
+from audit import AuditTrail
+
+
+class FakeSheet:
+    def __init__(self, fail=False):
+        self.rows, self.editors, self.fail = [], [], fail
+
+    async def write(self, rows, editor):
+        if self.fail:
+            raise RuntimeError("시트 오류")
+        self.rows.extend(rows)
+        self.editors.append(editor)
+
+
+def _record(trail, *names):
+    for n in names:
+        trail.record("2026-01-01 00:00", "!군번", f"관리{n}", n, "", f"7200000{n}", "assigned")
+
+
+def test_flush_uploads_in_batches_and_sets_editor():
+    sheet = FakeSheet()
+    trail = AuditTrail(sheet.write, max_batch=2)
+    _record(trail, "1", "2", "3")
+    assert asyncio.run(trail.flush()) == 2
+    assert asyncio.run(trail.flush()) == 1
+    assert [r[3] for r in sheet.rows] == ["1", "2", "3"]
+    assert sheet.editors == ["관리2", "관리3"]
+    assert trail.pending == 0 and trail.flushed == 3
+
+
+def test_failed_flush_keeps_events():
+    sheet = FakeSheet(fail=True)
+    trail = AuditTrail(sheet.write)
+    _record(trail, "1")
+    with pytest.raises(RuntimeError):
+        asyncio.run(trail.flush())
+    assert trail.pending == 1
+    sheet.fail = False
+    assert asyncio.run(trail.flush()) == 1
+
+
+def test_recover_replays_only_unflushed_events(tmp_path):
+    path = str(tmp_path / "audit.jsonl")
+    sheet = FakeSheet()
+    trail = AuditTrail(sheet.write, journal_path=path, max_batch=2)
+    _record(trail, "1", "2", "3")
+    asyncio.run(trail.flush())      # 1, 2 업로드
+    asyncio.run(trail.drain())      # 3 을 올리기 전에 프로세스가 죽음
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 4, "at": "2026')   # 죽는 순간 반쯤 쓴 줄
+
+    again = AuditTrail(sheet.write, journal_path=path)
+    assert again.recover() == 1
+    assert asyncio.run(again.flush()) == 1
+    assert [r[3] for r in sheet.rows] == ["1", "2", "3"]
+    _record(again, "5")             # seq 는 저널의 마지막 번호 다음부터
+    assert again._buffer[-1]["seq"] == 4
+    asyncio.run(again.drain())
+    assert AuditTrail(sheet.write, journal_path=path).recover() == 1
+
+
+def test_events_dropped_from_memory_survive_in_journal(tmp_path):
+    path = str(tmp_path / "audit.jsonl")
+    sheet = FakeSheet(fail=True)
+    trail = AuditTrail(sheet.write, journal_path=path, capacity=2)
+    _record(trail, "1", "2", "3")
+    assert trail.pending == 3 and len(trail) == 2 and trail.dropped == 1
+    asyncio.run(trail.drain())
+
+    sheet.fail = False
+    again = AuditTrail(sheet.write, journal_path=path, capacity=10)
+    assert again.recover() == 3
+    asyncio.run(again.flush())
+    assert [r[3] for r in sheet.rows] == ["1", "2", "3"]
+
+
+def test_journal_is_compacted_after_full_upload(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sheet = FakeSheet()
+    trail = AuditTrail(sheet.write, journal_path=str(path), journal_max=10)
+    _record(trail, "1", "2")
+    asyncio.run(trail.flush())
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [{"flushed": [0, 2]}]
+    again = AuditTrail(sheet.write, journal_path=str(path))
+    assert again.recover() == 0
+    _record(again, "3")
+    assert again._buffer[-1]["seq"] == 3
+    asyncio.run(again.close())
+
+
+def test_dropped_events_are_uploaded_from_journal_first(tmp_path):
+    path = str(tmp_path / "audit.jsonl")
+    sheet = FakeSheet(fail=True)
+    trail = AuditTrail(sheet.write, journal_path=path, capacity=2, max_batch=2)
+    _record(trail, "1", "2", "3", "4", "5")
+    with pytest.raises(RuntimeError):
+        asyncio.run(trail.flush())
+    assert trail.pending == 5 and trail.dropped == 3
+
+    sheet.fail = False
+    while asyncio.run(trail.flush()):
+        pass
+    assert [r[3] for r in sheet.rows] == ["1", "2", "3", "4", "5"]
+    assert trail.pending == 0
+    asyncio.run(trail.drain())
+    assert AuditTrail(sheet.write, journal_path=path).recover() == 0
+
+
+def test_journal_is_compacted_up_to_uploaded_part(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sheet = FakeSheet()
+    trail = AuditTrail(sheet.write, journal_path=str(path), capacity=2, max_batch=3, journal_max=200)
+    _record(trail, "1", "2", "3", "4", "5")   # 1~3 은 메모리에서 빠짐
+    assert asyncio.run(trail.flush()) == 3    # 저널에서 읽은 1~3 업로드 → 앞부분 잘라 냄
+    asyncio.run(trail.drain())
+    items = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert items[0] == {"flushed": [0, 3]}
+    assert [item["seq"] for item in items if "seq" in item] == [4, 5]
+
+    assert asyncio.run(trail.flush()) == 2
+    asyncio.run(trail.close())
+    assert [r[3] for r in sheet.rows] == ["1", "2", "3", "4", "5"]
+    again = AuditTrail(sheet.write, journal_path=str(path))
+    assert again.recover() == 0
+    _record(again, "6")
+    assert again._buffer[-1]["seq"] == 6
+    asyncio.run(again.close())
@@ -0,0 +1,93 @@
+# 🎯 !추첨: 가중 비복원 추출 / 후보 배열(DrawPool) / 옵션 파싱
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from draw import WEIGHT_MAX, DrawPool, FenwickTree, parse_draw_options, weighted_sample
+from roster import RosterIndex
+
+
+def _pool(people):
+    """people: [(이름, 계급, 군번)] → B6 부터 채운 명단의 DrawPool."""
+    rows = [["이름", "계급", "군번"]] + [["", "", ""]] * 4 + [list(p) for p in people]
+    return DrawPool(RosterIndex(rows))
+
+
+def test_fenwick_prefix_and_find():
+    tree = FenwickTree([1.0, 0.0, 2.0, 3.0])
+    assert tree.total == 6.0
+    assert [tree.prefix(i) for i in range(5)] == [0.0, 1.0, 1.0, 3.0, 6.0]
+    assert [tree.find(u) for u in (0.0, 0.99, 1.0, 2.9, 3.0, 5.9)] == [0, 0, 2, 2, 3, 3]
+    tree.add(3, -3.0)
+    assert tree.total == 3.0
+
+
+def test_weighted_sample_is_distinct_and_skips_zero_weights():
+    rng = random.Random(1)
+    for _ in range(200):
+        picks = weighted_sample([1, 0, 2, 0, 3], 5, rng)
+        assert sorted(picks) == [0, 2, 4]
+
+
+def test_weighted_sample_follows_weights():
+    rng = random.Random(2)
+    counts = Counter(weighted_sample([1, 3], 1, rng)[0] for _ in range(4000))
+    assert 0.7 < counts[1] / 4000 < 0.8
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 1, math.inf, 1, 1],   # inf 한 명은 절대 안 뽑히고 나머지는 결정적이 되던 경우
+    [1, math.nan, 1],         # nan 이 조용히 0 이 되던 경우
+    [1e308, 1e308, 1],        # 합이 넘쳐 0번이 뽑히지 않던 경우
+])
+def test_weighted_sample_rejects_non_finite_weights(weights):
+    with pytest.raises(ValueError):
+        weighted_sample(weights, 2, random.Random(3))
+
+
+def test_draw_uniform_with_exclusions():
+    pool = _pool([(f"사람{i}", "병장", "") for i in range(10)])
+    assert len(pool) == 10
+    rng = random.Random(4)
+    for _ in range(100):
+        winners, total = pool.draw(3, rng, exclude={"사람0", "사람1"})
+        assert total == 8
+        assert len(set(winners)) == 3 and not {"사람0", "사람1"} & set(winners)
+
+
+def test_draw_rank_filter_weights_and_has_id():
+    pool = _pool([("갑", "병장", "72000001"), ("을", "상병", ""), ("병", "상병", "72000002"), ("정", "일병", "")])
+    rng = random.Random(5)
+    winners, total = pool.draw(5, rng, ranks={"상병"})
+    assert sorted(winners) == ["병", "을"] and total == 2
+    winners, total = pool.draw(5, rng, has_id=True)
+    assert sorted(winners) == ["갑", "병"] and total == 2
+    winners, total = pool.draw(4, rng, weights={"일병": 0})
+    assert "정" not in winners and total == 3
+    # 트리는 추첨 뒤 원래 가중치로 돌아와야 한다 (제외/당첨 위치를 잠시 0 으로 했던 것)
+    for _ in range(50):
+        winners, _ = pool.draw(1, rng, weights={"병장": 2}, exclude={"갑"})
+        assert winners[0] != "갑"
+
+
+def test_draw_rejects_overflowing_weights():
+    pool = _pool([("갑", "병장", ""), ("을", "상병", "")])
+    with pytest.raises(ValueError):
+        pool.draw(1, random.Random(6), weights={"병장": 1e308, "상병": 1e308})
+
+
+def test_parse_draw_options():
+    opts, err = parse_draw_options(["누적", "군번없음", "계급=병장, 상병", "가중=병장:3,상병:0.5"])
+    assert err is None
+    assert opts == {"ranks": {"병장", "상병"}, "has_id": False, "cumulative": True,
+                    "weights": {"병장": 3.0, "상병": 0.5}}
+    assert parse_draw_options(["모름"])[0] is None
+    assert parse_draw_options(["가중=병장:x"])[0] is None
+
+
+@pytest.mark.parametrize("value", ["inf", "-inf", "nan", "1e400", "-1", str(WEIGHT_MAX * 2)])
+def test_parse_draw_options_rejects_bad_weights(value):
+    opts, err = parse_draw_options([f"가중=병장:{value}"])
+    assert opts is None and "가중치" in err
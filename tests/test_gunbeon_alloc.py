@@ -0,0 +1,113 @@
+# 🔢 GunbeonAllocator: free-list 할당/반납/재사용 + 스냅샷
+import random
+
+import pytest
+
+import gunbeon_alloc
+from gunbeon_alloc import SPACE, GunbeonAllocator
+
+
+def test_parse_and_format():
+    assert GunbeonAllocator.parse("72012345") == 12345
+    assert GunbeonAllocator.parse(" 72999999 ") == 999999
+    for bad in ("", None, "71012345", "7201234", "72o12345"):
+        assert GunbeonAllocator.parse(bad) is None
+    assert GunbeonAllocator.format(7) == "72000007"
+
+
+def test_reserve_marks_used_once():
+    alloc = GunbeonAllocator(used=["72000001", "72000001", "bad"])
+    assert alloc.used_count == 1
+    assert alloc.is_used("72000001")
+    assert not alloc.reserve("72000001")
+    assert alloc.sync(["72000001", "72000002"]) == 1
+    assert alloc.free_count == SPACE - 2
+
+
+def test_allocate_unique_and_skips_used():
+    used = [GunbeonAllocator.format(n) for n in range(0, SPACE, 1000)]
+    alloc = GunbeonAllocator(used=used, rng=random.Random(5))
+    ids = alloc.take(5000)
+    assert len(set(ids)) == 5000
+    assert not set(ids) & set(used)
+    assert alloc.used_count == len(used) + 5000
+
+
+def test_release_puts_number_back_on_free_list():
+    alloc = GunbeonAllocator(rng=random.Random(7))
+    gid = alloc.allocate()
+    assert alloc.is_used(gid)
+    assert alloc.release(gid)
+    assert not alloc.release(gid)             # 두 번 반납해도 한 번만
+    assert not alloc.is_used(gid)
+    assert alloc.free_count == SPACE
+    # 반납된 번호는 다시 뽑힐 수 있다: 하나만 남기고 모두 사용 중이면 그 번호가 나온다
+    alloc._free = 0
+    alloc.release(gid)
+    assert alloc.allocate() == gid
+    assert alloc.allocate() is None
+
+
+def test_release_many_ignores_unknown_and_free_ids():
+    alloc = GunbeonAllocator(used=["72000010", "72000011"])
+    assert alloc.release_many(["72000010", "72000012", "x", "72000011"]) == 2
+    assert alloc.used_count == 0
+
+
+def test_take_reserves_sheet_ids_first():
+    alloc = GunbeonAllocator(rng=random.Random(9))
+    ids = alloc.take(3, reserve=["72000100"])
+    assert alloc.is_used("72000100") and "72000100" not in ids
+    assert alloc.used_count == 4
+
+
+def test_snapshot_round_trip(tmp_path):
+    alloc = GunbeonAllocator(used=["72000001", "72999999"], rng=random.Random(11))
+    alloc.take(10)
+    path = tmp_path / "alloc.bin"
+    path.write_bytes(alloc.to_bytes("v1"))
+    again, version = GunbeonAllocator.load(str(path))
+    assert version == "v1"
+    assert sorted(again.used_ids()) == sorted(alloc.used_ids())
+
+
+def test_load_missing_or_corrupt(tmp_path):
+    assert GunbeonAllocator.load(str(tmp_path / "none.bin")) == (None, None)
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"nope")
+    assert GunbeonAllocator.load(str(bad)) == (None, None)
+
+
+def test_new_allocator_is_sparse():
+    alloc = GunbeonAllocator(rng=random.Random(13))
+    assert not alloc._dense and not alloc._ids and not alloc._pos   # 번호 공간 크기와 무관하게 비어 있음
+    ids = alloc.take(100)
+    assert len(alloc._pos) <= 2 * len(ids)
+    alloc.release_many(ids)
+    assert alloc.free_count == SPACE
+    assert sorted(alloc.used_ids()) == []
+
+
+@pytest.mark.parametrize("dense_at", [SPACE // 32, 50])
+def test_random_operations_match_reference_set(monkeypatch, dense_at):
+    monkeypatch.setattr(gunbeon_alloc, "_DENSE_AT", dense_at)   # 50: 도중에 배열로 바뀌는 경우
+    rng = random.Random(17)
+    alloc = GunbeonAllocator(rng=random.Random(19))
+    used = set()
+    for _ in range(3000):
+        op = rng.random()
+        if op < 0.5:
+            gid = alloc.allocate()
+            assert gid not in used
+            used.add(gid)
+        elif op < 0.8 and used:
+            gid = rng.choice(sorted(used))
+            assert alloc.release(gid)
+            used.discard(gid)
+        else:
+            gid = GunbeonAllocator.format(rng.randrange(2000))
+            assert alloc.reserve(gid) == (gid not in used)
+            used.add(gid)
+    assert alloc.used_count == len(used)
+    assert {GunbeonAllocator.format(n) for n in alloc.used_ids()} == used
+    assert alloc._dense == (dense_at == 50)
@@ -0,0 +1,155 @@
+# ✍️ GunbeonWriter: 배치 처리 / 행 변경(충돌) / 쓰기 실패 시 번호 반납
+import asyncio
+import random
+
+import pytest
+
+from gunbeon_alloc import GunbeonAllocator
+from gunbeon_writer import GunbeonWriter, scan_gunbeon_rows
+from roster import RosterIndex
+
+
+class FakeSheet:
+    """'군번' B:D 값 (1행 헤더) + 호출 기록."""
+
+    def __init__(self, names, ids=None):
+        ids = ids or {}
+        self.rows = [["이름", "계급", "군번"]] + [[n, "병장", ids.get(n, "")] for n in names]
+        self.index = RosterIndex(self.rows)   # 봇이 들고 있는 (오래됐을 수 있는) 명단 인덱스
+        self.reads, self.full_reads, self.writes = [], 0, []
+        self.fail_write = None
+
+    def find_rows(self, names):
+        return {n: self.index.find_exact(n) for n in names}
+
+    async def read_cells(self, rows):
+        self.reads.append(list(rows))
+        return [list(self.rows[r - 1]) for r in rows]
+
+    async def read_all(self):
+        self.full_reads += 1
+        return [list(r) for r in self.rows]
+
+    async def write_cells(self, data):
+        if self.fail_write is not None:
+            raise self.fail_write
+        self.writes.append(data)
+        for item in data:
+            self.rows[int(item["range"][1:]) - 1][2] = item["values"][0][0]
+
+
+def _writer(sheet, alloc=None, **kwargs):
+    alloc = alloc or GunbeonAllocator(rng=random.Random(1))
+    return GunbeonWriter(
+        sheet.find_rows, sheet.read_cells, sheet.read_all, sheet.write_cells, alloc,
+        window=kwargs.pop("window", 0.05), **kwargs,
+    ), alloc
+
+
+def test_concurrent_submits_share_one_read_and_one_write():
+    sheet = FakeSheet(["홍길동", "김철수", "이영희"])
+
+    async def run():
+        writer, _ = _writer(sheet)
+        results = await asyncio.gather(*(writer.submit(n) for n in ("홍길동", "김철수", "이영희")))
+        await writer.close()
+        return writer, results
+
+    writer, results = asyncio.run(run())
+    assert [r.status for r in results] == ["assigned"] * 3
+    assert len({r.new_id for r in results}) == 3
+    assert all(GunbeonAllocator.parse(r.new_id) is not None for r in results)
+    assert len(sheet.reads) == 1 and len(sheet.writes) == 1
+    assert writer.batches == 1 and writer.coalesced == 2
+    assert [row[2] for row in sheet.rows[1:]] == [r.new_id for r in results]
+
+
+def test_exists_force_and_not_found():
+    sheet = FakeSheet(["홍길동", "김철수"], ids={"홍길동": "72000001"})
+    alloc = GunbeonAllocator(used=["72000001"], rng=random.Random(2))
+
+    async def run():
+        writer, _ = _writer(sheet, alloc)
+        exists = await writer.submit("홍길동")
+        reissued = await writer.submit("홍길동", force=True)
+        missing = await writer.submit("없는사람")
+        await writer.close()
+        return exists, reissued, missing
+
+    exists, reissued, missing = asyncio.run(run())
+    assert (exists.status, exists.current) == ("exists", "72000001")
+    assert reissued.status == "reissued" and reissued.current == "72000001"
+    assert reissued.new_id != "72000001"
+    assert not alloc.is_used("72000001")    # 재발급으로 풀린 번호는 반납
+    assert alloc.is_used(reissued.new_id)
+    assert missing.status == "not_found"
+
+
+def test_same_name_twice_in_one_batch_gets_one_number():
+    sheet = FakeSheet(["홍길동"])
+
+    async def run():
+        writer, _ = _writer(sheet)
+        results = await writer.submit_many(["홍길동", "홍길동"])
+        await writer.close()
+        return results
+
+    first, second = asyncio.run(run())
+    assert first.status == "assigned"
+    assert (second.status, second.current) == ("exists", first.new_id)
+
+
+def test_moved_row_falls_back_to_full_read():
+    sheet = FakeSheet(["홍길동", "김철수"])
+    # 시트에서 사람이 행을 바꿨지만 인덱스는 아직 예전 위치를 가리킴
+    sheet.rows[1], sheet.rows[2] = sheet.rows[2], sheet.rows[1]
+    seen = []
+
+    async def run():
+        writer, _ = _writer(sheet, on_full_read=seen.append)
+        res = await writer.submit("홍길동")
+        await writer.close()
+        return writer, res
+
+    writer, res = asyncio.run(run())
+    assert res.status == "assigned" and res.row == 3
+    assert sheet.rows[2] == ["홍길동", "병장", res.new_id]
+    assert sheet.rows[1][2] == ""             # 다른 사람 행에 쓰지 않음
+    assert writer.full_reads == 1 and len(seen) == 1
+
+
+def test_write_failure_returns_numbers_and_raises():
+    sheet = FakeSheet(["홍길동", "김철수"])
+    sheet.fail_write = RuntimeError("boom")
+    alloc = GunbeonAllocator(rng=random.Random(3))
+    free = alloc.free_count
+
+    async def run():
+        writer, _ = _writer(sheet, alloc)
+        results = await writer.submit_many(["홍길동", "없는사람"])
+        await writer.close()
+        return results
+
+    failed, missing = asyncio.run(run())
+    assert isinstance(failed, RuntimeError)
+    assert missing.status == "not_found"       # 쓰지 않은 요청은 결과 그대로
+    assert alloc.free_count == free            # 뽑았던 번호는 반납
+
+
+def test_submit_after_close_is_rejected():
+    sheet = FakeSheet(["홍길동"])
+
+    async def run():
+        writer, _ = _writer(sheet)
+        await writer.submit("홍길동")
+        await writer.close()
+        with pytest.raises(RuntimeError):
+            await writer.submit("홍길동")
+
+    asyncio.run(run())
+
+
+def test_scan_gunbeon_rows_skips_header_and_keeps_first_row():
+    first_row, current = scan_gunbeon_rows([["이름", "", "군번"], ["홍길동", "", " 72000001 "], ["홍길동", "", ""]])
+    assert first_row == {"홍길동": 2}
+    assert current == {2: "72000001", 3: ""}
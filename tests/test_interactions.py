@@ -0,0 +1,75 @@
+# ⏳ AutoDefer: 자동 defer 후 응답의 공개 범위(ephemeral)
+import asyncio
+
+from interactions import AutoDefer
+
+
+class FakeInteraction:
+    """response / followup / delete_original_response 호출 기록."""
+
+    def __init__(self):
+        self.calls = []
+        outer = self
+
+        class Response:
+            async def defer(self, **kwargs):
+                outer.calls.append(("defer", kwargs.get("ephemeral", False)))
+
+            async def send_message(self, content=None, **kwargs):
+                outer.calls.append(("send", content, kwargs.get("ephemeral", False)))
+
+        class Followup:
+            async def send(self, content=None, **kwargs):
+                outer.calls.append(("followup", content, kwargs.get("ephemeral", False)))
+
+        self.response = Response()
+        self.followup = Followup()
+
+    async def delete_original_response(self):
+        self.calls.append(("delete",))
+
+
+def _run(handler, budget: float = 0.0, **options):
+    """budget=0 이면 바로 defer(예측), 크면 defer 없이 바로 응답."""
+    auto_defer = AutoDefer(budget=budget)
+
+    @auto_defer("Test", **options)
+    async def callback(self_, interaction):
+        await handler(interaction)
+
+    inter = FakeInteraction()
+    asyncio.run(callback(None, inter))
+    return inter.calls
+
+
+def test_ephemeral_reply_after_public_defer_is_not_leaked():
+    async def handler(inter):
+        await inter.response.send_message("안내", ephemeral=True)
+
+    assert _run(handler) == [("defer", False), ("delete",), ("followup", "안내", True)]
+
+
+def test_public_reply_after_public_defer_replaces_thinking_message():
+    async def handler(inter):
+        await inter.response.send_message("결과")
+        await inter.followup.send("추가 안내", ephemeral=True)   # 두 번째부터는 새 메시지
+
+    assert _run(handler) == [("defer", False), ("followup", "결과", False), ("followup", "추가 안내", True)]
+
+
+def test_ephemeral_flag_defers_privately():
+    async def private(inter):
+        await inter.response.send_message("나만", ephemeral=True)
+
+    async def public(inter):
+        await inter.response.send_message("모두")
+
+    assert _run(private, ephemeral=True) == [("defer", True), ("followup", "나만", True)]
+    assert _run(public, ephemeral=True) == [("defer", True), ("delete",), ("followup", "모두", False)]
+
+
+def test_fast_callback_answers_directly():
+    async def handler(inter):
+        await inter.response.send_message("안내", ephemeral=True)
+
+    assert _run(handler, budget=10.0) == [("send", "안내", True)]
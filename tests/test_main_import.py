@@ -0,0 +1,27 @@
+# 📦 main.py 를 가져오기만 해서는 로컬 파일(스냅샷 DB 등)을 만들지 않아야 한다
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_creates_no_files(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    work = tmp_path / "work"
+    work.mkdir()
+    env = dict(
+        os.environ, PYTHONPATH=ROOT, DISCORD_BOT_TOKEN="test", GOOGLE_CREDS="{}", SHEET_KEY="test-key",
+        BOT_DATA_DIR=str(data),
+    )
+    for key in ("SHEET_SNAPSHOT_PATH", "GUNBEON_ALLOC_SNAPSHOT", "AUDIT_JOURNAL", "SHEET_SHARE_SOCKET", "TENANTS"):
+        env.pop(key, None)
+    code = "import main; print(main.SHEET_SNAPSHOT_PATH); print(main.sheet_snapshots)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=work, env=env, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    lines = out.stdout.strip().splitlines()
+    assert lines[-2] == str(data / "sheet_snapshot.db")   # 기본 경로는 실행 위치가 아니라 데이터 폴더
+    assert lines[-1] == "None"
+    assert list(work.iterdir()) == []
+    assert list(data.iterdir()) == []
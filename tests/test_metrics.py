@@ -0,0 +1,41 @@
+# 📈 지표: fn 게이지는 연결된 이벤트 루프 스레드에서 읽고, 실패하면 이전 값 유지
+import asyncio
+import threading
+
+from metrics import Registry
+
+
+def test_fn_gauges_are_read_on_the_bound_loop():
+    reg = Registry()
+    seen = []
+
+    def read():
+        seen.append(threading.get_ident())
+        return {("a",): 1}
+
+    reg.gauge("tenants", "테스트", ("tenant",), fn=read)
+
+    async def main():
+        reg.bind_loop(asyncio.get_running_loop())
+        text = await asyncio.get_running_loop().run_in_executor(None, reg.render)   # HTTP 스레드처럼
+        return text, threading.get_ident()
+
+    text, loop_thread = asyncio.run(main())
+    assert 'tenants{tenant="a"} 1' in text
+    assert seen == [loop_thread]
+
+
+def test_failed_fn_keeps_previous_values(capsys):
+    reg = Registry()
+    state = {"fail": False}
+
+    def read():
+        if state["fail"]:
+            raise RuntimeError("dictionary changed size during iteration")
+        return {("a",): 3}
+
+    reg.gauge("pending", "테스트", ("tenant",), fn=read)
+    assert 'pending{tenant="a"} 3' in reg.render()
+    state["fail"] = True
+    assert 'pending{tenant="a"} 3' in reg.render()
+    assert "pending 수집 실패" in capsys.readouterr().out
@@ -0,0 +1,71 @@
+# 🪖 RosterIndex: 이름 조회 / 증분 갱신
+from roster import RosterIndex, normalize_name
+
+
+def _index(*names):
+    # 1행은 헤더, 2행부터 [이름, 계급, 군번]
+    return RosterIndex([["이름", "계급", "군번"]] + [[n, "병장", ""] for n in names])
+
+
+def test_normalize_name():
+    assert normalize_name("  홍\u200b길동  ") == "홍길동"
+    assert normalize_name("김  철수") == "김 철수"
+    assert normalize_name(None) == ""
+
+
+def test_find_exact_and_partial():
+    idx = _index("홍길동", "김철수", "이영희")
+    assert idx.find("김철수") == 3
+    assert idx.find(" 김철수\u200b") == 3      # 정규화 후 정확 일치
+    assert idx.find("철수") == 3                # 이름이 검색어를 포함
+    assert idx.find("이영희병장") == 4          # 검색어가 이름을 포함
+    assert idx.find("없는사람") is None
+
+
+def test_find_partial_ambiguous_returns_none():
+    idx = _index("김철수", "김철민")
+    assert idx.find("김철") is None
+
+
+def test_find_single_character_query_matches_longer_names():
+    # 회귀: 한 글자 검색어는 2글자 n-gram 으로 찾을 수 없어 여러 글자 이름을 놓쳤다
+    idx = _index("홍길동", "김철수", "이영희")
+    assert idx.find("김") == 3
+    assert idx.find("희") == 4
+    assert _index("김철수", "김영희").find("김") is None   # 후보가 둘이면 채택하지 않음
+
+
+def test_find_single_character_name():
+    idx = _index("훈", "홍길동")
+    assert idx.find("훈") == 2
+    assert idx.find("훈이") == 2
+
+
+def test_set_row_updates_postings():
+    idx = _index("홍길동", "김철수")
+    idx.set_row(3, "박영수", "상병", "72000001")
+    assert idx.find("김철수") is None
+    assert idx.find("철수") is None
+    assert idx.find("영수") == 3
+    assert idx.rank(3) == "상병"
+    assert idx.gunbeon(3) == "72000001"
+    idx.set_row(3, "")
+    assert idx.find("영수") is None
+    assert len(idx) == 1
+
+
+def test_set_gunbeon_and_find_exact():
+    idx = _index("홍길동", "홍길동")
+    assert idx.find_exact(" 홍길동 ") == 2   # 같은 이름이면 첫 행
+    idx.set_gunbeon(2, " 72123456 ")
+    assert idx.gunbeon(2) == "72123456"
+
+
+def test_to_rows_round_trip():
+    idx = _index("홍길동", "", "김철수")
+    idx.set_gunbeon(4, "72000002")
+    again = RosterIndex(idx.to_rows())
+    assert again.names == idx.names
+    assert again.ranks == idx.ranks
+    assert again.ids == idx.ids
+    assert again.find("철수") == 4
@@ -0,0 +1,157 @@
+# 🗂️ VersionedCache + WriteFence: 봇 자신의 쓰기는 캐시를 다시 읽게 하지 않고, 외부 수정은 잡는다
+import asyncio
+
+from sheet_cache import VersionedCache, WriteFence
+
+
+class FakeDoc:
+    """문서 전체 수정 번호 (어느 탭을 써도 올라감) + 탭별 값."""
+
+    def __init__(self):
+        self.rev = 1
+        self.tabs = {"군번": ["홍길동"], "감사기록": []}
+        self.probes = 0
+
+    async def modified_time(self):
+        self.probes += 1
+        return f"rev-{self.rev}"
+
+    async def append(self, tab, row):
+        self.tabs[tab].append(row)
+        self.rev += 1
+
+
+def _setup(doc, check_interval=60.0):
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return list(doc.tabs["군번"])
+
+    cache = VersionedCache("군번", load=load, probe=doc.modified_time, check_interval=check_interval, ttl=3600)
+    fence = WriteFence(doc.modified_time, (cache,))
+    return cache, fence, loads
+
+
+async def _recheck(cache, fence):
+    """쓰기 후 확인을 마치고, 다음 get() 처럼 변경 확인을 강제로 다시 한다."""
+    await fence.settled()
+    cache.invalidate()
+    return await cache.refresh()
+
+
+def test_audit_flush_does_not_invalidate_cache():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, loads = _setup(doc)
+        assert await cache.get() == ["홍길동"]
+        for i in range(3):
+            await fence.write(doc.append, "감사기록", f"기록{i}")   # 다른 탭 쓰기 → 문서 수정 번호 증가
+            assert await _recheck(cache, fence) == ["홍길동"]
+        return cache, fence, loads, doc
+    cache, fence, loads, doc = asyncio.run(run())
+    assert len(loads) == 1 and cache.reloads == 1
+    assert cache.version == "rev-4" and fence.rebased == 3
+
+
+def test_write_path_makes_no_probe_and_burst_settles_once():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, _ = _setup(doc)
+        await cache.get()
+        before = doc.probes
+        gate = asyncio.Event()
+
+        async def slow_append(i):
+            await gate.wait()
+            await doc.append("감사기록", f"기록{i}")
+
+        writes = [asyncio.ensure_future(fence.write(slow_append, i)) for i in range(5)]
+        await asyncio.sleep(0)
+        assert doc.probes == before   # 쓰기 전 확인 없음
+        gate.set()
+        await asyncio.gather(*writes)
+        await fence.settled()
+        return doc.probes - before, cache.version
+    probes, version = asyncio.run(run())
+    assert probes == 1 and version == "rev-6"
+
+
+def test_external_edit_after_write_is_detected():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, loads = _setup(doc)
+        await cache.get()
+        await fence.write(doc.append, "감사기록", "기록")
+        await fence.settled()
+        doc.tabs["군번"].append("김철수")   # 사람이 직접 수정
+        doc.rev += 1
+        return await _recheck(cache, fence), loads
+    value, loads = asyncio.run(run())
+    assert value == ["홍길동", "김철수"] and len(loads) == 2
+
+
+def test_stale_cache_is_not_rebased():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, loads = _setup(doc, check_interval=0.0)   # 확인 주기가 지난 캐시
+        await cache.get()
+        doc.tabs["군번"].append("김철수")   # 확인 주기 밖에서 들어온 외부 수정
+        doc.rev += 1
+        await fence.write(doc.append, "감사기록", "기록")
+        return await _recheck(cache, fence), loads, fence
+    value, loads, fence = asyncio.run(run())
+    assert value == ["홍길동", "김철수"] and len(loads) == 2 and fence.rebased == 0
+
+
+def test_failed_write_still_settles_and_raises():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, loads = _setup(doc)
+        await cache.get()
+
+        async def partial_then_fail():
+            await doc.append("감사기록", "일부")
+            raise RuntimeError("쓰기 실패")
+
+        try:
+            await fence.write(partial_then_fail)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("쓰기 오류가 전달되지 않음")
+        await _recheck(cache, fence)
+        return cache, loads
+    cache, loads = asyncio.run(run())
+    assert cache.version == "rev-2" and len(loads) == 1
+
+
+def test_close_cancels_pending_settle():
+    async def run():
+        doc = FakeDoc()
+        cache, fence, _ = _setup(doc)
+        await cache.get()
+        gate = asyncio.Event()
+
+        async def blocked_probe():
+            await gate.wait()
+            return "rev-x"
+
+        fence._probe = blocked_probe
+        await fence.write(doc.append, "감사기록", "기록")
+        await fence.close()
+        return cache.version, fence._settle
+    version, settle = asyncio.run(run())
+    assert version == "rev-1" and settle is None
+
+
+def test_seeded_value_is_revalidated_in_background():
+    async def run():
+        doc = FakeDoc()
+        cache, _, loads = _setup(doc)
+        cache.seed(["스냅샷"], "rev-0")
+        assert await cache.get() == ["스냅샷"]   # 바로 쓰고 확인은 백그라운드
+        await cache._bg_task
+        return await cache.get(), loads
+    value, loads = asyncio.run(run())
+    assert value == ["홍길동"] and len(loads) == 1
@@ -0,0 +1,89 @@
+# 🚦 QuotaScheduler: 토큰 버킷 / 우선순위 / 429 백오프 재시도
+import asyncio
+
+import pytest
+
+from bench.fake_sheets import api_error
+from sheet_quota import BACKGROUND, INTERACTIVE, QuotaScheduler, SheetUnavailable, TokenBucket, is_retryable
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("base_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.002)
+    return QuotaScheduler(read_per_min=600, write_per_min=600, **kwargs)
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(60, burst=3)
+    assert [bucket.try_take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_take()
+    assert 0 < wait <= 60 / 57
+    bucket.give_back()
+    assert bucket.try_take() == 0.0
+
+
+def test_is_retryable():
+    assert is_retryable(api_error(429))
+    assert is_retryable(api_error(503))
+    assert not is_retryable(api_error(400))
+    assert not is_retryable(ValueError("x"))
+
+
+def test_retries_429_with_backoff_then_succeeds():
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) < 3:
+            raise api_error(429)
+        return "ok"
+
+    sched = _scheduler(max_retries=5)
+    assert asyncio.run(sched.execute("read", attempt)) == "ok"
+    st = sched.report()["read"]
+    assert len(calls) == 3
+    assert (st["throttled"], st["retries"], st["failures"]) == (2, 2, 0)
+
+
+def test_gives_up_after_max_retries():
+    async def attempt():
+        raise api_error(429)
+
+    sched = _scheduler(max_retries=2)
+    with pytest.raises(SheetUnavailable):
+        asyncio.run(sched.execute("write", attempt))
+    st = sched.report()["write"]
+    assert (st["throttled"], st["retries"], st["failures"]) == (3, 2, 1)
+
+
+def test_non_retryable_error_is_raised_immediately():
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        raise api_error(400, "bad range")
+
+    with pytest.raises(Exception) as info:
+        asyncio.run(_scheduler().execute("read", attempt))
+    assert not isinstance(info.value, SheetUnavailable)
+    assert len(calls) == 1
+
+
+def test_interactive_waiters_go_before_background():
+    async def run():
+        sched = QuotaScheduler(read_per_min=600, burst=1)
+        await sched.acquire("read")             # 버스트 소진 → 이후는 대기열
+        order = []
+
+        async def take(tag, prio):
+            await sched.acquire("read", priority=prio)
+            order.append(tag)
+
+        await asyncio.gather(
+            take("bg1", BACKGROUND), take("bg2", BACKGROUND), take("cmd", INTERACTIVE),
+        )
+        return order, sched.report()["read"]
+
+    order, st = asyncio.run(run())
+    assert order == ["cmd", "bg1", "bg2"]
+    assert st["granted"] == 4 and st["waited"] == 3
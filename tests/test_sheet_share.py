@@ -0,0 +1,64 @@
+# 🔗 공유 서비스의 할당량 토큰 버킷 (여러 워커가 분당 할당량 하나를 나눠 씀)
+import asyncio
+import os
+
+from sheet_quota import QuotaScheduler
+from sheet_share import SharedBucket, ShareClient, ShareServer
+
+
+def _with_server(tmp_path, body):
+    async def run():
+        path = os.path.join(str(tmp_path), "share.sock")
+        server = ShareServer(path)
+        await server.start()
+        clients = [ShareClient(path), ShareClient(path)]
+        try:
+            return await body(clients)
+        finally:
+            for c in clients:
+                await c.close()
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_workers_share_one_burst(tmp_path):
+    async def body(clients):
+        buckets = [SharedBucket(c, "시트:read", 60, burst=4, workers=2) for c in clients]
+        waits = [await buckets[i % 2].try_take() for i in range(6)]
+        return waits
+    waits = _with_server(tmp_path, body)
+    assert waits[:4] == [0.0] * 4          # 두 워커를 합쳐 burst 4개
+    assert all(w > 0 for w in waits[4:])   # 그 뒤로는 어느 워커도 바로 못 받음
+
+
+def test_give_back_returns_token_to_service(tmp_path):
+    async def body(clients):
+        a, b = (SharedBucket(c, "시트:write", 60, burst=1) for c in clients)
+        assert await a.try_take() == 0
+        assert await b.try_take() > 0
+        a.give_back()
+        await asyncio.gather(*a._bg)
+        return await b.try_take()
+    assert _with_server(tmp_path, body) == 0
+
+
+def test_scheduler_uses_shared_buckets(tmp_path):
+    async def body(clients):
+        quotas = [
+            QuotaScheduler(buckets={k: SharedBucket(c, f"시트:{k}", 60, burst=2) for k in ("read", "write")})
+            for c in clients
+        ]
+        await quotas[0].acquire("read")
+        await quotas[1].acquire("read")
+        return await quotas[0].buckets["read"].try_take(), await quotas[1].buckets["write"].try_take()
+    read_wait, write_wait = _with_server(tmp_path, body)
+    assert read_wait > 0 and write_wait == 0
+
+
+def test_falls_back_to_worker_share_without_service(tmp_path):
+    async def run():
+        client = ShareClient(os.path.join(str(tmp_path), "missing.sock"), timeout=0.5)
+        bucket = SharedBucket(client, "시트:read", 60, burst=6, workers=3)
+        return [await bucket.try_take() for _ in range(3)]
+    waits = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0] and waits[2] > 0   # burst 6 을 워커 3개로 나눈 2개만
@@ -0,0 +1,54 @@
+# 🏘️ 테넌트 레지스트리: 서버 → 스프레드시트 라우팅, 처음 쓸 때 한 번만 만들기
+import asyncio
+
+import pytest
+
+from tenants import TenantRegistry, TenantSpec, parse_routes
+
+
+def test_parse_routes():
+    routes = parse_routes('{"1": "키1", "2": {"sheet_key": "키2", "creds_env": "B", "name": "2중대"}}',
+                          "기본인증", {"B": "인증B"})
+    assert routes[1].key == "키1" and routes[1].creds == "기본인증"
+    assert (routes[2].key, routes[2].creds, routes[2].name) == ("키2", "인증B", "2중대")
+    for bad in ('["x"]', '{"x": "키"}', '{"1": {}}', '{"1": {"sheet_key": "k", "creds_env": "없음"}}'):
+        with pytest.raises(ValueError):
+            parse_routes(bad, "기본인증", {})
+
+
+def test_aget_builds_once_for_concurrent_callers():
+    built = []
+
+    async def build(spec):
+        built.append(spec.key)
+        await asyncio.sleep(0.01)   # 워커 스레드에서 적재하는 동안
+        return {"key": spec.key}
+
+    async def run():
+        reg = TenantRegistry(None, TenantSpec("기본", "c"), {1: TenantSpec("키1", "c")})
+        got = await asyncio.gather(*(reg.afor_guild(1, build) for _ in range(5)), reg.afor_guild(None, build))
+        return reg, got
+
+    reg, got = asyncio.run(run())
+    assert built == ["키1", "기본"]
+    assert all(g is got[0] for g in got[:5]) and got[5]["key"] == "기본"
+    assert len(reg.active()) == 2
+
+
+def test_aget_retries_after_failed_build():
+    calls = []
+
+    async def build(spec):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("스냅샷 읽기 실패")
+        return object()
+
+    async def run():
+        reg = TenantRegistry(None, TenantSpec("기본", "c"))
+        with pytest.raises(OSError):
+            await reg.aget(reg.default_spec, build)
+        return await reg.aget(reg.default_spec, build), reg
+
+    tenant, reg = asyncio.run(run())
+    assert len(calls) == 2 and reg.active() == [tenant]
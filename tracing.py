@@ -0,0 +1,226 @@
+# 🔎 요청별 추적(span) + 느린 요청 로그 + 샘플링 프로파일러
+# 명령/버튼 하나를 처리하는 동안의 주요 단계(시트 호출, 캐시 조회, 디스코드 전송 등)를
+# 시작 시점·소요 시간과 함께 모아 두고, 전체가 기준(slow)보다 오래 걸리면 로그로 남긴다.
+# 추적 중이 아닐 때 span() 은 아무것도 하지 않는다 (contextvar 조회 1회).
+#
+# 샘플링 프로파일러는 interval 마다 모든 스레드의 호출 스택을 떠서
+# "스레드;함수;함수... 횟수" (folded) 형식으로 센다 → flamegraph.pl / speedscope 에 바로 넣을 수 있다.
+import contextvars
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """요청 하나의 span 목록. span: (이름, 시작 오프셋(초), 소요(초), 성공 여부)"""
+
+    __slots__ = ("name", "meta", "started", "spans", "dropped", "duration")
+
+    MAX_SPANS = 200   # 일괄 처리 등으로 span 이 많아도 메모리는 이만큼만
+
+    def __init__(self, name: str, meta: dict | None = None):
+        self.name = name
+        self.meta = meta or {}
+        self.started = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.duration = None   # finish 후 설정 (이후 들어오는 span 은 무시)
+
+    def add(self, name: str, start: float, seconds: float, ok: bool = True):
+        if self.duration is not None:
+            return   # 끝난 요청이 남긴 백그라운드 작업
+        if len(self.spans) >= self.MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((name, start - self.started, seconds, ok))
+
+    def format(self) -> str:
+        meta = " ".join(f"{k}={v}" for k, v in self.meta.items())
+        total = self.duration if self.duration is not None else time.perf_counter() - self.started
+        lines = [f"[TRACE] {self.name} {total * 1000:.0f}ms {meta}".rstrip()]
+        for name, offset, seconds, ok in sorted(self.spans, key=lambda s: s[1]):
+            lines.append(f"  +{offset * 1000:>6.0f}ms {seconds * 1000:>7.0f}ms {'✓' if ok else '✗'} {name}")
+        covered = _covered(self.spans)
+        lines.append(f"  (span 합집합 {covered * 1000:.0f}ms, 그 밖 {max(0.0, total - covered) * 1000:.0f}ms"
+                     + (f", 생략 {self.dropped}개" if self.dropped else "") + ")")
+        return "\n".join(lines)
+
+
+def _covered(spans) -> float:
+    """겹치는 span 을 합친 총 시간 (동시에 진행된 호출을 두 번 세지 않음)."""
+    total, end = 0.0, None
+    for _, offset, seconds, _ in sorted(spans, key=lambda s: s[1]):
+        stop = offset + seconds
+        if end is None or offset > end:
+            total += seconds
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.trace.add(self.name, self.started, time.perf_counter() - self.started, exc_type is None)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+def span(name: str):
+    """with span("단계"): ... — 추적 중인 요청이면 소요 시간을 기록 (sync/async 코드 모두)."""
+    trace = _current.get()
+    return _Span(trace, name) if trace is not None else _NO_SPAN
+
+
+def add_span(name: str, seconds: float, ok: bool = True):
+    """방금 끝난 단계를 기록 (소요 시간을 이미 잰 경우: 시트 호출 observer 등)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - seconds, seconds, ok)
+
+
+class Tracer:
+    """요청 추적 시작/종료 + 느린 요청 로그.
+
+    - slow: 이 초 이상 걸린 요청은 span 목록을 출력하고 최근 keep 건을 recent 에 보관 (0 이면 끔)
+    - on_slow(trace): 느린 요청마다 호출 (지표 등)
+    """
+
+    def __init__(self, slow: float = 2.0, keep: int = 20, on_slow=None):
+        self.slow = slow
+        self.recent = deque(maxlen=keep)
+        self.on_slow = on_slow
+
+    def start(self, name: str, **meta):
+        """추적 시작 → (trace, token). 같은 태스크에서 finish(trace, token)."""
+        trace = Trace(name, meta)
+        return trace, _current.set(trace)
+
+    def finish(self, trace: Trace, token=None) -> float:
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                _current.set(None)   # 다른 컨텍스트에서 끝난 경우
+        if trace.duration is not None:
+            return trace.duration
+        trace.duration = time.perf_counter() - trace.started
+        if self.slow and trace.duration >= self.slow:
+            self.recent.append(trace)
+            print(trace.format())
+            if self.on_slow is not None:
+                self.on_slow(trace)
+        return trace.duration
+
+
+class SamplingProfiler:
+    """interval 초마다 모든 스레드의 스택을 떠서 folded 스택별 횟수를 센다 (한 번에 하나만 실행).
+
+    메인 스레드에서 시작하고 setitimer 가 있으면(리눅스/맥) SIGALRM 으로 샘플링한다. 핸들러가
+    메인 스레드(이벤트 루프)에서 실행 중이던 프레임을 그대로 받으므로 편향이 없다. 별도 샘플링
+    스레드는 GIL 을 이벤트 루프가 select 에서 놓을 때만 얻어 루프가 늘 놀고 있는 것처럼 보이기
+    때문에, 그 방식은 setitimer 가 없을 때만 쓴다.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 96):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.counts = Counter()
+        self.samples = 0
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._prev_handler = None
+
+    @property
+    def running(self) -> bool:
+        return self.mode is not None
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("프로파일러가 이미 실행 중입니다.")
+        self.counts = Counter()
+        self.samples = 0
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self.mode = "signal"
+            self._prev_handler = signal.signal(signal.SIGALRM, self._on_signal)
+            signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        else:
+            self.mode = "thread"
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> Counter:
+        if self.mode == "signal":
+            signal.setitimer(signal.ITIMER_REAL, 0, 0)
+            signal.signal(signal.SIGALRM, self._prev_handler or signal.SIG_DFL)
+        elif self.mode == "thread":
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.mode = None
+        return self.counts
+
+    def _on_signal(self, signum, frame):
+        self._sample(threading.get_ident(), frame)
+
+    def _loop(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(me, None)
+
+    def _sample(self, skip: int, frame):
+        """frame: 메인 스레드(시그널 핸들러)의 현재 프레임. 그 밖의 스레드는 _current_frames 로."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        if frame is not None:
+            frames[skip] = frame
+            skip = None
+        for ident, f in frames.items():
+            if ident == skip:
+                continue
+            stack = []
+            while f is not None and len(stack) < self.max_depth:
+                code = f.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                f = f.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[";".join(reversed(stack)).replace("\n", " ")] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """flamegraph.pl / speedscope 용 folded 스택 ("a;b;c 횟수" 줄 목록, 많은 순)."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())